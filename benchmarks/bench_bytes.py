@@ -0,0 +1,63 @@
+"""
+Benchmark comparing matching byte payloads directly against decoding them to
+str first, as was needed before bytes-like input was supported.
+
+Run from the project root with:
+    python -m benchmarks.bench_bytes
+"""
+
+import random
+import tracemalloc
+from time import perf_counter
+from src.services.non_finite_automaton import compile_pattern
+
+PAYLOADS = 50
+PAYLOAD_SIZE = 1 << 20
+INFIX = "e.r.r.o.r.(1|2|3)"
+WORDS = ["päivä", "rivi", "err", "ok", "tila"]
+
+
+def payloads():
+    """
+    Random log-like payloads of about a mebibyte with one match near the end.
+    """
+    rng = random.Random(0)
+    result = []
+    for _ in range(PAYLOADS):
+        words = [rng.choice(WORDS) for _ in range(PAYLOAD_SIZE // 5)]
+        words.insert(len(words) - 10, "error2")
+        result.append(" ".join(words).encode("utf-8"))
+    return result
+
+
+def measure(function, data):
+    """
+    Return the seconds and peak traced bytes of calling function on every payload.
+    """
+    tracemalloc.start()
+    start = perf_counter()
+    results = [function(payload) for payload in data]
+    elapsed = perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return results, elapsed, peak
+
+
+def main():
+    """
+    Print the time and peak allocation of searching with and without decoding.
+    """
+    data = payloads()
+    pattern = compile_pattern(INFIX)
+    decoded, decode_time, decode_peak = measure(
+        lambda payload: pattern.search(payload.decode("utf-8")), data
+    )
+    direct, direct_time, direct_peak = measure(pattern.search, data)
+    assert all(span is not None for span in decoded + direct)
+    print(f"{PAYLOADS} payloads of {len(data[0]) >> 10} KiB, search {INFIX!r}")
+    print(f"  decode first {decode_time:>6.3f} s  peak {decode_peak >> 10:>6} KiB")
+    print(f"  bytes        {direct_time:>6.3f} s  peak {direct_peak >> 10:>6} KiB")
+
+
+if __name__ == "__main__":
+    main()
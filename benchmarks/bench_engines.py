@@ -0,0 +1,59 @@
+"""
+Benchmark comparing the matching engines of a compiled Pattern.
+
+Run from the project root with:
+    python -m benchmarks.bench_engines
+"""
+
+import random
+from timeit import timeit
+from src.services.non_finite_automaton import ENGINES, compile_pattern
+
+# (pattern, pieces the string is made of, number of pieces)
+CASES = [
+    ("a.b.c.d.e.f", ("abcdef",), 1),
+    ("(a|b)*.a.(a|b)*", ("a", "b"), 10_000),
+    ("(a|b)*.a.(a|b).(a|b).(a|b)", ("a", "b"), 10_000),
+    ("(a.b|a.c|b.c)*", ("ab", "ac", "bc"), 5_000),
+    ("(a*.b*)*.(a|b)*.a.(a|b)*", ("a", "b"), 10_000),
+    ("((a|b|c)*.(a|b|c)*)*.c", ("a", "b", "c"), 10_000),
+]
+
+REPEATS = 5
+
+
+def bench_case(infix: str, pieces: tuple, count: int) -> None:
+    """
+    Time fullmatch of one random string with every engine and print the results.
+    """
+    rng = random.Random(count)
+    string = "".join(rng.choice(pieces) for _ in range(count))
+
+    print(f"\n{infix}  (string length {len(string)})")
+    baseline = None
+    # The Thompson simulation goes first and is the baseline
+    for engine in sorted(ENGINES, key=lambda name: name != "thompson"):
+        pattern = compile_pattern(infix, engine=engine)
+        pattern.fullmatch(string)  # warm up lazily built state
+        seconds = timeit(lambda: pattern.fullmatch(string), number=REPEATS) / REPEATS
+        baseline = baseline or seconds
+        print(f"  {engine:<12}{seconds * 1000:>10.3f} ms  {baseline / seconds:>7.1f}x", end="")
+        if hasattr(pattern.matcher, "table_size"):
+            print(
+                f"  ({pattern.matcher.state_count} states, "
+                f"{pattern.matcher.table_size} table entries)",
+                end="",
+            )
+        print()
+
+
+def main():
+    """
+    Run every benchmark case.
+    """
+    for case in CASES:
+        bench_case(*case)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmark for the memory mapped line search. Files of growing size are
+scanned and the throughput and peak resident memory are printed, to check that
+memory use does not grow with the file.
+
+Run from the project root with:
+    python -m benchmarks.bench_grep
+"""
+
+import os
+import resource
+import tempfile
+from time import perf_counter
+from src.services.file_search import grep_file
+
+# File sizes in MiB
+SIZES = [16, 64, 256]
+
+PATTERN = "e.r.r.o.r.(1|2|3)+"
+LINE = b"2024-01-01 12:00:00 INFO request served in 12 ms by worker 7\n"
+MATCHING_LINE = b"2024-01-01 12:00:01 WARN error123 while serving request\n"
+
+
+def write_file(path: str, mib: int) -> None:
+    """
+    Write a log file of about the given size, with one matching line in a thousand.
+    """
+    block = LINE * 999 + MATCHING_LINE
+    with open(path, "wb") as file:
+        for _ in range(mib * 2**20 // len(block)):
+            file.write(block)
+
+
+def main():
+    """
+    Print time, throughput and peak RSS for every file size.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        for mib in SIZES:
+            path = os.path.join(directory, f"log_{mib}.txt")
+            write_file(path, mib)
+            start = perf_counter()
+            count = sum(1 for _ in grep_file(PATTERN, path))
+            elapsed = perf_counter() - start
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            os.remove(path)
+            print(
+                f"{mib:>5} MiB  {count:>7} lines  {elapsed:>7.2f} s  "
+                f"{mib / elapsed:>6.1f} MiB/s  peak rss {peak:>7.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Benchmark comparing match_many with different numbers of worker processes
+against matching every string in this process.
+
+Run from the project root with:
+    python -m benchmarks.bench_match_many
+"""
+
+import os
+import random
+from time import perf_counter
+from src.services.non_finite_automaton import compile_pattern
+from src.services.parallel import match_many
+
+STRINGS = 20_000
+INFIX = "(a|b)*.a.(a|b).(a|b).(a|b)"
+
+
+def main():
+    """
+    Print the time to match every string with 1, 2, 4, ... workers.
+    """
+    rng = random.Random(0)
+    strings = ["".join(rng.choice("ab") for _ in range(200)) for _ in range(STRINGS)]
+    pattern = compile_pattern(INFIX, engine="pike_vm")
+
+    start = perf_counter()
+    expected = [pattern.fullmatch(string) for string in strings]
+    serial = perf_counter() - start
+    print(f"{STRINGS} strings, {os.cpu_count()} CPUs")
+    print(f"  in process  {serial:>7.2f} s")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        start = perf_counter()
+        results = list(match_many(pattern, strings, workers=workers, chunksize=500))
+        elapsed = perf_counter() - start
+        assert results == expected
+        print(f"  {workers:>3} workers {elapsed:>7.2f} s  {serial / elapsed:>5.1f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
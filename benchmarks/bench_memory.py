@@ -0,0 +1,74 @@
+"""
+Benchmark comparing the memory use and garbage collection pauses of the linked
+State-object NFA and the array-backed NFA on large automata.
+
+Run from the project root with:
+    python -m benchmarks.bench_memory
+"""
+
+import gc
+import tracemalloc
+from time import perf_counter
+from src.services.non_finite_automaton import ArrayNFA, IndexedNFA, compile_regex
+
+# Number of (a|b)+ blocks concatenated, each adds eight states
+SIZES = [12_500, 50_000]
+
+
+def plus_chain_postfix(blocks: int) -> str:
+    """
+    Postfix for (a|b)+.(a|b)+... with the given number of blocks.
+    """
+    return "ab|+" + "ab|+." * (blocks - 1)
+
+
+def measure(build):
+    """
+    Build an automaton and return it with the bytes allocated and a full GC pause.
+    """
+    gc.collect()
+    tracemalloc.start()
+    automaton = build()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = perf_counter()
+    gc.collect()
+    pause = perf_counter() - start
+    return automaton, allocated, pause
+
+
+def main():
+    """
+    Print memory and GC pause for both representations at every size.
+    """
+    for blocks in SIZES:
+        postfix = plus_chain_postfix(blocks)
+
+        def linked():
+            nfa = compile_regex(postfix)
+            return nfa, IndexedNFA.from_nfa(nfa)
+
+        (nfa, indexed), linked_bytes, linked_pause = measure(linked)
+        states = indexed.state_count
+        del nfa, indexed
+
+        compact, array_bytes, array_pause = measure(lambda: ArrayNFA.from_postfix(postfix))
+        assert compact.state_count == states
+        del compact
+
+        print(f"\n{states} states")
+        print(
+            f"  linked + indexed {linked_bytes / 2**20:>8.1f} MiB  gc {linked_pause * 1000:>7.1f} ms"
+        )
+        print(
+            f"  array            {array_bytes / 2**20:>8.1f} MiB  gc {array_pause * 1000:>7.1f} ms"
+        )
+        print(
+            f"  savings          {linked_bytes / array_bytes:>8.1f}x     "
+            f"{linked_pause / max(array_pause, 1e-9):>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
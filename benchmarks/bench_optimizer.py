@@ -0,0 +1,75 @@
+"""
+Benchmark of the syntax tree optimizer on generated rule sets, reporting the
+NFA size and the compile and search time with and without it.
+
+Run from the project root with:
+    python -m benchmarks.bench_optimizer
+"""
+
+import random
+import string
+from time import perf_counter
+from src.services.non_finite_automaton import ArrayBuilder, PikeVM
+from src.services.regex_parser import compile_ast, optimize, parse_regex
+
+TEXT_LENGTH = 20_000
+
+
+def host_names(rng, count):
+    """
+    Return host names that share prefixes and suffixes, with some duplicates.
+    """
+    stems = ["mail", "login", "secure", "account", "update", "verify"]
+    names = [
+        f"{rng.choice(stems)}{rng.randint(0, 99)}\\.{rng.choice(['com', 'net', 'org'])}"
+        for _ in range(count)
+    ]
+    return names + rng.sample(names, count // 10)
+
+
+def single_characters(rng, count):
+    """
+    Return rules with alternations of single characters, e.g. spelled out digit classes.
+    """
+    digits = "(?:" + "|".join(string.digits) + ")"
+    return [f"{rng.choice(string.ascii_lowercase)}{digits}{digits}" for _ in range(count)]
+
+
+def measure(node, text):
+    """
+    Return the state count, compile time and search time of a syntax tree.
+    """
+    start = perf_counter()
+    automaton = compile_ast(node, ArrayBuilder())
+    compile_time = perf_counter() - start
+    matcher = PikeVM(automaton)
+    start = perf_counter()
+    matcher.search(text)
+    return automaton.state_count, compile_time, perf_counter() - start
+
+
+def main():
+    """
+    Print the size and speed of every rule set before and after optimizing.
+    """
+    rng = random.Random(0)
+    text = "".join(rng.choice(string.ascii_lowercase + ". ") for _ in range(TEXT_LENGTH))
+    rule_sets = {
+        "host names": "|".join(host_names(rng, 2_000)),
+        "digit rules": "|".join(single_characters(rng, 500)),
+        "nested stars": "(?:(?:(?:ab)*)*|(?:c+)*)+x",
+    }
+    print(f"{'rules':<14}{'':<11}{'states':>8}{'compile':>10}{'search':>9}")
+    for name, regex in rule_sets.items():
+        start = perf_counter()
+        tree = parse_regex(regex)
+        optimized = optimize(tree)
+        optimize_time = perf_counter() - start
+        for label, node in (("parsed", tree), ("optimized", optimized)):
+            states, compile_time, search_time = measure(node, text)
+            print(f"{name:<14}{label:<11}{states:>8}{compile_time:>9.3f}s{search_time:>8.3f}s")
+        print(f"{'':<14}{'parse and optimize':<19}{optimize_time:>10.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark comparing a PatternSet with matching every pattern on its own, one
+match per rule and string, at 1k and 10k patterns.
+
+Run from the project root with:
+    python -m benchmarks.bench_pattern_set
+"""
+
+import random
+from time import perf_counter
+from src.services.non_finite_automaton import PatternSet, compile_pattern
+
+SIZES = [1_000, 10_000]
+ALPHABET = "abcdefghij"
+STRINGS = 200
+
+
+def random_rule(rng: random.Random) -> str:
+    """
+    A rule such as 'c.a.(b|d)*.e' made of a few random letters.
+    """
+    letters = [rng.choice(ALPHABET) for _ in range(rng.randint(3, 6))]
+    if rng.random() < 0.5:
+        letters[-2] = f"({letters[-2]}|{rng.choice(ALPHABET)})*"
+    return ".".join(letters)
+
+
+def main():
+    """
+    Print build and match times of both approaches for every pattern count.
+    """
+    rng = random.Random(0)
+    for size in SIZES:
+        rules = [random_rule(rng) for _ in range(size)]
+        # Half of the strings match some rule, the rest are random
+        strings = [rng.choice(rules).replace("(", "").replace(")", "").replace(".", "")[:6]]
+        strings += ["".join(rng.choice(ALPHABET) for _ in range(5)) for _ in range(STRINGS - 1)]
+
+        start = perf_counter()
+        compiled = [compile_pattern(rule, engine="pike_vm") for rule in rules]
+        separate_build = perf_counter() - start
+        start = perf_counter()
+        separate = [
+            {i for i, pattern in enumerate(compiled) if pattern.fullmatch(string)}
+            for string in strings
+        ]
+        separate_match = perf_counter() - start
+
+        start = perf_counter()
+        pattern_set = PatternSet(rules)
+        set_build = perf_counter() - start
+        start = perf_counter()
+        together = [pattern_set.matches(string) for string in strings]
+        set_match = perf_counter() - start
+        assert together == separate
+
+        start = perf_counter()
+        for string in strings:
+            pattern_set.search_matches(string)
+        set_search = perf_counter() - start
+
+        print(f"\n{size} patterns, {pattern_set.state_count} NFA states, {STRINGS} strings")
+        print(
+            f"  one pattern at a time  build {separate_build:>7.2f} s  match {separate_match:>7.3f} s"
+        )
+        print(f"  PatternSet             build {set_build:>7.2f} s  match {set_match:>7.3f} s")
+        print(f"  PatternSet search                        {set_search:>7.3f} s")
+        print(f"  match speedup          {separate_match / set_match:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
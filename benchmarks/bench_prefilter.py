@@ -0,0 +1,44 @@
+"""
+Benchmark comparing search with and without the literal prefilters on text
+where matches are rare.
+
+Run from the project root with:
+    python -m benchmarks.bench_prefilter
+"""
+
+import random
+from timeit import timeit
+from src.services.non_finite_automaton import compile_pattern
+
+TEXT_LENGTH = 200_000
+PATTERNS = [
+    "e.r.r.o.r.(a|b)*",
+    "(a|b)*.f.a.i.l.e.d",
+    "t.i.m.e.o.u.t|r.e.f.u.s.e.d",
+    "(f.a.t.a.l|p.a.n.i.c|a.b.o.r.t).x*",
+]
+
+
+def main():
+    """
+    Print the time to find all matches with and without the prefilter.
+    """
+    rng = random.Random(0)
+    text = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz ") for _ in range(TEXT_LENGTH))
+    text = text[:1000] + " error failed timeout " + text[1000:]
+
+    for infix in PATTERNS:
+        filtered = compile_pattern(infix)
+        plain = compile_pattern(infix, prefilter=False)
+        assert list(filtered.finditer(text)) == list(plain.finditer(text))
+
+        with_filter = timeit(lambda: list(filtered.finditer(text)), number=3) / 3
+        without = timeit(lambda: list(plain.finditer(text)), number=3) / 3
+        print(f"\n{infix}  prefilter {filtered.prefilter}")
+        print(f"  without prefilter {without * 1000:>9.1f} ms")
+        print(f"  with prefilter    {with_filter * 1000:>9.1f} ms")
+        print(f"  speedup           {without / with_filter:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
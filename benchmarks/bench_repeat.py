@@ -0,0 +1,60 @@
+"""
+Benchmark of counted repetition, reporting the NFA size, compile time and
+memory of patterns with large counts, and the search time of a bounded repeat.
+
+Run from the project root with:
+    python -m benchmarks.bench_repeat
+"""
+
+import random
+import tracemalloc
+from time import perf_counter
+from src.services.non_finite_automaton import compile_pattern
+
+PATTERNS = [
+    "[0-9]{1,64}",
+    "a{1000}",
+    "[0-9]{1,1000}",
+    "(a.b|c){100,200}",
+    "\\w{1,5000}",
+    "[0-9]{1,30000}",
+]
+
+TEXT_LENGTH = 200_000
+
+
+def measure(infix):
+    """
+    Return the state count, compile time and peak compile memory of a pattern.
+    Memory is traced in a second compile, since tracing slows the compile down.
+    """
+    start = perf_counter()
+    pattern = compile_pattern(infix)
+    compile_time = perf_counter() - start
+    tracemalloc.start()
+    compile_pattern(infix)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pattern.automaton.state_count, compile_time, peak
+
+
+def main():
+    """
+    Print the size and compile cost of every pattern, and the search time of a bounded repeat.
+    """
+    print(f"{'pattern':<20}{'states':>8}{'compile':>12}{'peak memory':>14}")
+    for infix in PATTERNS:
+        states, compile_time, peak = measure(infix)
+        print(f"{infix:<20}{states:>8}{compile_time * 1000:>10.1f}ms{peak / 1e6:>12.2f}MB")
+
+    rng = random.Random(0)
+    text = "".join(rng.choice("abc x") for _ in range(TEXT_LENGTH)) + "id=" + "7" * 40
+    pattern = compile_pattern("i.d.\\=.[0-9]{1,64}", prefilter=False)
+    start = perf_counter()
+    span = pattern.search(text)
+    elapsed = perf_counter() - start
+    print(f"bounded repeat search over {TEXT_LENGTH} characters found {span} in {elapsed:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
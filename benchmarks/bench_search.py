@@ -0,0 +1,57 @@
+"""
+Benchmark comparing the single pass search with restarting a match at every offset.
+
+Run from the project root with:
+    python -m benchmarks.bench_search
+"""
+
+import random
+from timeit import timeit
+from src.services.non_finite_automaton import compile_pattern
+
+# (pattern, alphabet, text length)
+CASES = [
+    ("a.b.c.d", "abcd", 20_000),
+    ("(a|b)*.c.d", "abcd", 20_000),
+    ("e.r.r.o.r", "abcdefghijklmnopqrstuvwxyz", 20_000),
+    ("(a|b)*.c", "ab", 5_000),
+]
+
+
+def restart_search(pattern, string):
+    """
+    Find every match by restarting the anchored matcher at each offset.
+    """
+    spans = []
+    pos = 0
+    while pos <= len(string):
+        for start in range(pos, len(string) + 1):
+            end = pattern.matcher.longest_match(string, start)
+            if end is not None:
+                spans.append((start, end))
+                pos = end if end > start else end + 1
+                break
+        else:
+            break
+    return spans
+
+
+def main():
+    """
+    Time both ways of finding all matches in a random text.
+    """
+    for infix, alphabet, length in CASES:
+        rng = random.Random(length)
+        text = "".join(rng.choice(alphabet) for _ in range(length))
+        pattern = compile_pattern(infix, engine="pike_vm")
+        assert list(pattern.finditer(text)) == restart_search(pattern, text)
+
+        restart = timeit(lambda: restart_search(pattern, text), number=1)
+        single = timeit(lambda: list(pattern.finditer(text)), number=1)
+        print(f"\n{infix}  (text length {length})")
+        print(f"  restart at every offset {restart * 1000:>10.1f} ms")
+        print(f"  single pass finditer    {single * 1000:>10.1f} ms  {restart / single:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark comparing a sharded parallel scan of one file with different numbers
+of worker processes against scanning the file sequentially.
+
+Run from the project root with:
+    python -m benchmarks.bench_sharded
+"""
+
+import os
+import random
+import tempfile
+from time import perf_counter
+from src.services.file_search import grep_file
+from src.services.non_finite_automaton import compile_pattern
+from src.services.parallel import finditer_file_parallel, grep_file_parallel
+
+LINES = 200_000
+INFIX = "e.r.r.o.r.(1|2|3)"
+
+
+def write_file(path):
+    """
+    Write a log-like file in which one line in a hundred matches.
+    """
+    rng = random.Random(0)
+    with open(path, "w", encoding="ascii") as file:
+        for number in range(LINES):
+            words = ["".join(rng.choice("abcdefgh") for _ in range(6)) for _ in range(8)]
+            if number % 100 == 0:
+                words.append("error" + rng.choice("123"))
+            file.write(" ".join(words) + "\n")
+
+
+def main():
+    """
+    Print the time of sequential and sharded grep and finditer with 1, 2, 4, ... workers.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "input.log")
+        write_file(path)
+        pattern = compile_pattern(INFIX)
+        print(f"{os.path.getsize(path) >> 20} MiB, {os.cpu_count()} CPUs")
+
+        start = perf_counter()
+        expected_lines = list(grep_file(pattern, path))
+        grep_serial = perf_counter() - start
+        with open(path, encoding="latin-1") as file:
+            start = perf_counter()
+            expected_spans = list(pattern.finditer(file.read()))
+            finditer_serial = perf_counter() - start
+        print(f"  sequential  grep {grep_serial:>6.2f} s  finditer {finditer_serial:>6.2f} s")
+
+        workers = 1
+        while workers <= (os.cpu_count() or 1):
+            start = perf_counter()
+            assert list(grep_file_parallel(pattern, path, workers=workers)) == expected_lines
+            grep_elapsed = perf_counter() - start
+            start = perf_counter()
+            assert list(finditer_file_parallel(pattern, path, workers=workers)) == expected_spans
+            finditer_elapsed = perf_counter() - start
+            print(
+                f"  {workers:>3} workers grep {grep_elapsed:>6.2f} s "
+                f"{grep_serial / grep_elapsed:>4.1f}x  finditer {finditer_elapsed:>6.2f} s "
+                f"{finditer_serial / finditer_elapsed:>4.1f}x"
+            )
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark comparing the NumPy batch DFA against calling the table DFA once per
+string, on fixed-width codes. Needs NumPy.
+
+Run from the project root with:
+    python -m benchmarks.bench_vectorized
+"""
+
+import random
+from time import perf_counter
+from src.services.deterministic_finite_automaton import DFA, VectorizedDFA
+from src.services.non_finite_automaton import compile_pattern
+
+STRINGS = 200_000
+WIDTH = 40
+# A hex digest that ends in a digit
+INFIX = "(0|1|2|3|4|5|6|7|8|9|a|b|c|d|e|f)*.(0|1|2|3|4|5|6|7|8|9)"
+
+
+def main():
+    """
+    Print the time to check every string one by one and as a batch.
+    """
+    rng = random.Random(0)
+    alphabet = "0123456789abcdef"
+    strings = ["".join(rng.choice(alphabet) for _ in range(WIDTH)) for _ in range(STRINGS)]
+    pattern = compile_pattern(INFIX)
+    dfa = DFA.from_nfa(pattern.automaton)
+    matcher = VectorizedDFA(dfa)
+
+    start = perf_counter()
+    expected = [dfa.fullmatch(string) for string in strings]
+    serial = perf_counter() - start
+
+    start = perf_counter()
+    result = matcher.fullmatch_many(strings)
+    batch = perf_counter() - start
+    assert result.tolist() == expected
+
+    ragged = [string[: rng.randint(WIDTH - 8, WIDTH)] for string in strings]
+    start = perf_counter()
+    matcher.fullmatch_many(ragged)
+    bucketed = perf_counter() - start
+
+    print(f"{STRINGS} strings of {WIDTH} characters, {dfa.state_count} DFA states")
+    print(f"  one by one   {serial:>6.3f} s")
+    print(f"  batch        {batch:>6.3f} s  {serial / batch:>5.1f}x")
+    print(f"  ragged batch {bucketed:>6.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,24 @@
 This is the main program with two regex modes:
 1. Simple Regex Search (Primary mode using NFA implementation)
 2. Perfect Regex Syntax Checker (Secondary mode)
+
+Files can also be searched from the command line with the grep subcommand:
+    python regex_program.py grep PATTERN FILE [FILE ...]
+
+and served to other processes over a socket with the serve subcommand:
+    python regex_program.py serve --socket PATH
 """
 
+import argparse
+import asyncio
 import os
 import sys
 from sys import stdout
 from time import sleep
 from src.services import match_regex, EmptyRegexError, InvalidRegexError, RegexTokenizer
+from src.services.file_search import grep_file
+from src.services.postfix.exceptions import PostfixError
+from src.services.server import MatchServer, serve
 
 # Dynamically add the project root directory to sys.path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -30,6 +41,18 @@ SIMPLE_GUIDE = (
     + "{:<{spacing}}mikä tahansa merkki (esim. 'a', '1', '@')\n".format(
         "a,b,c...", spacing=GUIDE_SPACING
     )
+    + "\n=== MERKKILUOKAT ===\n"
+    + "{:<{spacing}}mikä tahansa merkki väliltä a-z tai 0-9\n".format(
+        "[a-z0-9]", spacing=GUIDE_SPACING
+    )
+    + "{:<{spacing}}mikä tahansa merkki paitsi a-z\n".format("[^a-z]", spacing=GUIDE_SPACING)
+    + "{:<{spacing}}numero, sanamerkki tai välilyönti (ASCII)\n".format(
+        "\\d \\w \\s", spacing=GUIDE_SPACING
+    )
+    + "{:<{spacing}}mikä tahansa merkki paitsi rivinvaihto\n".format("\\N", spacing=GUIDE_SPACING)
+    + "{:<{spacing}}operaattorimerkki sellaisenaan (esim. '\\.' vastaa '.')\n".format(
+        "\\. \\* \\|", spacing=GUIDE_SPACING
+    )
     + "\n=== OPERAATTORIT ===\n"
     + "{:<{spacing}}yhdistää kaksi lauseketta (esim. 'a.b' vastaa 'a' ja sitten 'b')\n".format(
         ".", spacing=GUIDE_SPACING
@@ -46,6 +69,9 @@ SIMPLE_GUIDE = (
     + "{:<{spacing}}0 tai 1 toistoa (esim. 'a?' vastaa '', 'a')\n".format(
         "?", spacing=GUIDE_SPACING
     )
+    + "{:<{spacing}}m-n toistoa, {{m}} tasan m ja {{m,}} vähintään m (esim. 'a{{2,3}}' vastaa 'aa', 'aaa')\n".format(
+        "{m,n}", spacing=GUIDE_SPACING
+    )
     + "{:<{spacing}}ryhmittelyä varten (esim. '(a|b)c' vastaa 'ac' tai 'bc')\n".format(
         "()", spacing=GUIDE_SPACING
     )
@@ -437,5 +463,85 @@ def main():
         print(f"\n{color}Ohjelman suoritus keskeytetty käyttäjän toimesta... Moikka!{Colors.ENDC}")
 
 
+def grep_command(arguments):
+    """
+    Searches the given files line by line and prints the matching lines.
+
+    Returns:
+        int: Exit status, 0 if some line matched, 1 if none did and 2 on errors.
+    """
+    parser = argparse.ArgumentParser(
+        prog="regex_program.py grep", description="Tulostaa tiedostojen vastaavat rivit."
+    )
+    parser.add_argument("pattern", help="yksinkertainen säännöllinen lauseke")
+    parser.add_argument("files", nargs="+", help="haettavat tiedostot")
+    parser.add_argument("-c", "--count", action="store_true", help="tulosta vain rivien määrä")
+    args = parser.parse_args(arguments)
+
+    status = 1
+    for path in args.files:
+        prefix = f"{path}:" if len(args.files) > 1 else ""
+        count = 0
+        try:
+            with open(path, "rb") as file:
+                for line in grep_file(args.pattern, path):
+                    count += 1
+                    if not args.count:
+                        file.seek(line.start)
+                        text = file.read(line.end - line.start).decode("utf-8", "replace")
+                        print(f"{prefix}{line.line_number}:{text}")
+        except (EmptyRegexError, InvalidRegexError, PostfixError) as e:
+            print(f"Virheellinen regex: {e}", file=sys.stderr)
+            return 2
+        except OSError as e:
+            print(f"Virhe: {e}", file=sys.stderr)
+            status = 2
+            continue
+        if args.count:
+            print(f"{prefix}{count}")
+        if count and status == 1:
+            status = 0
+    return status
+
+
+def serve_command(arguments):
+    """
+    Serves match requests over a Unix or TCP socket until interrupted.
+
+    Returns:
+        int: Exit status, 0 when stopped with Ctrl+C.
+    """
+    parser = argparse.ArgumentParser(
+        prog="regex_program.py serve",
+        description="Vastaa JSON-rivipyyntöihin, esim. "
+        '{"id": 1, "op": "search", "pattern": "a.b", "string": "xab"}.',
+    )
+    parser.add_argument("--socket", help="Unix-soketin polku, muuten kuunnellaan TCP:tä")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP-osoite")
+    parser.add_argument("--port", type=int, default=8765, help="TCP-portti")
+    parser.add_argument("--workers", type=int, help="työprosessien määrä")
+    parser.add_argument("--timeout", type=float, default=5.0, help="pyynnön aikaraja sekunteina")
+    args = parser.parse_args(arguments)
+
+    server = MatchServer(workers=args.workers, timeout=args.timeout)
+
+    def ready(listener):
+        """
+        Print where the server listens.
+        """
+        for sock in listener.sockets:
+            print(f"Kuunnellaan: {sock.getsockname()}", flush=True)
+
+    try:
+        asyncio.run(serve(server, args.socket, args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "grep":
+        sys.exit(grep_command(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        sys.exit(serve_command(sys.argv[2:]))
     main()
@@ -12,4 +12,19 @@ from .regex_syntax_checker import (
     UnclosedGroupError,
 )
 from .postfix import shunting_yard
-from .non_finite_automaton import InvalidRegexError, EmptyRegexError, compile_regex, match_regex
+from .non_finite_automaton import (
+    InvalidRegexError,
+    EmptyRegexError,
+    Pattern,
+    compile_regex,
+    compile_pattern,
+    cached_pattern,
+    cache_info,
+    configure_cache,
+    clear_cache,
+    match_regex,
+    StreamMatcher,
+    PatternSet,
+)
+from .regex_parser import parse_regex, compile_ast
+from .deterministic_finite_automaton import LazyDFA, DFA, DFAError, DFAStateLimitError
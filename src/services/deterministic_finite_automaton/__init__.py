@@ -0,0 +1,12 @@
+"""creating an import tree."""
+
+from .exceptions import DFAError, DFAStateLimitError
+from .lazy_dfa import LazyDFA, DFAState
+from .dfa import (
+    DFA,
+    DEFAULT_MAX_STATES,
+    subset_construction,
+    hopcroft_minimize,
+    merge_equivalent_classes,
+)
+from .vectorized import VectorizedDFA, encode
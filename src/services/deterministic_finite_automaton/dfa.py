@@ -0,0 +1,422 @@
+"""
+This file builds a complete DFA ahead of time from an NFA with the subset
+construction, minimizes it with Hopcroft's algorithm and stores it as a dense
+transition table indexed by state and alphabet class. Characters that no state
+tells apart share one class, so the table has a column per class rather than
+per character.
+"""
+
+from bisect import bisect_right
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+from src.services.non_finite_automaton.char_class import alphabet_partition
+from src.services.non_finite_automaton.indexed_nfa import as_indexed
+from .exceptions import DFAStateLimitError
+
+# Default maximum number of DFA states the subset construction may build
+DEFAULT_MAX_STATES = 10_000
+
+# The dead state is always state 0 of a built DFA
+DEAD = 0
+
+# Code points below this are always keyed one by one in class_of, so they never need a range lookup
+EXPLICIT_CODES = 256
+
+
+class DFA:
+    """
+    A table-driven deterministic finite automaton.
+
+    Every character of the alphabet is mapped to a class index, and the table has
+    one row per state and one column per class. Characters outside the alphabet
+    always lead to the dead state.
+
+    A DFA built from a byte-level NFA, whose labels are ints, also gets a
+    translation table for bytes.translate. Bytes and bytearray input is then
+    mapped to class indexes in one call and the match loop only indexes lists.
+
+    Character classes may cover far more characters than can be listed, so a
+    range of code points at or above EXPLICIT_CODES that only classes match is
+    keyed in class_of by its (first, last) tuple instead. A character missing
+    from class_of is then looked up among those ranges with bisect.
+
+    Attributes:
+        class_of: Maps each character of the alphabet, or (first, last) code
+            point range, to its class index.
+        table: One tuple per state, holding the next state for every class.
+        accepting: accepting[state] is True if the state is an accept state.
+        start: The start state.
+        translation: Maps every byte to its class index, bytes outside the
+            alphabet to an extra class that leads to the dead state. None if
+            the labels are not bytes.
+        ranges: The sorted (first, last, class index) triples of the range keys.
+    """
+
+    def __init__(
+        self,
+        class_of: Dict[str, int],
+        table: Sequence[Tuple[int, ...]],
+        accepting: Sequence[bool],
+        start: int,
+    ):
+        self.class_of = class_of
+        self.table = table
+        self.accepting = accepting
+        self.start = start
+        self.translation: Optional[bytes] = None
+        self.__byte_table: Sequence[Tuple[int, ...]] = ()
+        self.ranges = sorted(
+            (key[0], key[1], column) for key, column in class_of.items() if isinstance(key, tuple)
+        )
+        self.__range_starts = [first for first, _, _ in self.ranges]
+        other = self.class_count
+        if class_of and other < 256 and all(isinstance(byte, int) for byte in class_of):
+            translation = bytearray([other]) * 256
+            for byte, column in class_of.items():
+                translation[byte] = column
+            self.translation = bytes(translation)
+            self.__byte_table = [row + (DEAD,) for row in table]
+
+    def __repr__(self):
+        return (
+            f"DFA(states={self.state_count}, classes={self.class_count}, "
+            f"table_size={self.table_size})"
+        )
+
+    @classmethod
+    def from_nfa(
+        cls,
+        nfa,
+        max_states: int = DEFAULT_MAX_STATES,
+        minimize: bool = True,
+        merge_classes: bool = True,
+    ):
+        """
+        Determinise an NFA and optionally minimize the result.
+
+        Args:
+            nfa (NFA | IndexedNFA): The NFA to determinise.
+            max_states (int): Maximum number of DFA states the construction may build.
+            minimize (bool): Whether to run Hopcroft minimization on the result.
+            merge_classes (bool): Whether to merge characters that no state tells apart.
+
+        Raises:
+            DFAStateLimitError: If the DFA would have more than max_states states.
+        """
+        class_of, table, accepting, start = subset_construction(nfa, max_states)
+        if minimize:
+            table, accepting, start = hopcroft_minimize(table, accepting, start)
+        if merge_classes:
+            class_of, table = merge_equivalent_classes(class_of, table)
+        return cls(class_of, table, accepting, start)
+
+    @property
+    def state_count(self) -> int:
+        """
+        Number of DFA states, the dead state included.
+        """
+        return len(self.table)
+
+    @property
+    def class_count(self) -> int:
+        """
+        Number of alphabet classes, i.e. columns of the table.
+        """
+        return max(self.class_of.values(), default=-1) + 1
+
+    @property
+    def table_size(self) -> int:
+        """
+        Number of entries in the transition table.
+        """
+        return self.state_count * self.class_count
+
+    def __range_column(self, character: str) -> Optional[int]:
+        """
+        Return the class index of a character that is not in class_of, or None
+        if no range holds it either.
+        """
+        if not self.ranges:
+            return None
+        index = bisect_right(self.__range_starts, ord(character)) - 1
+        if index < 0 or ord(character) > self.ranges[index][1]:
+            return None
+        return self.ranges[index][2]
+
+    def fullmatch(self, string: str) -> bool:
+        """
+        Check whether the whole string is accepted by the DFA.
+        """
+        if self.translation is not None and isinstance(string, (bytes, bytearray)):
+            table = self.__byte_table
+            state = self.start
+            for column in string.translate(self.translation):
+                state = table[state][column]
+                if state == DEAD:
+                    return False
+            return self.accepting[state]
+
+        class_of = self.class_of
+        table = self.table
+        state = self.start
+
+        for character in string:
+            column = class_of.get(character)
+            if column is None:
+                column = self.__range_column(character)
+                if column is None:
+                    return False
+            state = table[state][column]
+            if state == DEAD:
+                return False
+
+        return self.accepting[state]
+
+    def longest_match(self, string: str, start: int) -> Optional[int]:
+        """
+        Find the end of the longest match starting at the given index.
+
+        Returns:
+            int: The end index of the longest match, or None if nothing matches.
+        """
+        class_of = self.class_of
+        table = self.table
+        accepting = self.accepting
+        state = self.start
+        end = start if accepting[state] else None
+
+        for i in range(start, len(string)):
+            column = class_of.get(string[i])
+            if column is None:
+                column = self.__range_column(string[i])
+                if column is None:
+                    break
+            state = table[state][column]
+            if state == DEAD:
+                break
+            if accepting[state]:
+                end = i + 1
+
+        return end
+
+
+def alphabet_columns(automaton) -> Tuple[List, Dict]:
+    """
+    Split the alphabet of an indexed NFA into the columns of a DFA table.
+
+    Returns:
+        tuple: (alphabet, class_of), a character to step each column with and
+            the map from every character, or range key, to its column.
+    """
+    # The alphabet is every label that appears in the NFA
+    alphabet = automaton.alphabet
+    class_of = {character: column for column, character in enumerate(alphabet)}
+    if automaton.classes:
+        # Classes overlap characters and each other, so the code points are split
+        # into blocks no label tells apart and each block is stepped with its first member
+        blocks = alphabet_partition(alphabet + automaton.classes)
+        to_key = int if automaton.byte_level else chr
+        alphabet = [to_key(block[0][0]) for block in blocks]
+        class_of = {}
+        for column, block in enumerate(blocks):
+            for first, last in block:
+                for code in range(first, min(last + 1, EXPLICIT_CODES)):
+                    class_of[to_key(code)] = column
+                first = max(first, EXPLICIT_CODES)
+                if first == last:
+                    class_of[chr(first)] = column
+                elif first < last:
+                    class_of[(first, last)] = column
+    return alphabet, class_of
+
+
+def subset_construction(nfa, max_states: int = DEFAULT_MAX_STATES):
+    """
+    Build a complete DFA from an NFA with the subset construction.
+
+    Returns:
+        tuple: (class_of, table, accepting, start) where state 0 is the dead state.
+
+    Raises:
+        DFAStateLimitError: If the DFA would have more than max_states states.
+    """
+    automaton = as_indexed(nfa)
+    alphabet, class_of = alphabet_columns(automaton)
+
+    # The dead state is the empty set and the start state comes right after it
+    sets = [frozenset(), frozenset(automaton.initial)]
+    ids = {state_set: state_id for state_id, state_set in enumerate(sets)}
+    table: List[Tuple[int, ...]] = [(DEAD,) * len(alphabet)]
+    queue = deque(sets[1:])
+
+    while queue:
+        current = queue.popleft()
+        row = [DEAD] * len(alphabet)
+
+        for column, character in enumerate(alphabet):
+            target = frozenset(automaton.step(current, character))
+
+            state_id = ids.get(target)
+            if state_id is None:
+                if len(sets) >= max_states:
+                    raise DFAStateLimitError(
+                        f"DFA construction exceeded the limit of {max_states} states."
+                    )
+                state_id = len(sets)
+                ids[target] = state_id
+                sets.append(target)
+                queue.append(target)
+            row[column] = state_id
+
+        table.append(tuple(row))
+
+    return class_of, table, [automaton.accept in state_set for state_set in sets], 1
+
+
+def merge_equivalent_classes(class_of: Dict, table: Sequence[Tuple[int, ...]]):
+    """
+    Merge alphabet classes whose columns are equal in every row of the table.
+    Characters in one merged class lead every state to the same state, so the
+    DFA can not tell them apart.
+
+    Returns:
+        tuple: (class_of, table) with one column per merged class, numbered in
+            order of first appearance.
+    """
+    class_count = len(table[0]) if table else 0
+    merged: Dict[Tuple[int, ...], int] = {}
+    remap = []
+    for column in range(class_count):
+        key = tuple(row[column] for row in table)
+        remap.append(merged.setdefault(key, len(merged)))
+
+    if len(merged) == class_count:
+        return class_of, table
+    representatives = [remap.index(new) for new in range(len(merged))]
+    new_table = [tuple(row[column] for column in representatives) for row in table]
+    return {character: remap[column] for character, column in class_of.items()}, new_table
+
+
+def _inverse_transitions(table: Sequence[Tuple[int, ...]]) -> List[List[List[int]]]:
+    """
+    Return the transitions of a DFA table backwards: inverse[column][state]
+    lists the states that move to state on column.
+    """
+    inverse: List[List[List[int]]] = [[[] for _ in table] for _ in (table[0] if table else ())]
+    for state, row in enumerate(table):
+        for column, target in enumerate(row):
+            inverse[column][target].append(state)
+    return inverse
+
+
+def _initial_partition(accepting: Sequence[bool]) -> Tuple[List[set], List[int]]:
+    """
+    Split the states into the accept states and the rest.
+
+    Returns:
+        tuple: (blocks, block_of), the non-empty blocks and the block index of every state.
+    """
+    accept_block = {state for state, accepts in enumerate(accepting) if accepts}
+    reject_block = set(range(len(accepting))) - accept_block
+    blocks = [block for block in (accept_block, reject_block) if block]
+    block_of = [0] * len(accepting)
+    for index, block in enumerate(blocks):
+        for state in block:
+            block_of[state] = index
+    return blocks, block_of
+
+
+def _split_blocks(
+    touched: Dict[int, set],
+    blocks: List[set],
+    block_of: List[int],
+    worklist: List[int],
+    waiting: set,
+) -> None:
+    """
+    Split every block by the states of it that lead into the splitter, and
+    queue the smaller half as a splitter unless the block is waiting already.
+    """
+    for index, inside in touched.items():
+        block = blocks[index]
+        if len(inside) == len(block):
+            continue
+
+        # Split the block into the states that lead into the splitter and the rest
+        block -= inside
+        new_index = len(blocks)
+        blocks.append(inside)
+        for state in inside:
+            block_of[state] = new_index
+
+        if index in waiting:
+            worklist.append(new_index)
+        else:
+            worklist.append(index if len(block) <= len(inside) else new_index)
+        waiting.add(worklist[-1])
+
+
+def refine_partition(
+    table: Sequence[Tuple[int, ...]], accepting: Sequence[bool]
+) -> Tuple[List[set], List[int]]:
+    """
+    Find the blocks of equivalent states of a complete DFA with Hopcroft's
+    partition refinement.
+
+    Returns:
+        tuple: (blocks, block_of), the blocks of states and the block index of every state.
+    """
+    inverse = _inverse_transitions(table)
+    blocks, block_of = _initial_partition(accepting)
+    worklist = list(range(len(blocks)))
+    waiting = set(worklist)
+
+    while worklist:
+        splitter = worklist.pop()
+        waiting.discard(splitter)
+        splitter_states = tuple(blocks[splitter])
+
+        for predecessors in inverse:
+            touched: Dict[int, set] = {}
+            for state in splitter_states:
+                for predecessor in predecessors[state]:
+                    touched.setdefault(block_of[predecessor], set()).add(predecessor)
+            _split_blocks(touched, blocks, block_of, worklist, waiting)
+    return blocks, block_of
+
+
+def hopcroft_minimize(table: Sequence[Tuple[int, ...]], accepting: Sequence[bool], start: int):
+    """
+    Merge equivalent states of a complete DFA with Hopcroft's partition refinement.
+
+    The dead state stays state 0 and the remaining states are numbered
+    in breadth-first order from the start state.
+
+    Returns:
+        tuple: (table, accepting, start) of the minimized DFA.
+    """
+    blocks, block_of = refine_partition(table, accepting)
+
+    # Renumber blocks: the dead state first, then breadth-first from the start
+    numbering = {block_of[DEAD]: DEAD}
+    order = [block_of[DEAD]]
+    queue = deque([block_of[start]])
+    while queue:
+        index = queue.popleft()
+        if index in numbering:
+            continue
+        numbering[index] = len(order)
+        order.append(index)
+        representative = next(iter(blocks[index]))
+        for target in table[representative]:
+            if block_of[target] not in numbering:
+                queue.append(block_of[target])
+
+    new_table = []
+    new_accepting = []
+    for index in order:
+        representative = next(iter(blocks[index]))
+        new_table.append(tuple(numbering[block_of[target]] for target in table[representative]))
+        new_accepting.append(accepting[representative])
+
+    return new_table, new_accepting, numbering[block_of[start]]
@@ -0,0 +1,11 @@
+"""
+This module defines custom exceptions for the DFA functionality.
+"""
+
+
+class DFAError(Exception):
+    """Base class for all DFA-related errors."""
+
+
+class DFAStateLimitError(DFAError):
+    """Raised when the subset construction would build more DFA states than allowed."""
@@ -0,0 +1,181 @@
+"""
+This file defines a lazily built DFA. DFA states are sets of NFA states,
+and each transition is computed with the subset construction the first time
+it is used and then cached, so matching is one dict lookup per character.
+
+On patterns whose DFA is exponential in size, such as (a|b)*.a.(a|b){16}, a
+long string keeps building new states and the cache is flushed over and over.
+Each new state costs a step of the NFA plus the cache upkeep, so a match that
+fills the cache with few characters per state gives up on the DFA and is run
+by the Pike VM instead, as RE2 does.
+"""
+
+from typing import Dict, FrozenSet, Optional
+from src.services.non_finite_automaton.indexed_nfa import IndexedNFA, as_indexed
+from src.services.non_finite_automaton.pike_vm import PikeVM
+
+# Default number of DFA states kept before the transition cache is flushed
+DEFAULT_CACHE_STATES = 10_000
+
+# A match that builds a whole cache of states while scanning fewer than this
+# many characters per state is handed to the Pike VM
+MIN_CHARACTERS_PER_STATE = 10
+
+
+class DFAState:
+    """
+    A state of the lazy DFA.
+
+    Attributes:
+        nfa_states: The set of NFA state ids this DFA state stands for.
+        accepting: True if the set contains the NFA accept state.
+        transitions: Cached transitions, character -> DFAState.
+    """
+
+    __slots__ = ("nfa_states", "accepting", "transitions")
+
+    def __init__(self, nfa_states: FrozenSet[int], accepting: bool):
+        self.nfa_states = nfa_states
+        self.accepting = accepting
+        self.transitions: Dict[str, "DFAState"] = {}
+
+
+class LazyDFA:
+    """
+    Matches strings with a DFA that is determinised on demand from an NFA.
+
+    Attributes:
+        automaton: The indexed NFA the DFA is built from.
+        cache_states: Maximum number of DFA states kept. When the limit is reached
+            the cache is flushed, so memory stays bounded even on patterns whose
+            full DFA would be exponential in size.
+        start: The DFA start state.
+        dead: The DFA state for the empty NFA state set.
+        flushes: How many times the cache has been flushed.
+        fallbacks: How many matches were handed to the Pike VM because the cache thrashed.
+    """
+
+    def __init__(self, nfa, cache_states: int = DEFAULT_CACHE_STATES):
+        self.automaton: IndexedNFA = as_indexed(nfa)
+        self.cache_states = cache_states
+        self.flushes = 0
+        self.fallbacks = 0
+        self.__pike_vm: Optional[PikeVM] = None
+        self.__states: Dict[FrozenSet[int], DFAState] = {}
+        self.start = self.__intern(frozenset(self.automaton.initial))
+        self.dead = self.__intern(frozenset())
+
+    def __getstate__(self):
+        # Cached states link to each other in long chains, so they are rebuilt instead of pickled
+        return {"automaton": self.automaton, "cache_states": self.cache_states}
+
+    def __setstate__(self, state):
+        self.__init__(state["automaton"], state["cache_states"])
+
+    @property
+    def state_count(self) -> int:
+        """
+        Number of DFA states built so far.
+        """
+        return len(self.__states)
+
+    def __intern(self, nfa_states: FrozenSet[int]) -> DFAState:
+        """
+        Return the DFA state for a set of NFA states, creating it if needed.
+        """
+        state = self.__states.get(nfa_states)
+        if state is None:
+            state = DFAState(nfa_states, self.automaton.accept in nfa_states)
+            self.__states[nfa_states] = state
+        return state
+
+    def __flush(self) -> None:
+        """
+        Drop every cached DFA state except the start and dead states.
+        """
+        self.flushes += 1
+        self.__states.clear()
+        for state in (self.start, self.dead):
+            state.transitions.clear()
+            self.__states[state.nfa_states] = state
+
+    def __thrashing(self, built: int, scanned: int) -> bool:
+        """
+        Tell whether a match that built a number of states over a number of
+        characters should give up on the DFA, and count it if so.
+        """
+        if built < self.cache_states or built * MIN_CHARACTERS_PER_STATE <= scanned:
+            return False
+        self.fallbacks += 1
+        return True
+
+    @property
+    def pike_vm(self) -> PikeVM:
+        """
+        The Pike VM that runs the matches the DFA gives up on, built on first use.
+        """
+        if self.__pike_vm is None:
+            self.__pike_vm = PikeVM(self.automaton)
+        return self.__pike_vm
+
+    def next_state(self, state: DFAState, character: str) -> DFAState:
+        """
+        Compute and cache the transition of a DFA state on a character.
+        """
+        next_states = self.automaton.step(state.nfa_states, character)
+
+        if len(self.__states) >= self.cache_states:
+            self.__flush()
+
+        target = self.__intern(frozenset(next_states))
+        state.transitions[character] = target
+        return target
+
+    def fullmatch(self, string: str) -> bool:
+        """
+        Check whether the whole string is accepted by the DFA.
+        """
+        state = self.start
+        dead = self.dead
+        built = 0
+
+        for i, character in enumerate(string):
+            target = state.transitions.get(character)
+            if target is None:
+                target = self.next_state(state, character)
+                built += 1
+                if self.__thrashing(built, i + 1):
+                    return self.pike_vm.fullmatch(string)
+            if target is dead:
+                return False
+            state = target
+
+        return state.accepting
+
+    def longest_match(self, string: str, start: int) -> Optional[int]:
+        """
+        Find the end of the longest match starting at the given index.
+
+        Returns:
+            int: The end index of the longest match, or None if nothing matches.
+        """
+        state = self.start
+        dead = self.dead
+        end = start if state.accepting else None
+        built = 0
+
+        for i in range(start, len(string)):
+            character = string[i]
+            target = state.transitions.get(character)
+            if target is None:
+                target = self.next_state(state, character)
+                built += 1
+                if self.__thrashing(built, i + 1 - start):
+                    return self.pike_vm.longest_match(string, start)
+            if target is dead:
+                break
+            state = target
+            if state.accepting:
+                end = i + 1
+
+        return end
@@ -0,0 +1,140 @@
+"""
+This file defines an optional NumPy path for checking many strings at once.
+Strings of one length are stacked into a 2-D array of code points, and the
+whole batch moves through the DFA one column at a time, so each step is a
+single fancy-indexing gather instead of a Python loop over the strings.
+
+NumPy is imported lazily. Without it the rest of the package works as before
+and only building a VectorizedDFA raises ImportError.
+"""
+
+from typing import Sequence
+from .dfa import DEAD, DEFAULT_MAX_STATES, DFA
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is an optional dependency
+    np = None
+
+# Columns advanced between checks for a batch whose rows are all dead
+DEAD_CHECK_INTERVAL = 8
+
+
+def encode(strings: Sequence[str], length: int):
+    """
+    Encode strings that all have the given length as a 2-D array of code points.
+
+    Returns:
+        numpy.ndarray: A uint32 array of shape (len(strings), length).
+    """
+    array = np.array(strings, dtype=f"U{length}")
+    return array.view(np.uint32).reshape(len(strings), length)
+
+
+class VectorizedDFA:
+    """
+    Runs a table DFA over a batch of strings with NumPy.
+
+    Attributes:
+        dfa: The table DFA the arrays are built from.
+        table: Transition matrix of shape (states, classes + 1). The extra last
+            column is for characters outside the alphabet and leads to the dead state.
+        accepting: Boolean vector of the accept states.
+        lookup: Maps a code point to its column. Code points at or past the end
+            of the array are clipped to its last entry, the extra column.
+        start: The start state.
+
+    Code point ranges of character classes, which the DFA keys by range, are
+    not spread into the lookup array. Their columns are found with
+    searchsorted over the range starts instead.
+
+    A batch is run on the flattened table with every state stored as the offset
+    of its row, so a step is one add and one take: next = flat[state + column].
+    """
+
+    def __init__(self, dfa: DFA):
+        """
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        if np is None:
+            raise ImportError("VectorizedDFA needs NumPy, install it with 'pip install numpy'.")
+        self.dfa = dfa
+        other = dfa.class_count
+        self.table = np.full((dfa.state_count, other + 1), DEAD, dtype=np.int32)
+        self.table[:, :other] = np.array(dfa.table, dtype=np.int32).reshape(-1, other)
+        self.accepting = np.array(dfa.accepting, dtype=bool)
+        characters = {key: column for key, column in dfa.class_of.items() if isinstance(key, str)}
+        size = max(map(ord, characters), default=-1) + 1
+        self.lookup = np.full(size + 1, other, dtype=np.int32)
+        for character, column in characters.items():
+            self.lookup[ord(character)] = column
+        self.start = dfa.start
+        self.__range_starts = np.array([first for first, _, _ in dfa.ranges], dtype=np.int64)
+        self.__range_ends = np.array([last for _, last, _ in dfa.ranges], dtype=np.int64)
+        self.__range_columns = np.array([column for _, _, column in dfa.ranges], dtype=np.int32)
+
+        width = other + 1
+        self.__flat = (self.table * width).ravel()
+        self.__accepting_at = np.repeat(self.accepting, width)
+        self.__start_offset = self.start * width
+
+    @classmethod
+    def from_pattern(cls, pattern, max_states: int = DEFAULT_MAX_STATES) -> "VectorizedDFA":
+        """
+        Build the minimized DFA of a compiled pattern and its arrays.
+
+        Raises:
+            DFAStateLimitError: If the DFA would have more than max_states states.
+        """
+        return cls(DFA.from_nfa(pattern.automaton, max_states=max_states))
+
+    def run(self, codes):
+        """
+        Run a batch of equal-length rows of code points through the DFA.
+
+        Args:
+            codes: A 2-D integer array, one string per row, e.g. from encode.
+
+        Returns:
+            numpy.ndarray: Boolean vector telling which rows are accepted.
+        """
+        rows, length = codes.shape
+        # Transposed, so the classes of every column are one contiguous row
+        classes = self.lookup.take(codes.T, mode="clip")
+        if len(self.__range_starts):
+            index = np.searchsorted(self.__range_starts, codes.T, side="right") - 1
+            inside = (index >= 0) & (codes.T <= self.__range_ends.take(index, mode="clip"))
+            classes = np.where(inside, self.__range_columns.take(index, mode="clip"), classes)
+        flat = self.__flat
+        offsets = np.full(rows, self.__start_offset, dtype=np.int32)
+        for column in range(length):
+            offsets = flat.take(offsets + classes[column])
+            if column % DEAD_CHECK_INTERVAL == DEAD_CHECK_INTERVAL - 1 and not offsets.any():
+                break
+        return self.__accepting_at[offsets]
+
+    def fullmatch_many(self, strings: Sequence[str]):
+        """
+        Check which strings are accepted by the DFA.
+
+        Ragged batches are bucketed by length, so every bucket is one 2-D array
+        and no padding character can be mistaken for input.
+
+        Returns:
+            numpy.ndarray: Boolean vector with the result of every string in order.
+        """
+        strings = list(strings)
+        lengths = np.fromiter(map(len, strings), dtype=np.intp, count=len(strings))
+        if strings and lengths.min() == lengths.max() > 0:
+            return self.run(encode(strings, int(lengths[0])))
+
+        result = np.zeros(len(strings), dtype=bool)
+        objects = np.array(strings, dtype=object)
+        for length in np.unique(lengths).tolist():
+            indices = np.flatnonzero(lengths == length)
+            if length == 0:
+                result[indices] = self.accepting[self.start]
+                continue
+            result[indices] = self.run(encode(objects[indices], length))
+        return result
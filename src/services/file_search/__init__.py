@@ -0,0 +1,3 @@
+"""creating an import tree."""
+
+from .grep import LineMatch, LineScanner, ScanState, scan_lines, grep_file
@@ -0,0 +1,271 @@
+"""
+This file defines a grep style line search over files. Files are memory mapped
+and read through memoryview slices, so no part of the file is copied into
+Python strings, and lines are found in the same pass that runs the automaton.
+"""
+
+import mmap
+from typing import Generator, Iterator, List, NamedTuple, Optional, Union
+from src.services.non_finite_automaton import Pattern, cached_pattern
+from src.services.non_finite_automaton.byte_nfa import byte_automaton
+from src.services.non_finite_automaton.char_class import match_labels
+from src.services.deterministic_finite_automaton.lazy_dfa import DEFAULT_CACHE_STATES
+
+# Byte value of the line separator
+NEWLINE = 10
+
+# Number of bytes scanned per memoryview slice
+SLICE_SIZE = 1 << 20
+
+# Number of bytes of a file mapped at a time
+WINDOW_SIZE = 1 << 26
+
+
+class LineMatch(NamedTuple):
+    """
+    A line that contains a match.
+
+    Attributes:
+        line_number: 1-based number of the line.
+        start: Byte offset of the first byte of the line.
+        end: Byte offset of the line's newline, or of the end of the data.
+    """
+
+    line_number: int
+    start: int
+    end: int
+
+
+class ScanState:
+    """
+    A state of the line scanner's lazy DFA.
+
+    Attributes:
+        nfa_states: The set of NFA state ids this state stands for.
+        accepting: True if the set contains the NFA accept state.
+        transitions: transitions[byte] is the next state, or None if not built yet.
+    """
+
+    __slots__ = ("nfa_states", "accepting", "transitions")
+
+    def __init__(self, nfa_states: frozenset, accepting: bool):
+        self.nfa_states = nfa_states
+        self.accepting = accepting
+        self.transitions: List[Optional["ScanState"]] = [None] * 256
+
+
+class LineScanner:
+    """
+    Finds the lines of byte data that contain a match of a pattern.
+
+    The scanner runs a lazily built DFA over bytes in which the initial NFA
+    closure is added after every byte, so each DFA state stands for all threads
+    started anywhere on the current line. A line matches as soon as a state
+    holds the accept state, and the rest of the line is then skipped with find.
+
+    The DFA runs on the byte-level form of the pattern's NFA, so a non-ASCII
+    label matches the UTF-8 encoding of its character.
+
+    Attributes:
+        pattern: The compiled pattern.
+        cache_states: Maximum number of DFA states kept before the cache is flushed.
+        flushes: How many times the cache has been flushed.
+    """
+
+    def __init__(self, pattern: Pattern, cache_states: int = DEFAULT_CACHE_STATES):
+        self.pattern = pattern
+        self.cache_states = cache_states
+        self.flushes = 0
+
+        automaton = byte_automaton(pattern.automaton)
+        self.__bytes = match_labels(automaton.labels)
+        self.__follow = [tuple(automaton.follow[state]) for state in range(automaton.state_count)]
+        self.__initial = frozenset(automaton.initial)
+        self.__accept = automaton.accept
+        self.__states = {}
+        self.start = self.__intern(self.__initial)
+
+    @property
+    def state_count(self) -> int:
+        """
+        Number of DFA states built so far.
+        """
+        return len(self.__states)
+
+    def __intern(self, nfa_states: frozenset) -> ScanState:
+        """
+        Return the DFA state for a set of NFA states, creating it if needed.
+        """
+        state = self.__states.get(nfa_states)
+        if state is None:
+            state = ScanState(nfa_states, self.__accept in nfa_states)
+            self.__states[nfa_states] = state
+        return state
+
+    def next_state(self, state: ScanState, byte: int) -> ScanState:
+        """
+        Compute and cache the transition of a DFA state on a byte.
+        """
+        labels = self.__bytes
+        follow = self.__follow
+        next_states = set(self.__initial)
+        for nfa_state in state.nfa_states:
+            if byte in labels[nfa_state]:
+                next_states.update(follow[nfa_state])
+
+        if len(self.__states) >= self.cache_states:
+            self.flushes += 1
+            self.__states.clear()
+            self.start.transitions = [None] * 256
+            self.__states[self.start.nfa_states] = self.start
+
+        target = self.__intern(frozenset(next_states))
+        state.transitions[byte] = target
+        return target
+
+    def scan(
+        self,
+        data: Union[bytes, mmap.mmap],
+        start: int = 0,
+        end: Optional[int] = None,
+        line_number: int = 1,
+    ) -> Generator[LineMatch, None, int]:
+        """
+        Yield every line of data[start:end] that contains a match.
+
+        Args:
+            data: A buffer with a find method, e.g. bytes or an mmap.
+            start: Offset of the first byte to scan, it must be the start of a line.
+            end: Offset after the last byte to scan, the end of the data by default.
+            line_number: Number of the line at start.
+
+        Yields:
+            LineMatch: The number and byte range of each matching line.
+
+        Returns:
+            int: The number of the line at end, so a scan can be continued.
+        """
+        end = len(data) if end is None else end
+        if self.start.accepting:
+            # The pattern matches the empty string, so every line matches
+            return (yield from self.__every_line(data, start, end, line_number))
+
+        view = memoryview(data)
+        try:
+            line_start = start
+            position = start
+            state = self.start
+            while position < end:
+                slice_end = min(position + SLICE_SIZE, end)
+                matched = -1
+                for i, byte in enumerate(view[position:slice_end], position):
+                    if byte == NEWLINE:
+                        line_number += 1
+                        line_start = i + 1
+                        state = self.start
+                        continue
+                    target = state.transitions[byte]
+                    if target is None:
+                        target = self.next_state(state, byte)
+                    state = target
+                    if state.accepting:
+                        matched = i
+                        break
+
+                if matched < 0:
+                    position = slice_end
+                    continue
+
+                line_end = data.find(b"\n", matched, end)
+                if line_end < 0:
+                    line_end = end
+                yield LineMatch(line_number, line_start, line_end)
+                # The newline itself is scanned next, which starts the following line
+                position = line_end
+                state = self.start
+            return line_number
+        finally:
+            view.release()
+
+    @staticmethod
+    def __every_line(data, start: int, end: int, line_number: int):
+        """
+        Yield every line of data[start:end] and return the number of the line at end.
+        """
+        line_start = start
+        while line_start < end:
+            line_end = data.find(b"\n", line_start, end)
+            if line_end < 0:
+                yield LineMatch(line_number, line_start, end)
+                break
+            yield LineMatch(line_number, line_start, line_end)
+            line_number += 1
+            line_start = line_end + 1
+        return line_number
+
+
+def scan_lines(pattern: Union[str, Pattern], data) -> Iterator[LineMatch]:
+    """
+    Yield the lines of byte data that contain a match of the pattern.
+
+    Args:
+        pattern: An infix regex or a compiled pattern.
+        data: A buffer with a find method, e.g. bytes or an mmap.
+    """
+    if isinstance(pattern, str):
+        pattern = cached_pattern(pattern)
+    return LineScanner(pattern).scan(data)
+
+
+def grep_file(pattern: Union[str, Pattern], path: str) -> Iterator[LineMatch]:
+    """
+    Yield the lines of a file that contain a match of the pattern.
+
+    The file is memory mapped one window at a time, and every window ends at a
+    line break, so at most one window of the file is resident and memory use
+    stays flat however large the file is. A window grows only for lines longer
+    than the window.
+
+    Args:
+        pattern: An infix regex or a compiled pattern.
+        path: Path of the file to search.
+
+    Yields:
+        LineMatch: The number and byte range of each matching line in the file.
+    """
+    if isinstance(pattern, str):
+        pattern = cached_pattern(pattern)
+    scanner = LineScanner(pattern)
+
+    with open(path, "rb") as file:
+        size = file.seek(0, 2)
+        offset = 0
+        line_number = 1
+        while offset < size:
+            # Windows must start at a multiple of the allocation granularity
+            base = offset - offset % mmap.ALLOCATIONGRANULARITY
+            length = min(WINDOW_SIZE, size - base)
+            while True:
+                with mmap.mmap(file.fileno(), length, offset=base, access=mmap.ACCESS_READ) as data:
+                    end = length
+                    if base + length < size:
+                        end = data.rfind(b"\n", offset - base) + 1
+                        if end == 0:
+                            length = min(2 * length, size - base)
+                            continue
+                    if hasattr(data, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                        data.madvise(mmap.MADV_SEQUENTIAL)
+                    matches = scanner.scan(data, offset - base, end, line_number)
+                    try:
+                        while True:
+                            try:
+                                match = next(matches)
+                            except StopIteration as stop:
+                                line_number = stop.value
+                                break
+                            yield LineMatch(match.line_number, match.start + base, match.end + base)
+                    finally:
+                        # Release the scanner's view before the window is unmapped
+                        matches.close()
+                offset = base + end
+                break
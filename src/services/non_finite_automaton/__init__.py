@@ -1,4 +1,28 @@
 """creating an import tree."""
 
 from .exceptions import InvalidRegexError, EmptyRegexError
-from .nfa import compile_regex, match_regex
+from .char_class import CharClass, ANY, parse_bracket, postfix_tokens
+from .nfa import compile_regex, StateBuilder
+from .cache import CacheInfo, PatternCache, DEFAULT_CACHE_SIZE
+from .indexed_nfa import IndexedNFA, NO_EDGE
+from .array_nfa import ArrayNFA, ArrayBuilder
+from .byte_nfa import BYTES_TYPES, byte_automaton, as_byte_view
+from .simulation import ThompsonSimulation
+from .pike_vm import PikeVM, SparseSet
+from .reduction import NFAReducer, NFASize, reduce_nfa, nfa_size, reduction_report
+from .glushkov import BitParallelGlushkov, glushkov_positions
+from .pattern import (
+    ENGINES,
+    DEFAULT_ENGINE,
+    SYNTAXES,
+    Pattern,
+    dfa_or_pike_vm,
+    compile_pattern,
+    cached_pattern,
+    cache_info,
+    configure_cache,
+    clear_cache,
+    match_regex,
+)
+from .stream import StreamMatcher
+from .pattern_set import PatternSet, FragmentBuilder, SetState
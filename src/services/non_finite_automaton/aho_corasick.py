@@ -0,0 +1,105 @@
+"""
+This file defines an Aho-Corasick automaton, which finds occurrences of any of
+a set of literals in a single pass over a string.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class AhoCorasick:
+    """
+    A keyword automaton over a set of literals.
+
+    The trie is turned into a DFA when it is built: every node gets a
+    transition for each character that leads somewhere other than the root, so
+    the scan is one dict lookup per character and never follows failure links.
+    The literals may also be bytes, the automaton then scans bytes-like input.
+
+    Attributes:
+        literals: The literals, a literal's id is its index.
+        transitions: transitions[node] maps a character to the next node,
+            characters that are missing lead back to the root node 0.
+        outputs: outputs[node] holds the ids of the literals that end at the node.
+    """
+
+    def __init__(self, literals: Iterable[str]):
+        self.literals: List[str] = list(literals)
+        if any(not literal for literal in self.literals):
+            raise ValueError("Aho-Corasick literals must not be empty.")
+
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.outputs: List[Tuple[int, ...]] = [()]
+        for literal_id, literal in enumerate(self.literals):
+            node = 0
+            for character in literal:
+                child = self.transitions[node].get(character)
+                if child is None:
+                    child = len(self.transitions)
+                    self.transitions[node][character] = child
+                    self.transitions.append({})
+                    self.outputs.append(())
+                node = child
+            self.outputs[node] += (literal_id,)
+
+        self.__add_failure_transitions()
+
+    def __add_failure_transitions(self) -> None:
+        """
+        Fill in the transitions given by the failure links, breadth first, so each
+        node can copy them from its failure node, which is always shallower.
+        """
+        transitions = self.transitions
+        outputs = self.outputs
+        failure = [0] * len(transitions)
+        trie = [dict(children) for children in transitions]
+        queue = deque(trie[0].values())
+
+        while queue:
+            node = queue.popleft()
+            fallback = failure[node]
+            outputs[node] += outputs[fallback]
+            for character, target in transitions[fallback].items():
+                transitions[node].setdefault(character, target)
+            for character, child in trie[node].items():
+                failure[child] = transitions[fallback].get(character, 0)
+                queue.append(child)
+
+    @property
+    def node_count(self) -> int:
+        """
+        Number of nodes in the trie.
+        """
+        return len(self.transitions)
+
+    def find(self, string: str, pos: int = 0) -> Optional[Tuple[int, int]]:
+        """
+        Find the literal occurrence that ends first at or after pos.
+
+        Returns:
+            tuple: The end index of the occurrence and the id of its literal, or None.
+        """
+        transitions = self.transitions
+        outputs = self.outputs
+        node = 0
+        for i in range(pos, len(string)):
+            node = transitions[node].get(string[i], 0)
+            if outputs[node]:
+                return i + 1, outputs[node][0]
+        return None
+
+    def finditer(self, string: str) -> Iterator[Tuple[int, int]]:
+        """
+        Yield every literal occurrence, overlapping ones included, in order of their end.
+
+        Yields:
+            tuple: The (start, end) span of the occurrence and the id of its literal.
+        """
+        transitions = self.transitions
+        outputs = self.outputs
+        literals = self.literals
+        node = 0
+        for i, character in enumerate(string):
+            node = transitions[node].get(character, 0)
+            for literal_id in outputs[node]:
+                yield (i + 1 - len(literals[literal_id]), i + 1), literal_id
@@ -0,0 +1,245 @@
+"""
+This file defines a compact, array-backed NFA. States are integer ids and their
+labels and transitions live in parallel array columns instead of linked State
+objects, so large automata take little memory and create no reference cycles
+for the garbage collector to track.
+"""
+
+from array import array
+from typing import Dict, List, Optional, Sequence
+from .char_class import CharClass
+from .indexed_nfa import NO_EDGE, EpsilonClosures, number_states
+from .nfa import NFA, compile_regex
+
+
+class ClosureTable:
+    """
+    Read-only view of closures stored back to back in one flat array.
+    closures[i] is states[offsets[i] : offsets[i + 1]].
+    """
+
+    __slots__ = ("offsets", "states")
+
+    def __init__(self, offsets: array, states: array):
+        self.offsets = offsets
+        self.states = states
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, state: int) -> array:
+        return self.states[self.offsets[state] : self.offsets[state + 1]]
+
+
+class ArrayBuilder:
+    """
+    Builds an NFA straight into array columns, for use with compile_regex.
+    States are handed out as integer ids.
+
+    A class label is stored once in classes, and a state labelled with
+    classes[k] holds ~k, a negative number no code point can take.
+    """
+
+    def __init__(self):
+        self.labels = array("i")
+        self.epsilon = array("b")
+        self.edge1 = array("i")
+        self.edge2 = array("i")
+        self.classes: List[CharClass] = []
+        self.__class_ids: Dict[CharClass, int] = {}
+
+    def new_state(self, label=None) -> int:
+        """
+        Append a state with an optional character or class label and return its id.
+        """
+        if label is None:
+            code = 0
+        elif isinstance(label, CharClass):
+            code = ~self.__class_ids.setdefault(label, len(self.__class_ids))
+            if ~code == len(self.classes):
+                self.classes.append(label)
+        else:
+            code = ord(label)
+        self.labels.append(code)
+        self.epsilon.append(label is None)
+        self.edge1.append(NO_EDGE)
+        self.edge2.append(NO_EDGE)
+        return len(self.labels) - 1
+
+    def label(self, state: int) -> Optional[str]:
+        """
+        Return the character or class label of a state, or None for an epsilon state.
+        """
+        if self.epsilon[state]:
+            return None
+        code = self.labels[state]
+        return chr(code) if code >= 0 else self.classes[~code]
+
+    def set_edge1(self, state: int, target: int) -> None:
+        """
+        Set the first transition of a state.
+        """
+        self.edge1[state] = target
+
+    def set_edge2(self, state: int, target: int) -> None:
+        """
+        Set the second transition of a state.
+        """
+        self.edge2[state] = target
+
+    def finish(self, nfa: NFA) -> "ArrayNFA":
+        """
+        Return the finished ArrayNFA.
+        """
+        return ArrayNFA(
+            self.labels,
+            self.epsilon,
+            self.edge1,
+            self.edge2,
+            nfa.initial_state,
+            nfa.accept_state,
+            self.classes,
+        )
+
+
+class ArrayNFA:
+    """
+    An NFA stored as parallel arrays, with precomputed epsilon closures.
+
+    It offers the same interface as IndexedNFA, so every engine can run on it.
+    Closures are kept in two flat arrays instead of one tuple per state.
+
+    Attributes:
+        labels: labels[i] is the code point of the label of state i, or ~k if
+            the label is classes[k].
+        epsilon: epsilon[i] is 1 if state i is an epsilon state, its label is then unused.
+        edge1: edge1[i] is the id of the first transition of state i, or NO_EDGE.
+        edge2: edge2[i] is the id of the second transition of state i, or NO_EDGE.
+        start: The id of the initial state.
+        accept: The id of the accept state.
+        initial: The epsilon closure of the initial state.
+        follow: follow[i] is the epsilon closure reached after state i consumes
+            its character, or an empty array for epsilon states.
+        classes: The character classes used as labels.
+    """
+
+    # Array labels are always code points of characters
+    byte_level = False
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        labels: array,
+        epsilon: array,
+        edge1: array,
+        edge2: array,
+        start: int,
+        accept: int,
+        classes: Sequence[CharClass] = (),
+    ):
+        self.labels = labels
+        self.classes = list(classes)
+        self.epsilon = epsilon
+        self.edge1 = edge1
+        self.edge2 = edge2
+        self.start = start
+        self.accept = accept
+
+        closure = EpsilonClosures(edge1, edge2, (accept,), epsilon.__getitem__).closure
+        self.initial = closure(start)
+        offsets = array("i", [0])
+        follow_states = array("i")
+        for state, is_epsilon in enumerate(epsilon):
+            if not is_epsilon:
+                follow_states.extend(closure(edge1[state]))
+            offsets.append(len(follow_states))
+        self.follow = ClosureTable(offsets, follow_states)
+
+    @classmethod
+    def from_postfix(cls, postfix: str) -> "ArrayNFA":
+        """
+        Compile a postfix regex straight into arrays, without creating State objects.
+        """
+        return compile_regex(postfix, ArrayBuilder())
+
+    @classmethod
+    def from_nfa(cls, nfa: NFA) -> "ArrayNFA":
+        """
+        Convert a linked NFA into its array form.
+        """
+        order, ids = number_states(nfa)
+        builder = ArrayBuilder()
+        for state in order:
+            builder.new_state(state.label)
+        for state in order:
+            if state.edge1 is not None:
+                builder.set_edge1(ids[state], ids[state.edge1])
+            if state.edge2 is not None:
+                builder.set_edge2(ids[state], ids[state.edge2])
+        return builder.finish(NFA(0, ids[nfa.accept_state]))
+
+    @property
+    def state_count(self) -> int:
+        """
+        Number of states in the NFA.
+        """
+        return len(self.labels)
+
+    @property
+    def alphabet(self) -> List[str]:
+        """
+        The sorted characters that appear as labels in the NFA, classes left out.
+        """
+        return sorted(
+            {
+                chr(label)
+                for label, is_epsilon in zip(self.labels, self.epsilon)
+                if not is_epsilon and label >= 0
+            }
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Number of bytes used by the array columns.
+        """
+        columns = (
+            self.labels,
+            self.epsilon,
+            self.edge1,
+            self.edge2,
+            self.follow.offsets,
+            self.follow.states,
+        )
+        return sum(column.itemsize * len(column) for column in columns)
+
+    def label(self, state: int) -> Optional[str]:
+        """
+        Return the character or class label of a state, or None for an epsilon state.
+        """
+        if self.epsilon[state]:
+            return None
+        code = self.labels[state]
+        return chr(code) if code >= 0 else self.classes[~code]
+
+    def step(self, current_states, character: str) -> set:
+        """
+        Consume one character from every current state by taking the union
+        of the precomputed closures of the states whose label matches.
+
+        Returns:
+            set: The important states reached after the character.
+        """
+        code = ord(character)
+        labels = self.labels
+        epsilon = self.epsilon
+        classes = self.classes
+        offsets = self.follow.offsets
+        follow_states = self.follow.states
+        next_states = set()
+        for state in current_states:
+            label = labels[state]
+            if epsilon[state]:
+                continue
+            if label == code or label < 0 and code in classes[~label]:
+                next_states.update(follow_states[offsets[state] : offsets[state + 1]])
+        return next_states
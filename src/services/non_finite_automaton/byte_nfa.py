@@ -0,0 +1,170 @@
+"""
+This file defines the byte-level form of a compiled NFA. Every label is
+replaced by the UTF-8 encoding of its character, one state per byte, and every
+class by the byte ranges of its encodings, so the engines can run on
+bytes-like input as it is. Iterating over bytes yields
+ints, and the ints are compared with the byte labels directly, without
+decoding the input or creating a str per character.
+"""
+
+from typing import List, Optional, Tuple, Union
+from .char_class import CharClass
+from .indexed_nfa import NO_EDGE, IndexedNFA
+
+# Input types matched as bytes
+BYTES_TYPES = (bytes, bytearray, memoryview)
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+# Last code point encoded with one, two and three UTF-8 bytes
+UTF8_LIMITS = (0x7F, 0x7FF, 0xFFFF)
+
+# Surrogate code points, which have no UTF-8 encoding
+SURROGATES = (0xD800, 0xDFFF)
+
+
+def utf8_sequences(first: int, last: int) -> List[List[Tuple[int, int]]]:
+    """
+    Split a range of code points into sequences of byte ranges, such that the
+    UTF-8 encodings of the range are exactly the byte strings with the n-th
+    byte in the n-th range of one of the sequences.
+
+    The range is cut where the encoding length changes and then where the
+    continuation bytes stop covering their whole range 0x80-0xBF, so each
+    piece encodes to every combination of its byte ranges.
+
+    Returns:
+        list: The sequences, each a list of inclusive (first, last) byte ranges.
+    """
+    sequences = []
+    stack = [(first, last)]
+    while stack:
+        first, last = stack.pop()
+        if first <= SURROGATES[1] and last >= SURROGATES[0]:
+            if first < SURROGATES[0]:
+                stack.append((first, SURROGATES[0] - 1))
+            if last > SURROGATES[1]:
+                stack.append((SURROGATES[1] + 1, last))
+            continue
+        for limit in UTF8_LIMITS:
+            if first <= limit < last:
+                stack.append((first, limit))
+                stack.append((limit + 1, last))
+                break
+        else:
+            for i in range(1, 4):
+                mask = (1 << (6 * i)) - 1
+                if first & ~mask == last & ~mask:
+                    continue
+                if first & mask:
+                    stack.append((first, first | mask))
+                    stack.append(((first | mask) + 1, last))
+                    break
+                if last & mask != mask:
+                    stack.append((first, (last & ~mask) - 1))
+                    stack.append((last & ~mask, last))
+                    break
+            else:
+                encoded = zip(chr(first).encode("utf-8"), chr(last).encode("utf-8"))
+                sequences.append(list(encoded))
+    return sequences
+
+
+def _byte_label(first: int, last: int):
+    """
+    Return the label of a byte range, a plain int for a single byte.
+    """
+    return first if first == last else CharClass([(first, last)])
+
+
+def _byte_sequences(label) -> List[list]:
+    """
+    Return the label sequences a character or class label is matched by in UTF-8.
+    One byte pieces of a class are joined into one byte class.
+    """
+    if label.__class__ is not CharClass:
+        return [list(label.encode("utf-8"))]
+    single = []
+    sequences = []
+    for first, last in label.ranges:
+        for sequence in utf8_sequences(first, last):
+            if len(sequence) == 1:
+                single.append(sequence[0])
+            else:
+                sequences.append([_byte_label(*byte_range) for byte_range in sequence])
+    if single or not sequences:
+        joined = CharClass(single)
+        if len(joined.ranges) == 1:
+            sequences.insert(0, [_byte_label(*joined.ranges[0])])
+        else:
+            sequences.insert(0, [joined])
+    return sequences
+
+
+def byte_automaton(automaton) -> IndexedNFA:
+    """
+    Build the byte-level form of an indexed or array NFA.
+
+    A state labelled with a character of n UTF-8 bytes keeps its id and gets
+    the first byte as its label, and n - 1 new states, chained with their first
+    transitions, consume the rest before moving on to the state's old target.
+    ASCII labels become their single byte, so the automaton keeps its shape.
+
+    A class label is compiled into one such chain per sequence of byte ranges
+    its UTF-8 encodings split into, each byte range labelled with a byte class.
+    With more than one chain the state becomes an epsilon state that branches
+    to every chain.
+
+    Returns:
+        IndexedNFA: An NFA whose labels are ints in range(256) and byte classes.
+    """
+    labels: List[Optional[int]] = []
+    edge1 = list(automaton.edge1)
+    edge2 = list(automaton.edge2)
+    for state in range(automaton.state_count):
+        labels.append(automaton.label(state))
+
+    def new_state(label, target: int, other: int = NO_EDGE) -> int:
+        """
+        Append a state with the given label and transitions and return its id.
+        """
+        labels.append(label)
+        edge1.append(target)
+        edge2.append(other)
+        return len(labels) - 1
+
+    for state in range(automaton.state_count):
+        label = labels[state]
+        if label is None:
+            continue
+        target = edge1[state]
+        sequences = _byte_sequences(label)
+        if len(sequences) == 1:
+            # The state itself consumes the first byte
+            first, *rest = sequences[0]
+            for byte_label in reversed(rest):
+                target = new_state(byte_label, target)
+            labels[state] = first
+            edge1[state] = target
+            continue
+
+        entry = NO_EDGE
+        for sequence in reversed(sequences):
+            head = target
+            for byte_label in reversed(sequence):
+                head = new_state(byte_label, head)
+            entry = head if entry == NO_EDGE else new_state(None, head, entry)
+        labels[state] = None
+        edge1[state] = entry
+
+    return IndexedNFA(labels, edge1, edge2, automaton.start, automaton.accept, byte_level=True)
+
+
+def as_byte_view(data: BytesLike) -> BytesLike:
+    """
+    Return bytes-like input in a form that iterates and indexes as single bytes.
+    A memoryview of another format or shape is cast to a flat view of unsigned bytes.
+    """
+    if isinstance(data, memoryview) and (data.format != "B" or data.ndim != 1):
+        return data.cast("B")
+    return data
@@ -0,0 +1,139 @@
+"""
+This file defines a size-bounded LRU cache for compiled regex patterns.
+"""
+
+from collections import OrderedDict, namedtuple
+from threading import Lock
+from src.services.postfix.postfix import shunting_yard as shunt
+
+DEFAULT_CACHE_SIZE = 128
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"])
+
+
+class PatternCache:
+    """
+    A least recently used cache of compiled patterns.
+
+    Entries are keyed by the postfix form of the regex, so equivalent spellings
+    such as "(a.b)" and "a.b" share one compiled pattern.
+
+    Attributes:
+        factory: Callable that compiles an infix regex, called on a cache miss.
+        maxsize: Maximum number of compiled patterns kept. Zero disables caching.
+        hits: Number of lookups answered from the cache.
+        misses: Number of lookups that had to compile the pattern.
+        evictions: Number of patterns dropped to stay within maxsize.
+    """
+
+    def __init__(self, factory, maxsize: int = DEFAULT_CACHE_SIZE):
+        """
+        Initialize an empty cache.
+
+        Args:
+            factory (callable): Compiles an infix regex into a pattern.
+            maxsize (int): Maximum number of compiled patterns kept.
+
+        Raises:
+            ValueError: If maxsize is negative.
+        """
+        if maxsize < 0:
+            raise ValueError("Cache size cannot be negative.")
+        self.factory = factory
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__entries = OrderedDict()  # postfix -> compiled pattern
+        self.__aliases = OrderedDict()  # infix -> postfix, skips the shunting yard on hits
+        self.__lock = Lock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, infix: str):
+        """
+        Return the compiled pattern for an infix regex, compiling it on a miss.
+
+        Raises:
+            EmptyRegexError: If the regex is empty.
+            InvalidRegexError: If the regex cannot be compiled.
+        """
+        with self.__lock:
+            key = self.__aliases.get(infix)
+            if key is None:
+                key = shunt(infix)
+            pattern = self.__entries.get(key)
+            if pattern is not None:
+                self.hits += 1
+                self.__entries.move_to_end(key)
+                self.__remember_alias(infix, key)
+                return pattern
+            self.misses += 1
+
+        # Compile outside the lock, errors are not cached
+        pattern = self.factory(infix)
+
+        with self.__lock:
+            if self.maxsize == 0:
+                return pattern
+            self.__entries[key] = pattern
+            self.__entries.move_to_end(key)
+            self.__remember_alias(infix, key)
+            self.__evict()
+        return pattern
+
+    def __remember_alias(self, infix: str, key: str) -> None:
+        """
+        Map the infix spelling to its key, keeping at most maxsize spellings.
+        """
+        self.__aliases[infix] = key
+        self.__aliases.move_to_end(infix)
+        while len(self.__aliases) > self.maxsize:
+            self.__aliases.popitem(last=False)
+
+    def __evict(self) -> None:
+        """
+        Drop least recently used patterns until the cache fits in maxsize.
+        """
+        while len(self.__entries) > self.maxsize:
+            self.__entries.popitem(last=False)
+            self.evictions += 1
+
+    def configure(self, maxsize: int) -> None:
+        """
+        Change the maximum size of the cache, evicting entries if it shrinks.
+
+        Raises:
+            ValueError: If maxsize is negative.
+        """
+        if maxsize < 0:
+            raise ValueError("Cache size cannot be negative.")
+        with self.__lock:
+            self.maxsize = maxsize
+            self.__evict()
+            while len(self.__aliases) > maxsize:
+                self.__aliases.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Remove every cached pattern and reset the counters.
+        """
+        with self.__lock:
+            self.__entries.clear()
+            self.__aliases.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self) -> CacheInfo:
+        """
+        Return the cache counters.
+
+        Returns:
+            CacheInfo: hits, misses, evictions, maxsize and current size.
+        """
+        with self.__lock:
+            return CacheInfo(
+                self.hits, self.misses, self.evictions, self.maxsize, len(self.__entries)
+            )
@@ -0,0 +1,347 @@
+"""
+This file defines character classes, labels that match a set of characters
+instead of a single one. Membership in the first 256 code points is one bit
+test in an int mask, and above that a binary search over the sorted ranges,
+so one state tests a class like [a-z0-9] or [^\\n] in O(1) or O(log k)
+instead of needing an alternation of one state per character.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from src.services.postfix.exceptions import PostfixError
+from src.services.postfix.postfix import HEX_ESCAPE_DIGITS, operand_end, quantifier_end
+from .exceptions import InvalidRegexError
+from .repeat import Repeat, expand_repeats, parse_repeat
+
+# Largest Unicode code point
+MAX_CODE_POINT = 0x10FFFF
+
+# Code points whose membership is kept in the mask, this covers ASCII and every byte value
+MASK_SIZE = 256
+
+# Characters that act as operators in postfix, a literal one is kept as a one character class
+OPERATORS = frozenset("*+?.|()")
+
+# Single character escapes
+ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "f": "\f", "v": "\v", "0": "\0"}
+
+
+class CharClass:
+    """
+    A set of characters used as the label of an NFA state.
+
+    The set is stored as sorted, disjoint, non-adjacent ranges of code points.
+    A negated class is complemented when it is built, so membership is tested
+    the same way for every class. Ints are tested as code points, so a class
+    of byte values works as the label of a byte-level automaton.
+
+    Attributes:
+        ranges: The (first, last) code point ranges of the set, inclusive.
+        mask: Bit c is set if code point c, below MASK_SIZE, is in the set.
+        starts: The first code point of every range, for bisect.
+        ends: The last code point of every range.
+    """
+
+    __slots__ = ("ranges", "mask", "starts", "ends")
+
+    def __init__(self, ranges: Iterable[Tuple[int, int]], negated: bool = False):
+        """
+        Args:
+            ranges: Inclusive (first, last) code point ranges, in any order.
+            negated: Whether the class matches every character outside the ranges.
+        """
+        merged: List[Tuple[int, int]] = []
+        for first, last in sorted(ranges):
+            if merged and first <= merged[-1][1] + 1:
+                if last > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], last)
+            else:
+                merged.append((first, last))
+        if negated:
+            complement = []
+            previous = 0
+            for first, last in merged:
+                if first > previous:
+                    complement.append((previous, first - 1))
+                previous = last + 1
+            if previous <= MAX_CODE_POINT:
+                complement.append((previous, MAX_CODE_POINT))
+            merged = complement
+
+        self.ranges: Tuple[Tuple[int, int], ...] = tuple(merged)
+        self.starts = tuple(first for first, _ in merged)
+        self.ends = tuple(last for _, last in merged)
+        mask = 0
+        for first, last in merged:
+            if first >= MASK_SIZE:
+                break
+            last = min(last, MASK_SIZE - 1)
+            mask |= ((1 << (last - first + 1)) - 1) << first
+        self.mask = mask
+
+    def __contains__(self, character: Union[str, int]) -> bool:
+        code = character if character.__class__ is int else ord(character)
+        if code < MASK_SIZE:
+            return self.mask >> code & 1 == 1
+        index = bisect_right(self.starts, code) - 1
+        return index >= 0 and code <= self.ends[index]
+
+    def __eq__(self, other):
+        if not isinstance(other, CharClass):
+            return NotImplemented
+        return self.ranges == other.ranges
+
+    def __hash__(self):
+        return hash(self.ranges)
+
+    def __repr__(self):
+        return f"CharClass({list(self.ranges)!r})"
+
+    @property
+    def size(self) -> int:
+        """
+        Number of code points in the class.
+        """
+        return sum(last - first + 1 for first, last in self.ranges)
+
+    def members(self, limit: int) -> Optional[List[str]]:
+        """
+        Return the characters of the class, or None if it has more than limit of them.
+        """
+        if self.size > limit:
+            return None
+        return [chr(code) for first, last in self.ranges for code in range(first, last + 1)]
+
+
+def match_labels(labels: Iterable) -> list:
+    """
+    Return the labels of the states in the form the engines' match loops test
+    with a single "character in labels[state]", whatever the kind of label.
+
+    A character stays as it is, since a one character string contains exactly
+    itself, and a class stays a CharClass. A byte value becomes a one-tuple and
+    the None of an epsilon state an empty tuple, which contains nothing. Equal
+    classes, such as the copies of a counted repetition, share one object.
+    """
+    shared: Dict[CharClass, CharClass] = {}
+    result = []
+    for label in labels:
+        if label is None:
+            label = ()
+        elif label.__class__ is int:
+            label = (label,)
+        elif isinstance(label, CharClass):
+            label = shared.setdefault(label, label)
+        result.append(label)
+    return result
+
+
+# Classes of the escapes \d, \w and \s, which are ASCII only, and of \N, any character but a newline
+DIGIT = CharClass([(ord("0"), ord("9"))])
+WORD = CharClass(
+    [(ord("0"), ord("9")), (ord("A"), ord("Z")), (ord("_"), ord("_")), (ord("a"), ord("z"))]
+)
+SPACE = CharClass([(ord(" "), ord(" ")), (ord("\t"), ord("\r"))])
+ANY = CharClass([(ord("\n"), ord("\n"))], negated=True)
+
+CLASS_ESCAPES = {
+    "d": DIGIT,
+    "D": CharClass(DIGIT.ranges, negated=True),
+    "w": WORD,
+    "W": CharClass(WORD.ranges, negated=True),
+    "s": SPACE,
+    "S": CharClass(SPACE.ranges, negated=True),
+    "N": ANY,
+}
+
+
+def _escape(text: str, index: int) -> Tuple[Union[str, CharClass], int]:
+    """
+    Read the escape sequence starting with the backslash at index.
+
+    Returns:
+        tuple: The escaped character or class, and the index after the escape.
+
+    Raises:
+        InvalidRegexError: If the escape is not known or its code point is invalid.
+    """
+    kind = text[index + 1]
+    end = index + 2
+    if kind in CLASS_ESCAPES:
+        return CLASS_ESCAPES[kind], end
+    if kind in ESCAPES:
+        return ESCAPES[kind], end
+    if kind in HEX_ESCAPE_DIGITS:
+        end += HEX_ESCAPE_DIGITS[kind]
+        digits = text[index + 2 : end]
+        try:
+            code = int(digits, 16)
+        except ValueError:
+            code = -1
+        if len(digits) != HEX_ESCAPE_DIGITS[kind] or not 0 <= code <= MAX_CODE_POINT:
+            raise InvalidRegexError(f"Invalid escape sequence: {text[index:end]}")
+        return chr(code), end
+    if kind.isalnum():
+        raise InvalidRegexError(f"Unknown escape sequence: \\{kind}")
+    return kind, end
+
+
+def parse_bracket(text: str) -> CharClass:
+    """
+    Build the class of a bracket expression such as [a-z_], [^0-9] or [\\d.].
+
+    A "-" first or last in the brackets, and a "]" right after the opening
+    bracket, are taken as literals.
+
+    Raises:
+        InvalidRegexError: If a range is reversed or has a class as an end point.
+    """
+    negated = text[1:2] == "^"
+    i = 2 if negated else 1
+    end = len(text) - 1
+    ranges: List[Tuple[int, int]] = []
+    while i < end:
+        if text[i] == "\\":
+            item, i = _escape(text, i)
+        else:
+            item, i = text[i], i + 1
+        if isinstance(item, CharClass):
+            ranges.extend(item.ranges)
+            continue
+        if text[i] != "-" or i + 1 == end:
+            ranges.append((ord(item), ord(item)))
+            continue
+        if text[i + 1] == "\\":
+            last, i = _escape(text, i + 1)
+        else:
+            last, i = text[i + 1], i + 2
+        if isinstance(last, CharClass) or ord(last) < ord(item):
+            raise InvalidRegexError(f"Invalid range in character class: {text}")
+        ranges.append((ord(item), ord(last)))
+    return CharClass(ranges, negated)
+
+
+def operand_label(text: str) -> Union[str, CharClass]:
+    """
+    Return the label of one postfix operand: a character, an escape or a bracket class.
+    A literal operator character becomes a one character class, so it is never
+    mistaken for the operator.
+    """
+    if text[0] == "[":
+        return parse_bracket(text)
+    if text[0] != "\\":
+        return text
+    label, _ = _escape(text, 0)
+    if isinstance(label, str) and label in OPERATORS:
+        return CharClass([(ord(label), ord(label))])
+    return label
+
+
+def postfix_tokens(postfix: Union[str, Sequence]) -> Iterator[Union[str, CharClass]]:
+    """
+    Split a postfix regex into operators and operand labels.
+    Without escapes, classes or counted repetitions the characters of the
+    postfix are the tokens. Counted repetitions are expanded into copies of
+    their operand, see repeat.py. A postfix that is already a list of tokens,
+    as made from a syntax tree by ast_postfix, is returned as it is.
+    """
+    if not isinstance(postfix, str):
+        return iter(postfix)
+    if "{" in postfix:
+        return iter(expand_repeats(_split_postfix(postfix)))
+    if "\\" not in postfix and "[" not in postfix:
+        return iter(postfix)
+    return _split_postfix(postfix)
+
+
+def _split_postfix(postfix: str) -> Iterator[Union[str, CharClass, Repeat]]:
+    """
+    Yield the tokens of a postfix regex that has escapes, classes or counted repetitions.
+
+    Raises:
+        InvalidRegexError: If an escape is incomplete, a class is not closed or
+            a quantifier is malformed.
+    """
+    i = 0
+    while i < len(postfix):
+        character = postfix[i]
+        if character in "\\[{":
+            find_end = quantifier_end if character == "{" else operand_end
+            try:
+                end = find_end(postfix, i)
+            except PostfixError as error:
+                raise InvalidRegexError(f"Invalid regex: {error}") from error
+            text = postfix[i:end]
+            yield parse_repeat(text) if character == "{" else operand_label(text)
+            i = end
+        else:
+            yield postfix[i]
+            i += 1
+
+
+def label_matches(label, character: Union[str, int]) -> bool:
+    """
+    Tell whether a character, or a byte as an int, matches a state label.
+    The engines get the same test from "in" on their match_labels.
+    """
+    if isinstance(label, CharClass):
+        return character in label
+    return label is not None and label == character
+
+
+def utf8_width(label) -> int:
+    """
+    Return the largest number of UTF-8 bytes of a character a label matches.
+    """
+    if isinstance(label, CharClass):
+        code = label.ends[-1] if label.ends else 0
+    elif isinstance(label, int):
+        return 1
+    else:
+        code = ord(label)
+    return 1 if code < 0x80 else 2 if code < 0x800 else 3 if code < 0x10000 else 4
+
+
+def label_ranges(label) -> Sequence[Tuple[int, int]]:
+    """
+    Return the code point ranges a character, byte or class label matches.
+    """
+    if isinstance(label, CharClass):
+        return label.ranges
+    code = label if isinstance(label, int) else ord(label)
+    return ((code, code),)
+
+
+def alphabet_partition(labels: Sequence) -> List[List[Tuple[int, int]]]:
+    """
+    Split the code points into blocks that no label tells apart, i.e. every
+    label matches either all or none of a block.
+
+    The range end points of all labels cut the code points into elementary
+    ranges, and ranges matched by the same set of labels form one block.
+
+    Returns:
+        list: Every block matched by some label, as its sorted (first, last)
+            ranges, in order of the first code point of each block.
+    """
+    bounds = sorted(
+        {
+            code
+            for label in labels
+            for first, last in label_ranges(label)
+            for code in (first, last + 1)
+        }
+    )
+    signatures: List[List[int]] = [[] for _ in bounds]
+    for index, label in enumerate(labels):
+        for first, last in label_ranges(label):
+            for elementary in range(bisect_left(bounds, first), bisect_left(bounds, last + 1)):
+                signatures[elementary].append(index)
+
+    blocks: Dict[Tuple[int, ...], List[Tuple[int, int]]] = {}
+    for elementary, signature in enumerate(signatures):
+        if signature:
+            first = bounds[elementary]
+            last = bounds[elementary + 1] - 1
+            blocks.setdefault(tuple(signature), []).append((first, last))
+    return list(blocks.values())
@@ -0,0 +1,279 @@
+"""
+This file defines a bit-parallel matcher built on the Glushkov (position)
+automaton. The automaton has one state per character of the regex and no
+epsilon edges, and its whole active state set is kept in one Python int, so
+a step is a few table lookups and bitwise operations, like Shift-And.
+"""
+
+from typing import Dict, List, Optional, Tuple
+from .char_class import CharClass, postfix_tokens
+from .indexed_nfa import as_indexed
+
+# Bits of the state vector handled by one lookup in the follow tables
+CHUNK_BITS = 8
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+# Largest number of positions, the follow tables grow with the square of it
+MAX_POSITIONS = 1024
+
+# Number of state vectors whose follow union is memoized before the memo is cleared
+REACH_CACHE_SIZE = 10_000
+
+# Largest number of characters whose masks are memoized, past it masks of classes are recomputed
+MASK_CACHE_SIZE = 10_000
+
+
+def _link(follow: List[int], last: int, first: int) -> None:
+    """
+    Let every position of last be followed by every position of first.
+    """
+    while last:
+        low = last & -last
+        follow[low.bit_length() - 1] |= first
+        last ^= low
+
+
+def glushkov_positions(postfix: str) -> Tuple[List[Optional[str]], List[int], int]:
+    """
+    Build the Glushkov automaton of a postfix regex.
+
+    Every literal character or class of the regex is a position, numbered from
+    1 in the order they appear. Position 0 is the start state.
+
+    Returns:
+        tuple: The character or class of every position (None for the start), the follow
+            mask of every position, and the mask of accepting positions.
+    """
+    symbols: List[Optional[str]] = [None]
+    follow: List[int] = [0]
+    # Each entry is (nullable, first, last)
+    stack: List[Tuple[bool, int, int]] = []
+
+    for character in postfix_tokens(postfix):
+        match character:
+            case "*" | "+":
+                nullable, first, last = stack.pop()
+                _link(follow, last, first)
+                stack.append((nullable or character == "*", first, last))
+            case "?":
+                _, first, last = stack.pop()
+                stack.append((True, first, last))
+            case ".":
+                nullable2, first2, last2 = stack.pop()
+                nullable1, first1, last1 = stack.pop()
+                _link(follow, last1, first2)
+                stack.append(
+                    (
+                        nullable1 and nullable2,
+                        first1 | first2 if nullable1 else first1,
+                        last1 | last2 if nullable2 else last2,
+                    )
+                )
+            case "|":
+                nullable2, first2, last2 = stack.pop()
+                nullable1, first1, last1 = stack.pop()
+                stack.append((nullable1 or nullable2, first1 | first2, last1 | last2))
+            case _:
+                bit = 1 << len(symbols)
+                symbols.append(character)
+                follow.append(0)
+                stack.append((False, bit, bit))
+
+    nullable, first, last = stack.pop()
+    follow[0] = first
+    return symbols, follow, last | 1 if nullable else last
+
+
+class BitParallelGlushkov:
+    """
+    Matches strings by running the Glushkov automaton with an int as the state set.
+
+    Bit p of the state is set if position p was the last one matched. A step
+    finds every position that may follow an active one by looking up the state
+    one 8-bit chunk at a time in precomputed tables, then keeps those whose
+    character is the current one by and-ing with that character's mask. When
+    the state spans several chunks, the unions are also memoized per state.
+
+    A position labelled with a CharClass is added to the mask of every character
+    the class matches. Those masks are computed the first time a character is
+    seen and then memoized with the others.
+
+    Attributes:
+        symbols: symbols[p] is the character or class of position p, None for the start.
+        follow: follow[p] is the mask of positions that may follow position p.
+        accepting: Mask of the positions a match may end at, bit 0 if the empty string matches.
+        masks: Maps each character to the mask of the positions that match it.
+        tables: tables[k][chunk] is the union of the follow masks of the
+            positions set in chunk, where chunk holds bits 8k to 8k+7 of the state.
+    """
+
+    def __init__(self, symbols: List[Optional[str]], follow: List[int], accepting: int):
+        if len(symbols) > MAX_POSITIONS:
+            raise ValueError(
+                f"Bit-parallel matching supports at most {MAX_POSITIONS} positions, "
+                f"the pattern has {len(symbols) - 1}."
+            )
+        self.symbols = symbols
+        self.follow = follow
+        self.accepting = accepting
+
+        self.masks: Dict[str, int] = {}
+        self.__class_masks: List[Tuple[CharClass, int]] = []
+        for position, symbol in enumerate(symbols):
+            if isinstance(symbol, CharClass):
+                self.__class_masks.append((symbol, 1 << position))
+            elif symbol is not None:
+                self.masks[symbol] = self.masks.get(symbol, 0) | 1 << position
+        for symbol in self.masks:
+            for char_class, bit in self.__class_masks:
+                if symbol in char_class:
+                    self.masks[symbol] |= bit
+
+        self.tables: List[List[int]] = []
+        for base in range(0, len(symbols), CHUNK_BITS):
+            table = [0] * (1 << CHUNK_BITS)
+            for chunk in range(1, 1 << CHUNK_BITS):
+                # Reuse the entry without the lowest bit, adding that bit's follow mask
+                low = chunk & -chunk
+                position = base + low.bit_length() - 1
+                extra = follow[position] if position < len(follow) else 0
+                table[chunk] = table[chunk ^ low] | extra
+            self.tables.append(table)
+        self.__reach: Dict[int, int] = {}
+
+    @classmethod
+    def from_postfix(cls, postfix: str) -> "BitParallelGlushkov":
+        """
+        Build the matcher straight from a postfix regex.
+        """
+        return cls(*glushkov_positions(postfix))
+
+    @classmethod
+    def from_nfa(cls, nfa) -> "BitParallelGlushkov":
+        """
+        Build the matcher from an indexed or array NFA.
+
+        The labelled states and precomputed closures of those forms are exactly
+        the positions and follow sets of the Glushkov automaton.
+        """
+        automaton = as_indexed(nfa)
+        accept = automaton.accept
+        positions = {}
+        symbols: List[Optional[str]] = [None]
+        for state in range(automaton.state_count):
+            label = automaton.label(state)
+            if label is not None:
+                positions[state] = len(symbols)
+                symbols.append(label)
+
+        def mask(closure) -> int:
+            """
+            Return the positions of a closure as a mask, leaving out the accept state.
+            """
+            bits = 0
+            for state in closure:
+                if state != accept:
+                    bits |= 1 << positions[state]
+            return bits
+
+        follow = [mask(automaton.initial)]
+        accepting = 1 if accept in automaton.initial else 0
+        for state, position in positions.items():
+            follow.append(mask(automaton.follow[state]))
+            if accept in automaton.follow[state]:
+                accepting |= 1 << position
+        return cls(symbols, follow, accepting)
+
+    @property
+    def position_count(self) -> int:
+        """
+        Number of positions, i.e. literal characters in the regex.
+        """
+        return len(self.symbols) - 1
+
+    def __mask(self, character: str) -> int:
+        """
+        Return the mask of the positions matching a character that has no mask yet.
+        """
+        if not self.__class_masks:
+            return 0
+        mask = 0
+        for char_class, bit in self.__class_masks:
+            if character in char_class:
+                mask |= bit
+        if len(self.masks) < MASK_CACHE_SIZE:
+            self.masks[character] = mask
+        return mask
+
+    def __step(self, state: int) -> int:
+        """
+        Return the mask of every position that may follow an active one.
+        """
+        reachable = self.__reach.get(state)
+        if reachable is not None:
+            return reachable
+
+        reachable = 0
+        rest = state
+        for table in self.tables:
+            if not rest:
+                break
+            reachable |= table[rest & CHUNK_MASK]
+            rest >>= CHUNK_BITS
+        if len(self.__reach) >= REACH_CACHE_SIZE:
+            self.__reach.clear()
+        self.__reach[state] = reachable
+        return reachable
+
+    def fullmatch(self, string: str) -> bool:
+        """
+        Check whether the whole string is accepted by the automaton.
+        """
+        masks = self.masks
+        state = 1
+        if len(self.tables) == 1:
+            # With at most 7 positions the whole state is one chunk
+            table = self.tables[0]
+            for character in string:
+                mask = masks.get(character)
+                if mask is None:
+                    mask = self.__mask(character)
+                state = table[state] & mask
+                if not state:
+                    return False
+        else:
+            reach = self.__reach
+            step = self.__step
+            for character in string:
+                reachable = reach.get(state)
+                if reachable is None:
+                    reachable = step(state)
+                mask = masks.get(character)
+                if mask is None:
+                    mask = self.__mask(character)
+                state = reachable & mask
+                if not state:
+                    return False
+        return bool(state & self.accepting)
+
+    def longest_match(self, string: str, start: int) -> Optional[int]:
+        """
+        Find the end of the longest match starting at the given index.
+
+        Returns:
+            int: The end index of the longest match, or None if nothing matches.
+        """
+        masks = self.masks
+        accepting = self.accepting
+        state = 1
+        end = start if accepting & 1 else None
+        for i in range(start, len(string)):
+            mask = masks.get(string[i])
+            if mask is None:
+                mask = self.__mask(string[i])
+            state = self.__step(state) & mask
+            if not state:
+                break
+            if state & accepting:
+                end = i + 1
+        return end
@@ -0,0 +1,253 @@
+"""
+This file defines an indexed form of a compiled NFA. States are numbered and
+stored in parallel lists, and the epsilon closures needed at match time are
+computed once after compilation, so matching never follows epsilon edges.
+"""
+
+from typing import Callable, Container, Dict, List, Optional, Sequence, Tuple
+from .char_class import CharClass, match_labels
+from .nfa import NFA, State
+
+# Edge value for a missing transition
+NO_EDGE = -1
+
+
+class EpsilonClosures:
+    """
+    Computes the epsilon closures of an NFA held as numbered states. Only
+    "important" states, i.e. labelled states and accept states, appear in them.
+    Closures are memoized, so each one is computed once.
+
+    An epsilon state with a single transition has the closure of its target,
+    so a chain of them, such as the joins of an alternation, shares one
+    closure with the state it ends at. Without this every branch of
+    (w1|...|wn)* would store its own copy of the n-state closure. Closures
+    that differ are still built apart, so their total size can grow with the
+    square of the state count.
+    """
+
+    def __init__(
+        self,
+        edge1: Sequence[int],
+        edge2: Sequence[int],
+        accepting: Container[int],
+        is_epsilon: Callable[[int], bool],
+    ):
+        """
+        Args:
+            edge1: edge1[i] is the id of the first transition of state i, or NO_EDGE.
+            edge2: edge2[i] is the id of the second transition of state i, or NO_EDGE.
+            accepting: The ids of the accept states.
+            is_epsilon: Tells whether the state with an id is an epsilon state.
+        """
+        self.edge1 = edge1
+        self.edge2 = edge2
+        self.accepting = accepting
+        self.is_epsilon = is_epsilon
+        self.__closures: Dict[int, Tuple[int, ...]] = {}
+
+    def closure(self, state: int) -> Tuple[int, ...]:
+        """
+        Return the sorted important states reachable from a state through epsilon edges.
+        """
+        closures = self.__closures
+        closure = closures.get(state)
+        if closure is not None:
+            return closure
+
+        edge1 = self.edge1
+        edge2 = self.edge2
+        chain = []
+        seen = set()
+        while (
+            self.is_epsilon(state)
+            and state not in self.accepting
+            and edge2[state] == NO_EDGE
+            and edge1[state] != NO_EDGE
+            and state not in closures
+            and state not in seen
+        ):
+            chain.append(state)
+            seen.add(state)
+            state = edge1[state]
+        closure = closures.get(state)
+        if closure is None:
+            closure = self.__search(state)
+            closures[state] = closure
+        for link in chain:
+            closures[link] = closure
+        return closure
+
+    def __search(self, state: int) -> Tuple[int, ...]:
+        """
+        Return the sorted important states reachable from a state, searching depth-first.
+        """
+        edge1 = self.edge1
+        edge2 = self.edge2
+        is_epsilon = self.is_epsilon
+        accepting = self.accepting
+        seen = set()
+        important = []
+        stack = [state]
+
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            if not is_epsilon(current):
+                important.append(current)
+                continue
+            if current in accepting:
+                important.append(current)
+            # Epsilon transition
+            if edge1[current] != NO_EDGE:
+                stack.append(edge1[current])
+            if edge2[current] != NO_EDGE:
+                stack.append(edge2[current])
+
+        return tuple(sorted(important))
+
+
+class IndexedNFA:
+    """
+    An NFA with numbered states and precomputed epsilon closures.
+
+    Only "important" states, i.e. states with a character label and the accept
+    state, appear in closures. Those are the only states a simulation has to keep.
+
+    Attributes:
+        labels: labels[i] is the character or CharClass of state i, or None for
+            an epsilon state.
+        edge1: edge1[i] is the id of the first transition of state i, or NO_EDGE.
+        edge2: edge2[i] is the id of the second transition of state i, or NO_EDGE.
+        start: The id of the initial state.
+        accept: The id of the accept state.
+        initial: The epsilon closure of the initial state.
+        follow: follow[i] is the epsilon closure reached after state i consumes
+            its character, or an empty tuple for epsilon states.
+        byte_level: True if the labels are byte values and byte classes, as
+            built by byte_automaton.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        labels: Sequence[Optional[str]],
+        edge1: Sequence[int],
+        edge2: Sequence[int],
+        start: int,
+        accept: int,
+        byte_level: bool = False,
+    ):
+        self.labels = labels
+        self.byte_level = byte_level
+        self.__match_labels = match_labels(labels)
+        self.edge1 = edge1
+        self.edge2 = edge2
+        self.start = start
+        self.accept = accept
+
+        closure = EpsilonClosures(
+            edge1, edge2, (accept,), lambda state: labels[state] is None
+        ).closure
+        self.initial = closure(start)
+        self.follow: List[Tuple[int, ...]] = [
+            closure(edge1[state]) if label is not None else () for state, label in enumerate(labels)
+        ]
+
+    @classmethod
+    def from_nfa(cls, nfa: NFA) -> "IndexedNFA":
+        """
+        Number the states of a linked NFA and build its indexed form.
+        """
+        order, ids = number_states(nfa)
+        labels = [state.label for state in order]
+        edge1 = [NO_EDGE if state.edge1 is None else ids[state.edge1] for state in order]
+        edge2 = [NO_EDGE if state.edge2 is None else ids[state.edge2] for state in order]
+        return cls(labels, edge1, edge2, 0, ids[nfa.accept_state])
+
+    @property
+    def state_count(self) -> int:
+        """
+        Number of states in the NFA.
+        """
+        return len(self.labels)
+
+    @property
+    def alphabet(self) -> List[str]:
+        """
+        The sorted characters that appear as labels in the NFA, classes left out.
+        """
+        return sorted(
+            {
+                label
+                for label in self.labels
+                if label is not None and label.__class__ is not CharClass
+            }
+        )
+
+    @property
+    def classes(self) -> List[CharClass]:
+        """
+        The distinct character classes that appear as labels in the NFA.
+        """
+        return list(dict.fromkeys(label for label in self.labels if label.__class__ is CharClass))
+
+    def label(self, state: int) -> Optional[str]:
+        """
+        Return the character or class label of a state, or None for an epsilon state.
+        """
+        return self.labels[state]
+
+    def step(self, current_states, character: str) -> set:
+        """
+        Consume one character from every current state by taking the union
+        of the precomputed closures of the states whose label matches.
+
+        Returns:
+            set: The important states reached after the character.
+        """
+        labels = self.__match_labels
+        follow = self.follow
+        next_states = set()
+        for state in current_states:
+            if character in labels[state]:
+                next_states.update(follow[state])
+        return next_states
+
+
+def number_states(nfa: NFA) -> Tuple[List[State], Dict[State, int]]:
+    """
+    Number the states of a linked NFA depth-first from the initial state.
+
+    Returns:
+        tuple: The states in id order, and a dict from state to id.
+    """
+    ids = {nfa.initial_state: 0}
+    order = [nfa.initial_state]
+    stack = [nfa.initial_state]
+
+    while stack:
+        state = stack.pop()
+        for edge in (state.edge2, state.edge1):
+            if edge is not None and edge not in ids:
+                ids[edge] = len(order)
+                order.append(edge)
+                stack.append(edge)
+
+    # The accept state is always reachable in a valid NFA, but keep it numbered anyway
+    if nfa.accept_state not in ids:
+        ids[nfa.accept_state] = len(order)
+        order.append(nfa.accept_state)
+
+    return order, ids
+
+
+def as_indexed(nfa):
+    """
+    Return an NFA in a numbered form the engines can run on.
+    A linked NFA is converted to an IndexedNFA, numbered forms are returned as they are.
+    """
+    if isinstance(nfa, NFA):
+        return IndexedNFA.from_nfa(nfa)
+    return nfa
@@ -0,0 +1,421 @@
+"""
+This file extracts literals that every match of a pattern must contain, and
+defines prefilters that use them to skip ahead with str.find or an Aho-Corasick
+scan, so most of a search runs without the automaton simulation.
+"""
+
+from os.path import commonprefix
+from typing import FrozenSet, List, NamedTuple, Optional, Tuple
+from .aho_corasick import AhoCorasick
+from .char_class import CharClass, postfix_tokens, utf8_width
+
+# Largest set of alternative literals kept by required_alternatives
+MAX_ALTERNATIVES = 64
+
+# Longest match for which an inner literal is verified in a window around each
+# occurrence; beyond it the windows overlap so much that one scan is cheaper
+MAX_WINDOW_LENGTH = 1024
+
+
+class LiteralInfo(NamedTuple):
+    """
+    What is known about the strings a subexpression matches.
+
+    Attributes:
+        exact: The only string the subexpression matches, or None.
+        prefix: A literal every match starts with.
+        suffix: A literal every match ends with.
+        required: The longest known literal every match contains.
+        max_length: Length of the longest match, or None if unbounded.
+    """
+
+    exact: Optional[str]
+    prefix: str
+    suffix: str
+    required: str
+    max_length: Optional[int]
+
+
+def _optional(info: LiteralInfo, bounded: bool) -> LiteralInfo:
+    """
+    Info of x* or x?, which may match the empty string and so need no literal.
+    """
+    return LiteralInfo(None, "", "", "", info.max_length if bounded else None)
+
+
+def _concat(first: LiteralInfo, second: LiteralInfo) -> LiteralInfo:
+    """
+    Info of a concatenation. The suffix of the first part and the prefix of the
+    second part join into one literal that every match contains.
+    """
+    exact = None
+    if first.exact is not None and second.exact is not None:
+        exact = first.exact + second.exact
+    prefix = first.exact + second.prefix if first.exact is not None else first.prefix
+    suffix = first.suffix + second.exact if second.exact is not None else second.suffix
+    required = max(
+        (first.required, second.required, first.suffix + second.prefix, prefix, suffix), key=len
+    )
+    max_length = None
+    if first.max_length is not None and second.max_length is not None:
+        max_length = first.max_length + second.max_length
+    return LiteralInfo(exact, prefix, suffix, required, max_length)
+
+
+def _alternate(first: LiteralInfo, second: LiteralInfo) -> LiteralInfo:
+    """
+    Info of an alternation, only what both branches share is still required.
+    """
+    exact = first.exact if first.exact == second.exact else None
+    prefix = commonprefix([first.prefix, second.prefix])
+    suffix = commonprefix([first.suffix[::-1], second.suffix[::-1]])[::-1]
+    required = exact if exact is not None else max((prefix, suffix), key=len)
+    max_length = None
+    if first.max_length is not None and second.max_length is not None:
+        max_length = max(first.max_length, second.max_length)
+    return LiteralInfo(exact, prefix, suffix, required, max_length)
+
+
+def analyze_literals(postfix: str) -> LiteralInfo:
+    """
+    Work out the literals every match of a postfix regex must contain.
+
+    The postfix is walked once with a stack, the same way compile_regex walks it.
+
+    Returns:
+        LiteralInfo: What is known about the whole regex.
+    """
+    stack: List[LiteralInfo] = []
+    for character in postfix_tokens(postfix):
+        match character:
+            case "*":
+                stack.append(_optional(stack.pop(), bounded=False))
+            case "?":
+                stack.append(_optional(stack.pop(), bounded=True))
+            case "+":
+                info = stack.pop()
+                stack.append(LiteralInfo(None, info.prefix, info.suffix, info.required, None))
+            case ".":
+                second = stack.pop()
+                stack.append(_concat(stack.pop(), second))
+            case "|":
+                second = stack.pop()
+                stack.append(_alternate(stack.pop(), second))
+            case CharClass():
+                # A class of one character, e.g. an escaped operator, is still a literal
+                members = character.members(1)
+                literal = members[0] if members else None
+                if literal is None:
+                    stack.append(LiteralInfo(None, "", "", "", 1))
+                else:
+                    stack.append(LiteralInfo(literal, literal, literal, literal, 1))
+            case _:
+                stack.append(LiteralInfo(character, character, character, character, 1))
+    return stack.pop()
+
+
+class Alternatives(NamedTuple):
+    """
+    Literal sets known about the strings a subexpression matches.
+
+    Attributes:
+        exact: Every string the subexpression matches, or None if there are too many.
+        factors: Literals one of which every match contains, or None if unknown.
+    """
+
+    exact: Optional[FrozenSet[str]]
+    factors: Optional[FrozenSet[str]]
+
+
+def _better(first: Optional[FrozenSet[str]], second: Optional[FrozenSet[str]]):
+    """
+    Return the more selective of two literal sets, i.e. the one whose shortest
+    literal is longer, or the smaller one on a tie.
+    """
+    if not first or "" in first:
+        return second if second and "" not in second else None
+    if not second or "" in second:
+        return first
+    first_key = (min(map(len, first)), -len(first))
+    second_key = (min(map(len, second)), -len(second))
+    return first if first_key >= second_key else second
+
+
+def required_alternatives(postfix: str, limit: int = MAX_ALTERNATIVES) -> Optional[FrozenSet[str]]:
+    """
+    Find a set of literals such that every match of a postfix regex contains one of them.
+
+    Args:
+        postfix (str): The regex in postfix notation.
+        limit (int): Largest number of literals a set may have.
+
+    Returns:
+        frozenset: The literals, or None if no such set was found.
+    """
+    stack: List[Alternatives] = []
+    for character in postfix_tokens(postfix):
+        match character:
+            case "*":
+                stack.pop()
+                stack.append(Alternatives(None, None))
+            case "?":
+                info = stack.pop()
+                exact = None if info.exact is None else info.exact | {""}
+                stack.append(Alternatives(exact, None))
+            case "+":
+                stack.append(Alternatives(None, stack.pop().factors))
+            case ".":
+                second = stack.pop()
+                first = stack.pop()
+                exact = None
+                if first.exact is not None and second.exact is not None:
+                    if len(first.exact) * len(second.exact) <= limit:
+                        exact = frozenset(a + b for a in first.exact for b in second.exact)
+                factors = _better(exact, _better(first.factors, second.factors))
+                stack.append(Alternatives(exact, factors))
+            case "|":
+                second = stack.pop()
+                first = stack.pop()
+                exact = None
+                if first.exact is not None and second.exact is not None:
+                    exact = first.exact | second.exact
+                    if len(exact) > limit:
+                        exact = None
+                factors = None
+                if first.factors is not None and second.factors is not None:
+                    factors = first.factors | second.factors
+                    if len(factors) > limit:
+                        factors = None
+                stack.append(Alternatives(exact, _better(exact, factors)))
+            case CharClass():
+                members = character.members(limit)
+                literals = None if members is None else frozenset(members)
+                stack.append(Alternatives(literals, literals))
+            case _:
+                literal = frozenset((character,))
+                stack.append(Alternatives(literal, literal))
+    return _better(stack.pop().factors, None)
+
+
+class LiteralPrefilter:
+    """
+    Finds candidate match positions with str.find before running the automaton.
+
+    With a prefix literal every match starts at an occurrence of the literal,
+    so only those positions are tried with an anchored match. With an inner
+    literal a string without the literal is rejected at once. If the longest
+    match is at most MAX_WINDOW_LENGTH long, the automaton only runs in a
+    window around each occurrence, from the earliest start a match containing
+    it could have to the longest end, and skips to the next occurrence when
+    the window has none. Otherwise an occurrence only lets the search skip
+    ahead, and the automaton scans on from there. Bytes and bytearray input is
+    searched the same way for the UTF-8 encoded literal.
+
+    Attributes:
+        literal: The literal every match contains.
+        is_prefix: True if every match starts with the literal.
+        max_length: Length of the longest match, or None if unbounded.
+        encoded: The literal encoded as UTF-8.
+        byte_max_length: Length of the longest match in bytes, or None if unbounded.
+    """
+
+    __slots__ = ("literal", "is_prefix", "max_length", "encoded", "byte_max_length")
+
+    def __init__(
+        self, literal: str, is_prefix: bool, max_length: Optional[int] = None, width: int = 1
+    ):
+        """
+        Args:
+            width: Largest number of UTF-8 bytes of a character in the pattern.
+        """
+        self.literal = literal
+        self.is_prefix = is_prefix
+        self.max_length = max_length
+        self.encoded = literal.encode("utf-8")
+        self.byte_max_length = None if max_length is None else max_length * width
+
+    def __repr__(self):
+        kind = "prefix" if self.is_prefix else "inner"
+        return f"LiteralPrefilter({self.literal!r}, {kind})"
+
+    @classmethod
+    def from_postfix(cls, postfix: str) -> Optional["LiteralPrefilter"]:
+        """
+        Choose the literal for a postfix regex, preferring a prefix literal.
+
+        Returns:
+            LiteralPrefilter: The prefilter, or None if no match needs a literal.
+        """
+        info = analyze_literals(postfix)
+        if info.prefix and len(info.prefix) >= len(info.required) // 2:
+            return cls(info.prefix, True, info.max_length, _width(postfix))
+        if info.required:
+            return cls(info.required, False, info.max_length, _width(postfix))
+        return None
+
+    def search(self, pattern, string: str, pos: int = 0) -> Optional[Tuple[int, int]]:
+        """
+        Find the leftmost longest match of a pattern at or after pos.
+
+        Args:
+            pattern (Pattern): The compiled pattern whose literal this is.
+
+        Returns:
+            tuple: The (start, end) span of the match, or None.
+        """
+        return self.__search(
+            string, pos, self.literal, self.max_length, (pattern.matcher, pattern.searcher)
+        )
+
+    def search_bytes(self, pattern, data, pos: int = 0) -> Optional[Tuple[int, int]]:
+        """
+        Find the leftmost longest match of a pattern in bytes-like data at or after pos.
+        A memoryview has no find method, so it is searched without the prefilter.
+
+        Returns:
+            tuple: The (start, end) byte span of the match, or None.
+        """
+        if isinstance(data, memoryview):
+            return pattern.byte_searcher.search(data, pos)
+        return self.__search(
+            data,
+            pos,
+            self.encoded,
+            self.byte_max_length,
+            (pattern.byte_matcher, pattern.byte_searcher),
+        )
+
+    def __search(self, string, pos: int, literal, max_length, engines):
+        """
+        Search with the literal and the (matcher, searcher) engines of either str or bytes input.
+        """
+        matcher, searcher = engines
+        found = string.find(literal, pos)
+        if found < 0:
+            return None
+
+        if self.is_prefix:
+            longest_match = matcher.longest_match
+            while found >= 0:
+                end = longest_match(string, found)
+                if end is not None:
+                    return found, end
+                found = string.find(literal, found + 1)
+            return None
+
+        if max_length is None or max_length > MAX_WINDOW_LENGTH:
+            # A match containing the literal at found can not start earlier than this
+            if max_length is not None:
+                pos = max(pos, found + len(literal) - max_length)
+            return searcher.search(string, pos)
+
+        # A match containing the first occurrence starts between low and found and
+        # ends within max_length of its start, so the window holds it whole. No
+        # match starts before low, as it would end before the occurrence.
+        length = len(literal)
+        while found >= 0:
+            low = max(pos, found + length - max_length)
+            span = searcher.search(string[low : found + max_length])
+            if span is not None and low + span[0] <= found:
+                return low + span[0], low + span[1]
+            pos = found + 1
+            found = string.find(literal, pos)
+        return None
+
+
+class AhoCorasickPrefilter:
+    """
+    Finds candidate match positions with an Aho-Corasick scan for a set of
+    literals, one of which every match contains.
+
+    A string without any of the literals is rejected in one pass. Otherwise the
+    search starts as late as the first occurrence and the longest possible
+    match allow, and the automaton scans on from there, so an occurrence only
+    skips ahead and is not verified in a window as with LiteralPrefilter. Bytes-like input is
+    scanned with a second automaton over the UTF-8 encoded literals.
+
+    Attributes:
+        keywords: The Aho-Corasick automaton of the literals.
+        max_length: Length of the longest match, or None if unbounded.
+        byte_keywords: The Aho-Corasick automaton of the encoded literals.
+        byte_max_length: Length of the longest match in bytes, or None if unbounded.
+    """
+
+    __slots__ = ("keywords", "max_length", "byte_keywords", "byte_max_length")
+
+    def __init__(self, literals, max_length: Optional[int] = None, width: int = 1):
+        """
+        Args:
+            width: Largest number of UTF-8 bytes of a character in the pattern.
+        """
+        self.keywords = AhoCorasick(sorted(literals))
+        self.max_length = max_length
+        self.byte_keywords = AhoCorasick(
+            literal.encode("utf-8") for literal in self.keywords.literals
+        )
+        self.byte_max_length = None if max_length is None else max_length * width
+
+    def __repr__(self):
+        return f"AhoCorasickPrefilter({self.keywords.literals!r})"
+
+    def search(self, pattern, string: str, pos: int = 0) -> Optional[Tuple[int, int]]:
+        """
+        Find the leftmost longest match of a pattern at or after pos.
+
+        Args:
+            pattern (Pattern): The compiled pattern whose literals these are.
+
+        Returns:
+            tuple: The (start, end) span of the match, or None.
+        """
+        return self.__search(string, pos, self.keywords, self.max_length, pattern.searcher)
+
+    def search_bytes(self, pattern, data, pos: int = 0) -> Optional[Tuple[int, int]]:
+        """
+        Find the leftmost longest match of a pattern in bytes-like data at or after pos.
+
+        Returns:
+            tuple: The (start, end) byte span of the match, or None.
+        """
+        return self.__search(
+            data, pos, self.byte_keywords, self.byte_max_length, pattern.byte_searcher
+        )
+
+    @staticmethod
+    def __search(string, pos: int, keywords: AhoCorasick, max_length, searcher):
+        """
+        Search with the keywords and engine of either str or bytes input.
+        """
+        found = keywords.find(string, pos)
+        if found is None:
+            return None
+        # Every match contains an occurrence ending at or after the first one
+        if max_length is not None:
+            pos = max(pos, found[0] - max_length)
+        return searcher.search(string, pos)
+
+
+def _width(postfix: str) -> int:
+    """
+    Return the largest number of UTF-8 bytes of a character a postfix regex matches.
+    """
+    return max(utf8_width(token) for token in postfix_tokens(postfix))
+
+
+def choose_prefilter(postfix: str):
+    """
+    Choose the prefilter for a postfix regex. A single literal is searched with
+    str.find, and a set of alternatives with Aho-Corasick when it is much more selective.
+
+    Returns:
+        LiteralPrefilter | AhoCorasickPrefilter: The prefilter, or None if no
+            match needs a literal.
+    """
+    single = LiteralPrefilter.from_postfix(postfix)
+    alternatives = required_alternatives(postfix)
+    if alternatives is None or len(alternatives) < 2:
+        return single
+    # str.find runs far faster than the keyword scan, so a somewhat shorter single literal wins
+    if single is not None and 2 * len(single.literal) >= min(map(len, alternatives)):
+        return single
+    return AhoCorasickPrefilter(alternatives, analyze_literals(postfix).max_length, _width(postfix))
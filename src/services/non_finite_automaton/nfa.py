@@ -2,8 +2,9 @@
 This file set's up a non-deterministic finite automaton and uses it to compile regex.
 """
 
+from importlib import import_module
 from typing import List, Set
-from src.services.postfix.postfix import shunting_yard as shunt
+from .char_class import postfix_tokens
 from .exceptions import InvalidRegexError, EmptyRegexError
 
 
@@ -13,7 +14,7 @@ class State:
     """
 
     def __init__(self, label=None):
-        self.label = label  # Character label, None for epsilon
+        self.label = label  # Character or CharClass label, None for epsilon
         self.edge1 = None  # First transition
         self.edge2 = None  # Second transition
 
@@ -51,17 +52,62 @@ def follow_es(initial_state) -> Set[State]:
     return states
 
 
-def compile_regex(postfix):
+class StateBuilder:
+    """
+    Creates and links the states of an NFA as State objects.
+
+    compile_regex only talks to its builder, so another builder can lay out
+    the same automaton in a different representation.
+    """
+
+    @staticmethod
+    def new_state(label=None) -> State:
+        """
+        Create a state with an optional character or class label.
+        """
+        return State(label)
+
+    @staticmethod
+    def set_edge1(state: State, target: State) -> None:
+        """
+        Set the first transition of a state.
+        """
+        state.edge1 = target
+
+    @staticmethod
+    def set_edge2(state: State, target: State) -> None:
+        """
+        Set the second transition of a state.
+        """
+        state.edge2 = target
+
+    @staticmethod
+    def finish(nfa: NFA) -> NFA:
+        """
+        Return the finished automaton.
+        """
+        return nfa
+
+
+def compile_regex(postfix, builder=None):
     """
     Compile a postfix regex expression into an NFA.
+
+    The states are created with the given builder, by default as linked State objects.
+    Escapes and bracket classes in the postfix become CharClass labels.
     """
+    if builder is None:
+        builder = StateBuilder()
+    new_state = builder.new_state
+    set_edge1 = builder.set_edge1
+    set_edge2 = builder.set_edge2
     nfa_stack: List[NFA] = []
 
     # Handle empty regex
     if not postfix:
         raise EmptyRegexError("The provided regex is empty.")
 
-    for character in postfix:
+    for character in postfix_tokens(postfix):
         match character:
 
             case "*":
@@ -69,12 +115,12 @@ def compile_regex(postfix):
                     raise InvalidRegexError("Invalid regex: * operator with no operand")
 
                 nfa1 = nfa_stack.pop()
-                initial_state = State()
-                accept_state = State()
-                initial_state.edge1 = nfa1.initial_state
-                initial_state.edge2 = accept_state
-                nfa1.accept_state.edge1 = nfa1.initial_state
-                nfa1.accept_state.edge2 = accept_state
+                initial_state = new_state()
+                accept_state = new_state()
+                set_edge1(initial_state, nfa1.initial_state)
+                set_edge2(initial_state, accept_state)
+                set_edge1(nfa1.accept_state, nfa1.initial_state)
+                set_edge2(nfa1.accept_state, accept_state)
                 nfa_stack.append(NFA(initial_state, accept_state))
 
             case ".":
@@ -83,7 +129,7 @@ def compile_regex(postfix):
 
                 nfa2 = nfa_stack.pop()
                 nfa1 = nfa_stack.pop()
-                nfa1.accept_state.edge1 = nfa2.initial_state
+                set_edge1(nfa1.accept_state, nfa2.initial_state)
                 nfa_stack.append(NFA(nfa1.initial_state, nfa2.accept_state))
 
             case "|":
@@ -92,12 +138,12 @@ def compile_regex(postfix):
 
                 nfa2 = nfa_stack.pop()
                 nfa1 = nfa_stack.pop()
-                initial_state = State()
-                accept_state = State()
-                initial_state.edge1 = nfa1.initial_state
-                initial_state.edge2 = nfa2.initial_state
-                nfa1.accept_state.edge1 = accept_state
-                nfa2.accept_state.edge1 = accept_state
+                initial_state = new_state()
+                accept_state = new_state()
+                set_edge1(initial_state, nfa1.initial_state)
+                set_edge2(initial_state, nfa2.initial_state)
+                set_edge1(nfa1.accept_state, accept_state)
+                set_edge1(nfa2.accept_state, accept_state)
                 nfa_stack.append(NFA(initial_state, accept_state))
 
             case "+":
@@ -105,33 +151,33 @@ def compile_regex(postfix):
                     raise InvalidRegexError("Invalid regex: + operator with no operand")
 
                 nfa1 = nfa_stack.pop()
-                initial_state = State()
-                accept_state = State()
-                initial_state.edge1 = nfa1.initial_state
-                nfa1.accept_state.edge1 = nfa1.initial_state
-                nfa1.accept_state.edge2 = accept_state
+                initial_state = new_state()
+                accept_state = new_state()
+                set_edge1(initial_state, nfa1.initial_state)
+                set_edge1(nfa1.accept_state, nfa1.initial_state)
+                set_edge2(nfa1.accept_state, accept_state)
                 nfa_stack.append(NFA(initial_state, accept_state))
 
             case "?":
                 if not nfa_stack:
                     raise InvalidRegexError("Invalid regex: ? operator with no operand")
 
+                # The operand's accept state is reused, so nested optionals such as
+                # the tail of x{0,n} all skip to one shared exit instead of a chain
                 nfa1 = nfa_stack.pop()
-                initial_state = State()
-                accept_state = State()
-                initial_state.edge1 = nfa1.initial_state
-                initial_state.edge2 = accept_state
-                nfa1.accept_state.edge1 = accept_state
-                nfa_stack.append(NFA(initial_state, accept_state))
+                initial_state = new_state()
+                set_edge1(initial_state, nfa1.initial_state)
+                set_edge2(initial_state, nfa1.accept_state)
+                nfa_stack.append(NFA(initial_state, nfa1.accept_state))
 
             case "(" | ")":
                 raise InvalidRegexError("Parentheses should not appear in postfix notation.")
 
             case _:
-                # Literal character
-                initial_state = State(character)
-                accept_state = State()
-                initial_state.edge1 = accept_state
+                # Literal character or character class
+                initial_state = new_state(character)
+                accept_state = new_state()
+                set_edge1(initial_state, accept_state)
                 nfa_stack.append(NFA(initial_state, accept_state))
 
     if len(nfa_stack) != 1:
@@ -139,46 +185,13 @@ def compile_regex(postfix):
             f"Invalid regex: too many operands left on stack ({len(nfa_stack)})"
         )
 
-    return nfa_stack.pop()
+    return builder.finish(nfa_stack.pop())
 
 
 def match_regex(infix, string):
     """
-    Match a string against a regex pattern
+    Match a string against a regex pattern.
+    Kept here for existing imports, see pattern.match_regex.
     """
-    # Convert infix to postfix
-    postfix = shunt(infix)
-
-    # Handle empty regex
-    if not postfix:
-        if string == "":
-            return True
-        raise EmptyRegexError("The provided regex is empty.")
-
-    # Build the NFA
-    nfa_result = compile_regex(postfix)
-
-    # Start with the initial state and follow all epsilon transitions
-    current_states = follow_es(nfa_result.initial_state)
-
-    # Process each character in the string
-    for character in string:
-        next_states = set()
-
-        # For each current state
-        for state in current_states:
-            # If this state has a matching label
-            if state.label == character:
-                # Add states reachable through epsilon transitions after consuming the character
-                if state.edge1:
-                    next_states.update(follow_es(state.edge1))
-
-        # Update current states
-        current_states = next_states
-
-        # If we have no valid states, matching fails
-        if not current_states:
-            return False
-
-    # Check if any current state is an accept state
-    return nfa_result.accept_state in current_states
+    # The pattern module is built on this one, so it is only imported when called
+    return import_module(".pattern", __package__).match_regex(infix, string)
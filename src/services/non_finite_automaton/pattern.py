@@ -0,0 +1,347 @@
+"""
+This file defines a compiled regex pattern, so that a regex can be compiled once
+and then matched against many strings without rebuilding the NFA.
+"""
+
+from typing import Iterator, Optional, Tuple, Union
+from src.services.postfix.postfix import shunting_yard as shunt
+from src.services.deterministic_finite_automaton.dfa import DFA, DEFAULT_MAX_STATES
+from src.services.deterministic_finite_automaton.exceptions import DFAStateLimitError
+from src.services.deterministic_finite_automaton.lazy_dfa import LazyDFA
+from src.services.regex_parser import ast_postfix, optimize, parse_regex
+from .cache import CacheInfo, PatternCache
+from .exceptions import EmptyRegexError
+from .array_nfa import ArrayBuilder, ArrayNFA
+from .byte_nfa import BYTES_TYPES, BytesLike, as_byte_view, byte_automaton
+from .glushkov import BitParallelGlushkov
+from .indexed_nfa import IndexedNFA
+from .literals import choose_prefilter
+from .nfa import compile_regex
+from .pike_vm import PikeVM
+from .reduction import reduce_nfa
+from .simulation import ThompsonSimulation
+
+
+def dfa_or_pike_vm(nfa, max_states: int = DEFAULT_MAX_STATES):
+    """
+    Build a table-driven DFA for the NFA, falling back to the Pike VM
+    when the DFA would have more than max_states states.
+    """
+    try:
+        return DFA.from_nfa(nfa, max_states=max_states)
+    except DFAStateLimitError:
+        return PikeVM(nfa)
+
+
+# Engines a pattern can be matched with, by name
+ENGINES = {
+    "auto": dfa_or_pike_vm,
+    "thompson": ThompsonSimulation,
+    "pike_vm": PikeVM,
+    "lazy_dfa": LazyDFA,
+    "dfa": DFA.from_nfa,
+    "glushkov": BitParallelGlushkov.from_nfa,
+}
+
+DEFAULT_ENGINE = "auto"
+
+# Regex syntaxes a pattern can be written in: the course syntax with "." as the
+# concatenation operator, or the usual Python syntax parsed into a syntax tree
+SYNTAXES = ("simple", "python")
+
+
+class Pattern:
+    """
+    A compiled regex pattern.
+
+    Holds the NFA built from the pattern and everything derived from it,
+    so matching a string does not repeat the shunting yard or the compilation.
+
+    Attributes:
+        pattern: The infix regex the pattern was compiled from.
+        syntax: The syntax the regex is written in, one of SYNTAXES.
+        postfix: The postfix form of the regex, a string for the simple syntax
+            and the list of postfix tokens of the syntax tree for the Python syntax.
+        nfa: The compiled NFA, reduced unless the pattern was compiled with reduce=False.
+        automaton: The indexed NFA with precomputed epsilon closures, shared by the engines.
+            For a compact pattern this is an ArrayNFA, which is then also the nfa.
+        engine: The name of the engine used for matching.
+        matcher: The engine instance built from the NFA.
+        prefilter: The literal prefilter used by search, or None if no literal is required.
+        options: The engine options the matcher was built with.
+        reduce: Whether the compiled NFA was reduced, see reduce_nfa.
+
+    Every method also takes bytes, bytearray or memoryview input. It is matched
+    by the same engine built on the byte-level form of the NFA, where non-ASCII
+    labels stand for their UTF-8 bytes, and spans are then byte offsets.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        infix: str,
+        engine: str = DEFAULT_ENGINE,
+        *,
+        compact: bool = False,
+        prefilter: bool = True,
+        syntax: str = "simple",
+        reduce: bool = True,
+        **options,
+    ):
+        """
+        Compile an infix regex into a pattern.
+
+        Args:
+            infix (str): The regex in infix notation.
+            engine (str): The matching engine, one of ENGINES.
+            compact (bool): Compile straight into an array-backed NFA instead of
+                linked State objects. Uses far less memory on large patterns.
+            prefilter (bool): Skip ahead to literals every match must contain,
+                if the pattern has them.
+            syntax (str): "simple" for the syntax with explicit "." concatenation,
+                or "python" for the usual syntax, see parse_regex. A regex in
+                Python syntax is optimized as a syntax tree before it is compiled.
+            reduce (bool): Contract epsilon chains and merge equivalent states of
+                the compiled NFA, so every engine runs on fewer states.
+            **options: Passed on to the engine, e.g. max_states for "dfa" and "auto".
+
+        Raises:
+            EmptyRegexError: If the regex is empty.
+            InvalidRegexError: If the regex cannot be compiled.
+            ValueError: If the engine or the syntax is unknown.
+            DFAStateLimitError: If the "dfa" engine would exceed its state limit.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}. Expected one of {', '.join(ENGINES)}.")
+
+        if syntax not in SYNTAXES:
+            raise ValueError(f"Unknown syntax: {syntax}. Expected one of {', '.join(SYNTAXES)}.")
+
+        self.pattern = infix
+        self.syntax = syntax
+        if syntax == "python":
+            self.postfix = ast_postfix(optimize(parse_regex(infix)))
+        else:
+            self.postfix = shunt(infix)
+
+        # Handle empty regex
+        if not self.postfix:
+            raise EmptyRegexError("The provided regex is empty.")
+
+        self.reduce = reduce
+        if compact:
+            automaton = ArrayNFA.from_postfix(self.postfix)
+            self.__nfa = self.automaton = (
+                reduce_nfa(automaton, ArrayBuilder()) if reduce else automaton
+            )
+        else:
+            self.__nfa = self.__compile()
+            self.automaton = IndexedNFA.from_nfa(self.__nfa)
+        self.engine = engine
+        self.options = options
+        self.matcher = ENGINES[engine](self.automaton, **options)
+        self.prefilter = choose_prefilter(self.postfix) if prefilter else None
+        self.__searcher = None
+        self.__byte_nfa = None
+        self.__byte_matcher = None
+        self.__byte_searcher = None
+
+    def __repr__(self):
+        syntax = "" if self.syntax == "simple" else f", syntax={self.syntax!r}"
+        return f"Pattern({self.pattern!r}, engine={self.engine!r}{syntax})"
+
+    def __getstate__(self):
+        # The linked NFA is only kept for reference and pickling it recurses once
+        # per state, so it is left out. The engines run on the automaton, so an
+        # unpickled pattern, e.g. in a worker process, matches without compiling
+        state = self.__dict__.copy()
+        if self.__nfa is not self.automaton:
+            state["_Pattern__nfa"] = None
+        return state
+
+    @property
+    def nfa(self):
+        """
+        The compiled NFA. An unpickled pattern compiles it again on first use.
+        """
+        if self.__nfa is None:
+            self.__nfa = self.__compile()
+        return self.__nfa
+
+    def __compile(self):
+        """
+        Compile the postfix into a linked NFA, reducing it if the pattern asks for it.
+        """
+        nfa = compile_regex(self.postfix)
+        return reduce_nfa(nfa) if self.reduce else nfa
+
+    @property
+    def byte_matcher(self):
+        """
+        The engine for bytes-like input, built on first use from the byte-level NFA.
+        """
+        if self.__byte_matcher is None:
+            self.__byte_matcher = ENGINES[self.engine](self.__bytes_nfa(), **self.options)
+        return self.__byte_matcher
+
+    @property
+    def byte_searcher(self) -> PikeVM:
+        """
+        The Pike VM used for unanchored search of bytes-like input, built on first use.
+        """
+        if self.__byte_searcher is None:
+            if isinstance(self.byte_matcher, PikeVM):
+                self.__byte_searcher = self.byte_matcher
+            else:
+                self.__byte_searcher = PikeVM(self.__bytes_nfa())
+        return self.__byte_searcher
+
+    def __bytes_nfa(self):
+        """
+        Return the byte-level form of the NFA, building it on first use.
+        """
+        if self.__byte_nfa is None:
+            self.__byte_nfa = byte_automaton(self.automaton)
+        return self.__byte_nfa
+
+    def fullmatch(self, string: Union[str, BytesLike]) -> bool:
+        """
+        Check whether the whole string matches the pattern.
+
+        Returns:
+            bool: True if the string matches, False otherwise.
+        """
+        if isinstance(string, BYTES_TYPES):
+            return self.byte_matcher.fullmatch(as_byte_view(string))
+        return self.matcher.fullmatch(string)
+
+    def match(self, string: Union[str, BytesLike]) -> Optional[Tuple[int, int]]:
+        """
+        Match the pattern at the beginning of the string.
+
+        Returns:
+            tuple: The (start, end) span of the longest match, or None.
+        """
+        if isinstance(string, BYTES_TYPES):
+            end = self.byte_matcher.longest_match(as_byte_view(string), 0)
+        else:
+            end = self.matcher.longest_match(string, 0)
+        return None if end is None else (0, end)
+
+    @property
+    def searcher(self) -> PikeVM:
+        """
+        The Pike VM used for unanchored search, built on first use.
+        """
+        if self.__searcher is None:
+            if isinstance(self.matcher, PikeVM):
+                self.__searcher = self.matcher
+            else:
+                self.__searcher = PikeVM(self.automaton)
+        return self.__searcher
+
+    def search(self, string: Union[str, BytesLike], pos: int = 0) -> Optional[Tuple[int, int]]:
+        """
+        Find the leftmost longest match of the pattern at or after pos
+        with a single pass over the string.
+
+        Returns:
+            tuple: The (start, end) span of the match, or None.
+        """
+        if isinstance(string, BYTES_TYPES):
+            string = as_byte_view(string)
+            if self.prefilter is not None:
+                return self.prefilter.search_bytes(self, string, pos)
+            return self.byte_searcher.search(string, pos)
+        if self.prefilter is not None:
+            return self.prefilter.search(self, string, pos)
+        return self.searcher.search(string, pos)
+
+    def finditer(self, string: Union[str, BytesLike]) -> Iterator[Tuple[int, int]]:
+        """
+        Lazily yield the spans of all non-overlapping leftmost longest matches.
+        After an empty match the next search starts one character later.
+
+        Yields:
+            tuple: The (start, end) span of each match.
+        """
+        if isinstance(string, memoryview):
+            string = as_byte_view(string)
+        pos = 0
+        while pos <= len(string):
+            span = self.search(string, pos)
+            if span is None:
+                return
+            yield span
+            start, end = span
+            pos = end if end > start else end + 1
+
+
+def compile_pattern(  # pylint: disable=too-many-arguments
+    infix: str,
+    engine: str = DEFAULT_ENGINE,
+    *,
+    compact: bool = False,
+    prefilter: bool = True,
+    syntax: str = "simple",
+    reduce: bool = True,
+    **options,
+) -> Pattern:
+    """
+    Compile an infix regex into a reusable Pattern matched with the given engine.
+    """
+    return Pattern(
+        infix,
+        engine,
+        compact=compact,
+        prefilter=prefilter,
+        syntax=syntax,
+        reduce=reduce,
+        **options,
+    )
+
+
+# Process-wide cache used by match_regex
+_pattern_cache = PatternCache(Pattern)
+
+
+def cached_pattern(infix: str) -> Pattern:
+    """
+    Return the compiled Pattern for an infix regex from the process-wide cache.
+    """
+    return _pattern_cache.get(infix)
+
+
+def cache_info() -> CacheInfo:
+    """
+    Return the hit, miss and eviction counters of the process-wide pattern cache.
+    """
+    return _pattern_cache.info()
+
+
+def configure_cache(maxsize: int) -> None:
+    """
+    Set how many compiled patterns the process-wide cache keeps. Zero disables caching.
+    """
+    _pattern_cache.configure(maxsize)
+
+
+def clear_cache() -> None:
+    """
+    Empty the process-wide pattern cache and reset its counters.
+    """
+    _pattern_cache.clear()
+
+
+def match_regex(infix, string):
+    """
+    Match a string against a regex pattern
+    """
+    try:
+        pattern = cached_pattern(infix)
+    except EmptyRegexError:
+        # An empty regex only matches the empty string
+        if len(string) == 0:
+            return True
+        raise
+
+    return pattern.fullmatch(string)
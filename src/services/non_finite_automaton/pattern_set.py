@@ -0,0 +1,248 @@
+"""
+This file defines a set of patterns compiled into one union automaton. The
+patterns are joined with the same alternation construction as '|', and each
+accept state is tagged with the id of its pattern, so a single pass over a
+string tells which of the patterns match it.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from src.services.postfix.postfix import shunting_yard as shunt
+from src.services.deterministic_finite_automaton.lazy_dfa import DEFAULT_CACHE_STATES
+from .aho_corasick import AhoCorasick
+from .array_nfa import ArrayBuilder
+from .char_class import match_labels
+from .exceptions import EmptyRegexError
+from .indexed_nfa import NO_EDGE, EpsilonClosures
+from .literals import required_alternatives
+from .nfa import NFA, compile_regex
+
+
+class FragmentBuilder(ArrayBuilder):
+    """
+    Builds several NFAs into the same arrays. finish returns the fragment as it
+    is, so more patterns can be compiled with the same builder.
+    """
+
+    def finish(self, nfa: NFA) -> NFA:
+        """
+        Return the fragment with its initial and accept state ids.
+        """
+        return nfa
+
+
+class SetState:
+    """
+    A state of the pattern set's lazy DFA.
+
+    Attributes:
+        nfa_states: The set of NFA state ids this state stands for.
+        matches: Ids of the patterns whose accept state is in the set.
+        transitions: Cached transitions, character -> SetState.
+    """
+
+    __slots__ = ("nfa_states", "matches", "transitions")
+
+    def __init__(self, nfa_states: FrozenSet[int], matches: FrozenSet[int]):
+        self.nfa_states = nfa_states
+        self.matches = matches
+        self.transitions: Dict[str, "SetState"] = {}
+
+
+class PatternSet:
+    """
+    Matches a string against many patterns at once.
+
+    The union NFA is run as a lazily built DFA, so after warming up every
+    character costs one dict lookup however many patterns the set has. Anchored
+    methods use full match semantics like match_regex, search methods look for
+    a match anywhere in the string.
+
+    Attributes:
+        patterns: The infix patterns, a pattern's id is its index.
+        labels: labels[i] is the character or CharClass of state i, or None.
+        follow: follow[i] is the closure reached after state i consumes its character.
+        accepts: Maps the accept state of every pattern to the pattern's id.
+        initial: The epsilon closure of the union's initial state.
+        cache_states: Maximum number of DFA states kept before the cache is flushed.
+        flushes: How many times the cache has been flushed.
+        prefilter: Aho-Corasick automaton of literals one of which every match of
+            every pattern contains, or None if some pattern needs no literal.
+    """
+
+    def __init__(
+        self,
+        patterns: Iterable[str],
+        cache_states: int = DEFAULT_CACHE_STATES,
+        prefilter: bool = True,
+    ):
+        self.patterns: List[str] = list(patterns)
+        self.cache_states = cache_states
+        self.flushes = 0
+
+        builder = FragmentBuilder()
+        fragments = []
+        literals: Optional[Set[str]] = set() if prefilter and self.patterns else None
+        for infix in self.patterns:
+            postfix = shunt(infix)
+            if not postfix:
+                raise EmptyRegexError(f"Pattern {len(fragments)} is empty.")
+            fragments.append(compile_regex(postfix, builder))
+            if literals is not None:
+                alternatives = required_alternatives(postfix)
+                literals = None if alternatives is None else literals | alternatives
+        self.prefilter = None if literals is None else AhoCorasick(sorted(literals))
+
+        # Join the fragments with a chain of split states, as '|' does
+        start = NO_EDGE
+        for fragment in reversed(fragments):
+            if start == NO_EDGE:
+                start = fragment.initial_state
+                continue
+            split = builder.new_state()
+            builder.set_edge1(split, fragment.initial_state)
+            builder.set_edge2(split, start)
+            start = split
+
+        self.accepts: Dict[int, int] = {
+            fragment.accept_state: pattern_id for pattern_id, fragment in enumerate(fragments)
+        }
+        self.labels: List[Optional[str]] = [
+            builder.label(state) for state in range(len(builder.labels))
+        ]
+        self.__match_labels = match_labels(self.labels)
+        labels = self.labels
+        closure = EpsilonClosures(
+            builder.edge1, builder.edge2, self.accepts, lambda state: labels[state] is None
+        ).closure
+        self.initial = closure(start) if fragments else ()
+        self.follow: List[Tuple[int, ...]] = [
+            () if label is None else closure(builder.edge1[state])
+            for state, label in enumerate(labels)
+        ]
+
+        self.__anchored: Dict[FrozenSet[int], SetState] = {}
+        self.__unanchored: Dict[FrozenSet[int], SetState] = {}
+        self.__start = self.__intern(frozenset(self.initial), self.__anchored)
+        self.__search_start = self.__intern(frozenset(self.initial), self.__unanchored)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def __getstate__(self):
+        # The DFA caches link states in long chains, so they are left out and rebuilt lazily
+        state = self.__dict__.copy()
+        for name in ("anchored", "unanchored", "start", "search_start"):
+            del state[f"_PatternSet__{name}"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__anchored = {}
+        self.__unanchored = {}
+        self.__start = self.__intern(frozenset(self.initial), self.__anchored)
+        self.__search_start = self.__intern(frozenset(self.initial), self.__unanchored)
+
+    @property
+    def state_count(self) -> int:
+        """
+        Number of states in the union NFA.
+        """
+        return len(self.labels)
+
+    def __intern(self, nfa_states: FrozenSet[int], states: Dict) -> SetState:
+        """
+        Return the DFA state for a set of NFA states, creating it if needed.
+        """
+        state = states.get(nfa_states)
+        if state is None:
+            accepts = self.accepts
+            matches = frozenset(accepts[nfa] for nfa in nfa_states if nfa in accepts)
+            state = SetState(nfa_states, matches)
+            states[nfa_states] = state
+        return state
+
+    def __next_state(self, state: SetState, character: str, anchored: bool) -> SetState:
+        """
+        Compute and cache the transition of a DFA state on a character.
+        A search adds the initial closure to every state, so a match may start anywhere.
+        """
+        labels = self.__match_labels
+        follow = self.follow
+        next_states = set() if anchored else set(self.initial)
+        for nfa_state in state.nfa_states:
+            if character in labels[nfa_state]:
+                next_states.update(follow[nfa_state])
+
+        states = self.__anchored if anchored else self.__unanchored
+        start = self.__start if anchored else self.__search_start
+        if len(states) >= self.cache_states:
+            self.flushes += 1
+            states.clear()
+            start.transitions.clear()
+            states[start.nfa_states] = start
+
+        target = self.__intern(frozenset(next_states), states)
+        state.transitions[character] = target
+        return target
+
+    def matches(self, string: str) -> Set[int]:
+        """
+        Return the ids of every pattern that matches the whole string.
+        """
+        state = self.__start
+        for character in string:
+            target = state.transitions.get(character)
+            if target is None:
+                target = self.__next_state(state, character, True)
+            state = target
+            if not state.nfa_states:
+                return set()
+        return set(state.matches)
+
+    def any_match(self, string: str) -> Optional[int]:
+        """
+        Return the smallest id of a pattern that matches the whole string, or None.
+        The pass stops as soon as no pattern can match any more.
+        """
+        matches = self.matches(string)
+        return min(matches) if matches else None
+
+    def search_matches(self, string: str) -> Set[int]:
+        """
+        Return the ids of every pattern that matches somewhere in the string.
+        The pass stops once every pattern has been found.
+        """
+        if self.prefilter is not None and self.prefilter.find(string) is None:
+            return set()
+        state = self.__search_start
+        found = set(state.matches)
+        total = len(self.patterns)
+        for character in string:
+            if len(found) == total:
+                break
+            target = state.transitions.get(character)
+            if target is None:
+                target = self.__next_state(state, character, False)
+            state = target
+            if state.matches:
+                found.update(state.matches)
+        return found
+
+    def search_any(self, string: str) -> Optional[int]:
+        """
+        Return the smallest id of a pattern among those found first in the string, or None.
+        The pass stops at the first position where some pattern matches.
+        """
+        if self.prefilter is not None and self.prefilter.find(string) is None:
+            return None
+        state = self.__search_start
+        if state.matches:
+            return min(state.matches)
+        for character in string:
+            target = state.transitions.get(character)
+            if target is None:
+                target = self.__next_state(state, character, False)
+            state = target
+            if state.matches:
+                return min(state.matches)
+        return None
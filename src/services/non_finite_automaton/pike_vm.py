@@ -0,0 +1,228 @@
+"""
+This file defines a Pike VM style NFA executor. The live threads of a search
+are kept in preallocated sparse sets indexed by state id, and the current and
+next lists are swapped between steps, so a step allocates no new containers and
+deduplicates states in O(1) without hashing. Anchored matches need no thread
+order, so they take the union of the closures in a built-in set instead.
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+from .char_class import match_labels
+from .indexed_nfa import as_indexed
+
+
+class SparseSet:
+    """
+    A set of integers in range(capacity) with O(1) add, membership and clear.
+
+    dense holds the members in insertion order, and the sparse list marks[x]
+    holds the generation in which x was last added. x is a member only if its
+    mark equals the current generation, so clearing the set just starts a new
+    generation and never touches the sparse list.
+
+    Attributes:
+        dense: The members in insertion order.
+        marks: Generation stamp of each value.
+        generation: The current generation.
+        values: Data attached to each member, e.g. the start position of a thread.
+    """
+
+    __slots__ = ("dense", "marks", "generation", "values")
+
+    def __init__(self, capacity: int):
+        self.dense: List[int] = []
+        self.marks = [0] * capacity
+        self.generation = 1
+        self.values = [0] * capacity
+
+    def __len__(self):
+        return len(self.dense)
+
+    def __contains__(self, value: int) -> bool:
+        return self.marks[value] == self.generation
+
+    def __iter__(self):
+        return iter(self.dense)
+
+    def add(self, value: int) -> None:
+        """
+        Add a value to the set if it is not already there.
+        """
+        if self.marks[value] != self.generation:
+            self.marks[value] = self.generation
+            self.dense.append(value)
+
+    def clear(self) -> None:
+        """
+        Remove every value from the set.
+        """
+        self.generation += 1
+        self.dense.clear()
+
+
+class PikeVM:
+    """
+    Matches strings by stepping a state list through the NFA, Pike VM style.
+
+    Attributes:
+        automaton: The indexed or array NFA the VM runs on.
+        labels: labels[i] is what state i matches, see match_labels, so state i
+            matches a character if character in labels[i].
+        follow: follow[i] is the closure reached after state i consumes its character.
+            Equal closures are the same tuple, so a step merges each of them once.
+    """
+
+    def __init__(self, nfa):
+        self.automaton = as_indexed(nfa)
+        automaton = self.automaton
+        self.labels: List = match_labels(
+            automaton.label(state) for state in range(automaton.state_count)
+        )
+        closures: Dict[Tuple[int, ...], Tuple[int, ...]] = {}
+        self.follow = [
+            closures.setdefault(closure, closure)
+            for closure in (
+                tuple(automaton.follow[state]) for state in range(automaton.state_count)
+            )
+        ]
+        self.__spare: List[Tuple[SparseSet, SparseSet]] = []
+
+    def __acquire(self) -> Tuple[SparseSet, SparseSet]:
+        """
+        Take a preallocated pair of state lists, creating one if none is free.
+        Each concurrent match gets its own pair, so the VM is safe to share.
+        """
+        try:
+            return self.__spare.pop()
+        except IndexError:
+            capacity = self.automaton.state_count
+            return SparseSet(capacity), SparseSet(capacity)
+
+    def __step(self, current: Set[int], character: str) -> Set[int]:
+        """
+        Return the union of the closures of the states of current that match the character.
+        """
+        labels = self.labels
+        follow = self.follow
+        following: Set[int] = set()
+        merged = None
+        for state in current:
+            if character in labels[state]:
+                closure = follow[state]
+                if closure is not merged:
+                    merged = closure
+                    following.update(closure)
+        return following
+
+    def advance(self, current: SparseSet, following: SparseSet, character: str, limit: int) -> None:
+        """
+        Move the threads of current that match the character into following.
+
+        Threads are kept in order of their start, so the earliest one wins
+        duplicates, and a closure just merged by an earlier thread is skipped.
+        Threads that started after limit are dropped.
+
+        Args:
+            current: The live threads, with their starts as values.
+            following: Receives the threads after the character.
+            character: The character to consume.
+            limit: The latest start a thread may have to be kept.
+        """
+        labels = self.labels
+        follow = self.follow
+        following.clear()
+        marks = following.marks
+        generation = following.generation
+        starts = current.values
+        following_starts = following.values
+        merged = None
+        for state in current.dense:
+            start = starts[state]
+            if start > limit:
+                # Later threads started no earlier
+                break
+            if character in labels[state] and follow[state] is not merged:
+                merged = follow[state]
+                for target in merged:
+                    if marks[target] != generation:
+                        marks[target] = generation
+                        following.dense.append(target)
+                        following_starts[target] = start
+
+    def fullmatch(self, string: str) -> bool:
+        """
+        Check whether the whole string is accepted by the NFA.
+        """
+        current = set(self.automaton.initial)
+        for character in string:
+            current = self.__step(current, character)
+            if not current:
+                return False
+        return self.automaton.accept in current
+
+    def longest_match(self, string: str, start: int) -> Optional[int]:
+        """
+        Find the end of the longest match starting at the given index.
+
+        Returns:
+            int: The end index of the longest match, or None if nothing matches.
+        """
+        accept = self.automaton.accept
+        current = set(self.automaton.initial)
+        end = start if accept in current else None
+        for i in range(start, len(string)):
+            current = self.__step(current, string[i])
+            if not current:
+                break
+            if accept in current:
+                end = i + 1
+        return end
+
+    def search(self, string: str, pos: int = 0) -> Optional[Tuple[int, int]]:
+        """
+        Find the leftmost longest match at or after pos in a single pass.
+
+        A new thread is started at every position until the first match is
+        found, as if the pattern were preceded by an implicit .* loop. Every
+        thread remembers where it started, and when two threads reach the same
+        state the one that started first wins. After a match is found, threads
+        that started later are dropped and the scan goes on only while an
+        earlier or equally early thread can still produce a longer match.
+
+        Returns:
+            tuple: The (start, end) span of the match, or None.
+        """
+        accept = self.automaton.accept
+        initial = self.automaton.initial
+        length = len(string)
+        best: Optional[Tuple[int, int]] = None
+        # Threads that started after the best match so far cannot beat it
+        limit = length
+
+        current, following = self.__acquire()
+        try:
+            current.clear()
+            i = pos
+            while True:
+                if best is None:
+                    # Seed a thread starting here; it started last, so it has the lowest priority
+                    marks = current.marks
+                    generation = current.generation
+                    for state in initial:
+                        if marks[state] != generation:
+                            marks[state] = generation
+                            current.dense.append(state)
+                            current.values[state] = i
+
+                if accept in current and current.values[accept] <= limit:
+                    limit = current.values[accept]
+                    best = (limit, i)
+
+                if i == length or (best is not None and not current.dense):
+                    return best
+
+                self.advance(current, following, string[i], limit)
+                current, following = following, current
+                i += 1
+        finally:
+            self.__spare.append((current, following))
@@ -0,0 +1,307 @@
+"""
+This file shrinks a compiled NFA before the engines are built on it.
+
+The Thompson construction in compile_regex creates two fresh states for every
+operator, so most of its states are epsilon states that only pass control on.
+Every state left in the automaton costs time in each engine and in the subset
+construction of the DFA, so the compiled graph is reduced by these passes:
+    - dead states, from which the accept state cannot be reached, are removed,
+    - chains of epsilon states with a single transition are contracted,
+    - states with the same label and the same successors are merged.
+
+States that cannot be reached from the initial state are dropped by every pass.
+"""
+
+from typing import Dict, List, NamedTuple, Tuple
+from .indexed_nfa import NO_EDGE, number_states
+from .nfa import NFA, StateBuilder
+
+
+class NFASize(NamedTuple):
+    """
+    The size of an NFA.
+
+    Attributes:
+        states: Number of states.
+        edges: Number of transitions.
+    """
+
+    states: int
+    edges: int
+
+
+class NFAReducer:
+    """
+    Runs the reduction passes on an NFA held as numbered states in plain lists.
+
+    Attributes:
+        labels: labels[i] is the character or class label of state i, or None.
+        edge1: edge1[i] is the id of the first transition of state i, or NO_EDGE.
+        edge2: edge2[i] is the id of the second transition of state i, or NO_EDGE.
+        start: The id of the initial state.
+        accept: The id of the accept state.
+        sizes: The size of the automaton after each pass, by pass name,
+            starting with the size it was compiled with.
+    """
+
+    def __init__(self, nfa):
+        """
+        Args:
+            nfa: A linked NFA, or a numbered one such as an IndexedNFA or an ArrayNFA.
+        """
+        if isinstance(nfa, NFA):
+            order, ids = number_states(nfa)
+            self.labels: List = [state.label for state in order]
+            self.edge1 = [NO_EDGE if state.edge1 is None else ids[state.edge1] for state in order]
+            self.edge2 = [NO_EDGE if state.edge2 is None else ids[state.edge2] for state in order]
+            self.start = 0
+            self.accept = ids[nfa.accept_state]
+        else:
+            self.labels = [nfa.label(state) for state in range(nfa.state_count)]
+            self.edge1 = list(nfa.edge1)
+            self.edge2 = list(nfa.edge2)
+            self.start = nfa.start
+            self.accept = nfa.accept
+        self.sizes: List[Tuple[str, NFASize]] = [("compiled", self.size)]
+
+    @property
+    def size(self) -> NFASize:
+        """
+        The current number of states and transitions.
+        """
+        edges = sum(edge != NO_EDGE for edge in self.edge1)
+        edges += sum(edge != NO_EDGE for edge in self.edge2)
+        return NFASize(len(self.labels), edges)
+
+    def run(self) -> "NFAReducer":
+        """
+        Run every pass once, in an order where each one leaves work for the next.
+        Merging can give an epsilon state two equal transitions, so chains are
+        contracted again after it.
+
+        Returns:
+            NFAReducer: The reducer itself.
+        """
+        self.remove_dead_states()
+        self.contract_epsilons()
+        self.merge_equivalent_states()
+        self.contract_epsilons()
+        return self
+
+    def remove_dead_states(self) -> None:
+        """
+        Remove the states from which the accept state cannot be reached,
+        and every transition into them.
+        """
+        labels = self.labels
+        edge1 = self.edge1
+        edge2 = self.edge2
+        predecessors: List[List[int]] = [[] for _ in labels]
+        for state, (first, second) in enumerate(zip(edge1, edge2)):
+            if first != NO_EDGE:
+                predecessors[first].append(state)
+            if second != NO_EDGE:
+                predecessors[second].append(state)
+
+        live = [False] * len(labels)
+        live[self.accept] = True
+        stack = [self.accept]
+        while stack:
+            for state in predecessors[stack.pop()]:
+                # A labelled state is only live through its one transition
+                if not live[state] and (labels[state] is None or live[edge1[state]]):
+                    live[state] = True
+                    stack.append(state)
+
+        for state in range(len(labels)):
+            if edge2[state] != NO_EDGE and not live[edge2[state]]:
+                edge2[state] = NO_EDGE
+            if edge1[state] != NO_EDGE and not live[edge1[state]]:
+                edge1[state], edge2[state] = edge2[state], NO_EDGE
+        if not live[self.start]:
+            # Nothing can match, so the initial state becomes an epsilon state of its own
+            self.start = len(labels)
+            labels.append(None)
+            edge1.append(NO_EDGE)
+            edge2.append(NO_EDGE)
+        self.__renumber()
+        self.sizes.append(("dead states", self.size))
+
+    def contract_epsilons(self) -> None:
+        """
+        Let every transition into a chain of epsilon states that have a single
+        transition point at the end of the chain, so the chain is skipped.
+        Repeats until no epsilon state is left with a single transition.
+        """
+        while True:
+            count = len(self.labels)
+            self.__contract()
+            if len(self.labels) == count:
+                break
+        self.sizes.append(("epsilon chains", self.size))
+
+    def __contract(self) -> None:
+        """
+        Contract the epsilon chains once and drop the states left unreachable.
+        """
+        labels = self.labels
+        edge1 = self.edge1
+        edge2 = self.edge2
+        accept = self.accept
+        targets = list(range(len(labels)))
+        resolved = [False] * len(labels)
+
+        def resolve(state: int) -> int:
+            """
+            Return the state at the end of the chain that starts at a state.
+            """
+            chain = []
+            seen = set()
+            while not resolved[state] and state not in seen:
+                if labels[state] is not None or state == accept or edge2[state] != NO_EDGE:
+                    break
+                if edge1[state] == NO_EDGE:
+                    break
+                chain.append(state)
+                seen.add(state)
+                state = edge1[state]
+            # A chain that runs in a circle ends at the state it closes on
+            end = targets[state]
+            for link in chain:
+                targets[link] = end
+                resolved[link] = True
+            resolved[state] = True
+            return end
+
+        for state, label in enumerate(labels):
+            if edge1[state] != NO_EDGE:
+                edge1[state] = resolve(edge1[state])
+            if edge2[state] != NO_EDGE:
+                edge2[state] = resolve(edge2[state])
+                if label is None and edge1[state] == edge2[state]:
+                    edge2[state] = NO_EDGE
+        self.start = resolve(self.start)
+        self.__renumber()
+
+    def merge_equivalent_states(self) -> None:
+        """
+        Merge states that have the same label and the same successors.
+
+        States are visited depth-first and each one is looked up after its
+        successors, keyed by its label and the merged ids of its successors, so
+        equal suffixes are merged from the accept state backwards in one pass.
+        Such states match the same strings from where they are, i.e. they are
+        bisimilar. States that are only bisimilar through a cycle are kept apart.
+        """
+        labels = self.labels
+        edge1 = self.edge1
+        edge2 = self.edge2
+        merged = list(range(len(labels)))
+        finished = [False] * len(labels)
+        keys: Dict[Tuple, int] = {}
+
+        def successors(state: int) -> Tuple[int, ...]:
+            """
+            Return the states a state has transitions to.
+            """
+            return tuple(edge for edge in (edge1[state], edge2[state]) if edge != NO_EDGE)
+
+        stack = [(self.start, successors(self.start))]
+        visited = {self.start}
+        while stack:
+            state, pending = stack[-1]
+            if pending:
+                stack[-1] = (state, pending[1:])
+                if pending[0] not in visited:
+                    visited.add(pending[0])
+                    stack.append((pending[0], successors(pending[0])))
+                continue
+            stack.pop()
+            finished[state] = True
+            if state == self.accept:
+                continue
+            # A successor still on the stack is reached through a cycle and keeps its own id
+            first, second = (
+                merged[edge] if edge != NO_EDGE and finished[edge] else edge
+                for edge in (edge1[state], edge2[state])
+            )
+            if labels[state] is None and second != NO_EDGE:
+                first, second = sorted((first, second))
+            merged[state] = keys.setdefault((labels[state], first, second), state)
+
+        for state, label in enumerate(labels):
+            if edge1[state] != NO_EDGE:
+                edge1[state] = merged[edge1[state]]
+            if edge2[state] != NO_EDGE:
+                edge2[state] = merged[edge2[state]]
+                if label is None and edge1[state] == edge2[state]:
+                    edge2[state] = NO_EDGE
+        self.start = merged[self.start]
+        self.__renumber()
+        self.sizes.append(("equivalent states", self.size))
+
+    def __renumber(self) -> None:
+        """
+        Keep only the states reachable from the initial state, numbered depth-first.
+        """
+        ids = {self.start: 0}
+        order = [self.start]
+        stack = [self.start]
+        while stack:
+            state = stack.pop()
+            for edge in (self.edge2[state], self.edge1[state]):
+                if edge != NO_EDGE and edge not in ids:
+                    ids[edge] = len(order)
+                    order.append(edge)
+                    stack.append(edge)
+        if self.accept not in ids:
+            ids[self.accept] = len(order)
+            order.append(self.accept)
+
+        edge1 = self.edge1
+        edge2 = self.edge2
+        self.labels = [self.labels[state] for state in order]
+        self.edge1 = [NO_EDGE if edge1[state] == NO_EDGE else ids[edge1[state]] for state in order]
+        self.edge2 = [NO_EDGE if edge2[state] == NO_EDGE else ids[edge2[state]] for state in order]
+        self.start = 0
+        self.accept = ids[self.accept]
+
+    def build(self, builder=None):
+        """
+        Create the reduced automaton with a builder, by default as linked State objects.
+        """
+        if builder is None:
+            builder = StateBuilder()
+        states = [builder.new_state(label) for label in self.labels]
+        for state, (first, second) in enumerate(zip(self.edge1, self.edge2)):
+            if first != NO_EDGE:
+                builder.set_edge1(states[state], states[first])
+            if second != NO_EDGE:
+                builder.set_edge2(states[state], states[second])
+        return builder.finish(NFA(states[self.start], states[self.accept]))
+
+
+def reduce_nfa(nfa, builder=None):
+    """
+    Return an NFA that matches the same strings as the given one with fewer states.
+
+    Args:
+        nfa: A linked NFA, an IndexedNFA or an ArrayNFA.
+        builder: The builder the reduced automaton is created with, by default
+            a StateBuilder, so the result is a linked NFA.
+    """
+    return NFAReducer(nfa).run().build(builder)
+
+
+def nfa_size(nfa) -> NFASize:
+    """
+    Return the number of states and transitions of a linked or numbered NFA.
+    """
+    return NFAReducer(nfa).size
+
+
+def reduction_report(nfa) -> List[Tuple[str, NFASize]]:
+    """
+    Run every pass on an NFA and return its size after each of them.
+    """
+    return NFAReducer(nfa).run().sizes
@@ -0,0 +1,59 @@
+"""
+This file defines the Thompson simulation of an NFA, which keeps the set of
+live NFA states and advances all of them one character at a time.
+"""
+
+from typing import Optional
+from .indexed_nfa import IndexedNFA, as_indexed
+
+
+class ThompsonSimulation:
+    """
+    Matches strings by simulating an NFA state set directly.
+
+    The simulation runs on the indexed form of the NFA, so each step is a union
+    of precomputed epsilon closures and no epsilon edge is followed at match time.
+
+    Attributes:
+        automaton: The indexed NFA being simulated.
+    """
+
+    def __init__(self, nfa):
+        self.automaton: IndexedNFA = as_indexed(nfa)
+
+    def fullmatch(self, string: str) -> bool:
+        """
+        Check whether the whole string is accepted by the NFA.
+        """
+        automaton = self.automaton
+        current_states = automaton.initial
+
+        for character in string:
+            current_states = automaton.step(current_states, character)
+
+            # If we have no valid states, matching fails
+            if not current_states:
+                return False
+
+        return automaton.accept in current_states
+
+    def longest_match(self, string: str, start: int) -> Optional[int]:
+        """
+        Find the end of the longest match starting at the given index.
+
+        Returns:
+            int: The end index of the longest match, or None if nothing matches.
+        """
+        automaton = self.automaton
+        accept = automaton.accept
+        current_states = automaton.initial
+        end = start if accept in current_states else None
+
+        for i in range(start, len(string)):
+            current_states = automaton.step(current_states, string[i])
+            if not current_states:
+                break
+            if accept in current_states:
+                end = i + 1
+
+        return end
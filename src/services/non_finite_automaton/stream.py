@@ -0,0 +1,279 @@
+"""
+This file defines a streaming matcher that reads its input in chunks. The live
+NFA threads are kept between chunks, so matches may span chunk boundaries, and
+the whole matcher state can be checkpointed and restored.
+"""
+
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+from .array_nfa import ArrayNFA
+from .pattern import DEFAULT_ENGINE, Pattern, compile_pattern
+from .pike_vm import SparseSet
+
+
+class StreamMatcher:
+    """
+    Finds the matches of a pattern in text that arrives in chunks.
+
+    Unanchored matchers report the same non-overlapping leftmost longest spans
+    as Pattern.finditer on the joined text. Anchored matchers only look for the
+    longest match starting at offset 0. Spans use offsets into the whole stream.
+
+    Threads only remember the offset they started at, so the text before them
+    is never read again. The only text kept is what the scan could go back to,
+    i.e. from the end of a pending match or else the current position. It is
+    kept as the list of chunks it arrived in, so feeding never copies it, and
+    whole chunks are dropped once they are passed.
+
+    Attributes:
+        pattern: The compiled pattern.
+        anchored: Whether matches must start at offset 0.
+        position: Offset of the next character to process.
+    """
+
+    def __init__(self, pattern: Pattern, anchored: bool = False):
+        self.pattern = pattern
+        self.anchored = anchored
+        self.position = 0
+        # The kept chunks, and the stream offset each of them starts at
+        self.__chunks: List[str] = []
+        self.__offsets: List[int] = []
+        self.__end = 0
+        self.__best: Optional[Tuple[int, int]] = None
+        self.__finished = False
+
+        self.__vm = pattern.searcher
+        self.__initial = pattern.automaton.initial
+        self.__accept = pattern.automaton.accept
+        capacity = pattern.automaton.state_count
+        self.__current = SparseSet(capacity)
+        self.__following = SparseSet(capacity)
+
+    def feed(self, chunk: str) -> List[Tuple[int, int]]:
+        """
+        Process the next chunk of the stream.
+
+        Returns:
+            list: The (start, end) spans of matches that are now complete.
+
+        Raises:
+            ValueError: If the matcher has already been finished.
+        """
+        if self.__finished:
+            raise ValueError("Cannot feed a finished stream matcher.")
+        if chunk:
+            self.__chunks.append(chunk)
+            self.__offsets.append(self.__end)
+            self.__end += len(chunk)
+        spans: List[Tuple[int, int]] = []
+        self.__run(spans)
+        self.__trim()
+        return spans
+
+    def finish(self) -> List[Tuple[int, int]]:
+        """
+        Mark the end of the stream and report the matches still pending.
+
+        Returns:
+            list: The (start, end) spans of the remaining matches.
+        """
+        spans: List[Tuple[int, int]] = []
+        if self.__finished:
+            return spans
+        self.__finished = True
+
+        while True:
+            self.__run(spans)
+            self.__at_position()
+            if self.__best is None:
+                break
+            restart = self.__emit(spans)
+            if restart is None or restart > self.__end:
+                break
+        return spans
+
+    def is_dead(self) -> bool:
+        """
+        Tell whether no further match can be found, so the rest of the stream can be skipped.
+        Only an anchored matcher can die, an unanchored one may always match later on.
+        """
+        if not self.anchored:
+            return False
+        return self.position > 0 and not self.__current.dense
+
+    def accepts(self) -> bool:
+        """
+        Tell whether the text fed so far is matched as a whole by an anchored matcher.
+        """
+        if not self.anchored:
+            return False
+        if self.position == 0:
+            return self.__accept in self.__initial
+        return self.__accept in self.__current
+
+    def __run(self, spans: List[Tuple[int, int]]) -> None:
+        """
+        Process every buffered character from the current position.
+        """
+        end = self.__end
+        while True:
+            if not self.__scan():
+                # Report a match that ended with the input as soon as it cannot grow
+                if self.__best is None:
+                    return
+                self.__at_position()
+                if self.__current.dense:
+                    return
+
+            if self.__emit(spans) is None:
+                # An anchored matcher is done after its match
+                self.position = end
+                return
+
+    def __scan(self) -> bool:
+        """
+        Consume the kept characters from the current position on.
+
+        Returns:
+            bool: True if the scan stopped at a match no live thread can extend.
+        """
+        chunks = self.__chunks
+        offsets = self.__offsets
+        while self.position < self.__end:
+            # The scan restarts behind the position after a match, so find its chunk
+            index = bisect_right(offsets, self.position) - 1
+            chunk = chunks[index]
+            for i in range(self.position - offsets[index], len(chunk)):
+                self.__at_position()
+                if self.__best is not None and not self.__current.dense:
+                    return True
+                self.__consume(chunk[i])
+        return False
+
+    def __at_position(self) -> None:
+        """
+        Seed a new thread at the current position and record a match if a thread accepts.
+        """
+        current = self.__current
+        position = self.position
+        if self.__best is None and (not self.anchored or position == 0):
+            marks = current.marks
+            generation = current.generation
+            for state in self.__initial:
+                if marks[state] != generation:
+                    marks[state] = generation
+                    current.dense.append(state)
+                    current.values[state] = position
+
+        if self.__accept in current:
+            start = current.values[self.__accept]
+            if self.__best is None or start <= self.__best[0]:
+                self.__best = (start, position)
+
+    def __consume(self, character: str) -> None:
+        """
+        Advance every live thread over one character.
+        """
+        current = self.__current
+        following = self.__following
+        # Threads that started after a pending match cannot beat it
+        limit = self.position if self.__best is None else self.__best[0]
+        self.__vm.advance(current, following, character, limit)
+        self.__current, self.__following = following, current
+        self.position += 1
+
+    def __emit(self, spans: List[Tuple[int, int]]) -> Optional[int]:
+        """
+        Report the best match and restart the search right after it.
+
+        Returns:
+            int: The position the search restarts from, or None for an anchored matcher.
+        """
+        start, end = self.__best
+        spans.append((start, end))
+        self.__best = None
+        self.__current.clear()
+        if self.anchored:
+            return None
+        self.position = end if end > start else end + 1
+        return self.position
+
+    def __trim(self) -> None:
+        """
+        Drop the chunks the scan cannot go back to any more.
+        """
+        keep = self.position
+        if self.__best is not None:
+            keep = min(keep, self.__best[1])
+        offsets = self.__offsets
+        drop = bisect_right(offsets, keep) - 1
+        if drop > 0:
+            del self.__chunks[:drop]
+            del offsets[:drop]
+
+    def checkpoint(self) -> dict:
+        """
+        Return the matcher state as plain data that can be stored as JSON.
+        """
+        current = self.__current
+        pattern = self.pattern
+        return {
+            "pattern": pattern.pattern,
+            "engine": pattern.engine,
+            "compact": isinstance(pattern.automaton, ArrayNFA),
+            "prefilter": pattern.prefilter is not None,
+            "syntax": pattern.syntax,
+            "reduce": pattern.reduce,
+            "options": dict(pattern.options),
+            "state_count": pattern.automaton.state_count,
+            "anchored": self.anchored,
+            "position": self.position,
+            "buffer_start": self.__offsets[0] if self.__offsets else self.__end,
+            "buffer": "".join(self.__chunks),
+            "states": list(current.dense),
+            "starts": [current.values[state] for state in current.dense],
+            "best": None if self.__best is None else list(self.__best),
+            "finished": self.__finished,
+        }
+
+    @classmethod
+    def restore(cls, checkpoint: dict, pattern: Optional[Pattern] = None) -> "StreamMatcher":
+        """
+        Rebuild a matcher from a checkpoint, compiling its pattern unless one is given.
+        The pattern is compiled with the options it was compiled with before.
+
+        Raises:
+            ValueError: If the pattern does not match the one the checkpoint was made with.
+        """
+        if pattern is None:
+            pattern = compile_pattern(
+                checkpoint["pattern"],
+                checkpoint.get("engine", DEFAULT_ENGINE),
+                compact=checkpoint["compact"],
+                prefilter=checkpoint.get("prefilter", True),
+                syntax=checkpoint.get("syntax", "simple"),
+                reduce=checkpoint.get("reduce", True),
+                **checkpoint.get("options", {}),
+            )
+        if pattern.automaton.state_count != checkpoint["state_count"]:
+            raise ValueError("Checkpoint was made with a different pattern.")
+
+        matcher = cls(pattern, checkpoint["anchored"])
+        matcher._load(checkpoint)
+        return matcher
+
+    def _load(self, checkpoint: dict) -> None:
+        """
+        Set the position, kept text and live threads of a fresh matcher from a checkpoint.
+        """
+        self.position = checkpoint["position"]
+        if checkpoint["buffer"]:
+            self.__chunks.append(checkpoint["buffer"])
+            self.__offsets.append(checkpoint["buffer_start"])
+        self.__end = checkpoint["buffer_start"] + len(checkpoint["buffer"])
+        self.__best = None if checkpoint["best"] is None else tuple(checkpoint["best"])
+        self.__finished = checkpoint["finished"]
+        current = self.__current
+        for state, start in zip(checkpoint["states"], checkpoint["starts"]):
+            current.add(state)
+            current.values[state] = start
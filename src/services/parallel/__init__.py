@@ -0,0 +1,4 @@
+"""creating an import tree."""
+
+from .batch import DEFAULT_CHUNKSIZE, match_many, match_many_set
+from .sharded import MIN_SHARD_SIZE, finditer_file_parallel, grep_file_parallel
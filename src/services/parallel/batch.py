@@ -0,0 +1,179 @@
+"""
+This file defines batch matching across processes. Pure Python matching holds
+the GIL, so strings are matched in a pool of worker processes instead. The
+compiled pattern is sent to every worker once when the worker starts, and the
+tasks only carry chunks of strings.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from src.services.non_finite_automaton import Pattern, PatternSet, cached_pattern
+
+# Default number of strings sent to a worker per task
+DEFAULT_CHUNKSIZE = 256
+
+# Tasks kept in flight per worker, so the input is read lazily but workers never wait
+TASKS_PER_WORKER = 2
+
+# State of the worker process, "match" is the match function set by _init_worker
+_WORKER: Dict[str, Callable] = {}
+
+
+def _init_worker(match: Callable) -> None:
+    """
+    Store the match function in a worker process. It is unpickled once per worker.
+    """
+    _WORKER["match"] = match
+
+
+def _match_chunk(strings: List[str]) -> list:
+    """
+    Match a chunk of strings in a worker process.
+    """
+    match = _WORKER["match"]
+    return [match(string) for string in strings]
+
+
+def _chunks(strings: Iterable[str], chunksize: int) -> Iterator[List[str]]:
+    """
+    Split an iterable into lists of at most chunksize strings.
+    """
+    iterator = iter(strings)
+    while True:
+        chunk = list(islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _run(
+    match: Callable,
+    strings: Iterable[str],
+    workers: Optional[int],
+    chunksize: int,
+    ordered: bool,
+) -> Iterator:
+    """
+    Check the arguments and return a generator of the results.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1.")
+    return _results(match, strings, workers or os.cpu_count() or 1, chunksize, ordered)
+
+
+def _results(
+    match: Callable,
+    strings: Iterable[str],
+    workers: int,
+    chunksize: int,
+    ordered: bool,
+) -> Iterator:
+    """
+    Match strings in a process pool and yield the results.
+
+    Yields:
+        The result of every string in input order, or (index, result) pairs in
+        completion order if ordered is False.
+    """
+    if workers == 1:
+        # A single worker gains nothing from a pool
+        for index, string in enumerate(strings):
+            yield match(string) if ordered else (index, match(string))
+        return
+
+    chunks = _chunks(strings, chunksize)
+    limit = workers * TASKS_PER_WORKER
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(match,)) as executor:
+        if ordered:
+            yield from _ordered_results(executor, chunks, limit)
+        else:
+            yield from _unordered_results(executor, enumerate(chunks), chunksize, limit)
+
+
+def _ordered_results(
+    executor: ProcessPoolExecutor, chunks: Iterator[List[str]], limit: int
+) -> Iterator:
+    """
+    Yield the results of the chunks in input order, with at most limit tasks in flight.
+    """
+    pending = deque(executor.submit(_match_chunk, chunk) for chunk in islice(chunks, limit))
+    while pending:
+        results = pending.popleft().result()
+        for chunk in islice(chunks, 1):
+            pending.append(executor.submit(_match_chunk, chunk))
+        yield from results
+
+
+def _unordered_results(
+    executor: ProcessPoolExecutor,
+    chunks: Iterator[Tuple[int, List[str]]],
+    chunksize: int,
+    limit: int,
+) -> Iterator[tuple]:
+    """
+    Yield (index, result) pairs of numbered chunks as soon as a chunk is done,
+    with at most limit tasks in flight.
+    """
+    # The index of the first string of each pending chunk
+    offsets = {}
+    for number, chunk in islice(chunks, limit):
+        offsets[executor.submit(_match_chunk, chunk)] = number * chunksize
+
+    while offsets:
+        done, _ = wait(offsets, return_when=FIRST_COMPLETED)
+        for future in done:
+            offset = offsets.pop(future)
+            for number, chunk in islice(chunks, 1):
+                offsets[executor.submit(_match_chunk, chunk)] = number * chunksize
+            yield from enumerate(future.result(), offset)
+
+
+def match_many(
+    pattern: Union[str, Pattern],
+    strings: Iterable[str],
+    workers: Optional[int] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    ordered: bool = True,
+) -> Iterator[Union[bool, Tuple[int, bool]]]:
+    """
+    Check which strings fully match a pattern, using a pool of processes.
+
+    Args:
+        pattern: An infix regex or a compiled pattern.
+        strings: The strings to match, read lazily.
+        workers: Number of worker processes, the number of CPUs by default.
+        chunksize: Number of strings sent to a worker per task.
+        ordered: Yield results in input order, or as (index, result) pairs as
+            soon as they are ready.
+
+    Yields:
+        bool: Whether each string matches, or (index, bool) pairs if not ordered.
+
+    Raises:
+        ValueError: If chunksize is less than 1.
+    """
+    if isinstance(pattern, str):
+        pattern = cached_pattern(pattern)
+    return _run(pattern.fullmatch, strings, workers, chunksize, ordered)
+
+
+def match_many_set(
+    pattern_set: PatternSet,
+    strings: Iterable[str],
+    workers: Optional[int] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    ordered: bool = True,
+) -> Iterator[Union[set, Tuple[int, set]]]:
+    """
+    Find the patterns of a set that fully match each string, using a pool of processes.
+
+    Takes the same arguments as match_many.
+
+    Yields:
+        set: The ids of the matching patterns of each string, or (index, set)
+            pairs if not ordered.
+    """
+    return _run(pattern_set.matches, strings, workers, chunksize, ordered)
@@ -0,0 +1,269 @@
+"""
+This file defines parallel scans of one large file. The file is split into
+byte ranges, every range is scanned in a worker process, and the results are
+stitched together in file order so they equal a sequential scan.
+"""
+
+import mmap
+import os
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from src.services.file_search import LineMatch, LineScanner
+from src.services.non_finite_automaton import Pattern, cached_pattern
+from src.services.non_finite_automaton.char_class import label_matches, utf8_width
+from src.services.non_finite_automaton.literals import analyze_literals
+
+# Shards per worker, more shards even out the work when matches are unevenly spread
+SHARDS_PER_WORKER = 4
+
+# Smallest shard, smaller ones cost more in process overhead than they save
+MIN_SHARD_SIZE = 1 << 20
+
+# State of the worker process, the "pattern" and its line "scanner", set by _init_worker
+_WORKER: Dict[str, Union[Pattern, LineScanner]] = {}
+
+
+def _init_worker(pattern: Pattern) -> None:
+    """
+    Store the compiled pattern in a worker process. It is unpickled once per worker.
+    """
+    _WORKER["pattern"] = pattern
+    _WORKER["scanner"] = LineScanner(pattern)
+
+
+@contextmanager
+def _map(path: str):
+    """
+    Map a whole file read-only. Only the pages that are read become resident.
+    An empty file can not be mapped, so empty bytes stand in for it.
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def _read(path: str, start: int, end: int) -> bytes:
+    """
+    Read the bytes from start to end of a file, or up to its end if it is shorter.
+    """
+    with _map(path) as data:
+        return data[start:end]
+
+
+def _grep_shard(path: str, start: int, end: int) -> Tuple[List[LineMatch], int]:
+    """
+    Scan the lines of one shard in a worker process.
+
+    Returns:
+        tuple: The matching lines, numbered from 1 within the shard, and the
+            number of lines in the shard.
+    """
+    with _map(path) as data:
+        scan = _WORKER["scanner"].scan(data, start, end)
+        matches = []
+        while True:
+            try:
+                matches.append(next(scan))
+            except StopIteration as stop:
+                return matches, stop.value - 1
+
+
+def _finditer_shard(path: str, start: int, end: int, overlap: int) -> List[Tuple[int, int]]:
+    """
+    Find the matches starting in one shard in a worker process. The text is read
+    overlap bytes past the end, so a match starting in the shard is seen in full.
+
+    Returns:
+        list: The (start, end) byte spans of the matches, searched as if a match
+            had ended at the start of the shard.
+    """
+    with _map(path) as data:
+        size = len(data)
+        text = data[start : min(size, end + overlap)]
+    spans = []
+    for match_start, match_end in _WORKER["pattern"].finditer(text):
+        # An empty match at the end of a shard belongs to the next shard
+        if match_start + start >= end and end < size:
+            break
+        spans.append((match_start + start, match_end + start))
+    return spans
+
+
+def _shard_bounds(path: str, size: int, shards: int, align: bool) -> List[int]:
+    """
+    Split a file into byte ranges of about equal size.
+
+    Returns:
+        list: The shard boundaries, from 0 to size. With align every boundary
+            is moved to the start of the next line.
+    """
+    bounds = [0]
+    with _map(path) as data:
+        for k in range(1, shards):
+            bound = max(k * size // shards, bounds[-1])
+            if align:
+                bound = data.find(b"\n", bound) + 1 or size
+            if bounds[-1] < bound < size:
+                bounds.append(bound)
+    bounds.append(size)
+    return bounds
+
+
+def _plan(pattern, path: str, workers: Optional[int], shards: Optional[int]):
+    """
+    Compile the pattern and choose the worker and shard counts.
+    """
+    if isinstance(pattern, str):
+        pattern = cached_pattern(pattern)
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(path)
+    if shards is None:
+        shards = max(1, min(workers * SHARDS_PER_WORKER, size // MIN_SHARD_SIZE))
+    return pattern, workers, size, shards
+
+
+def _overlap(pattern: Pattern) -> Tuple[int, bool]:
+    """
+    Choose how far shards read ahead, and whether they must start at line starts.
+
+    Returns:
+        tuple: The longest match length in bytes, or 0 if it is unbounded, and
+            whether the shards are aligned to lines.
+
+    Raises:
+        ValueError: If matches may contain newlines and have no length bound.
+    """
+    automaton = pattern.automaton
+    labels = [automaton.label(state) for state in range(automaton.state_count)]
+    labels = [label for label in labels if label is not None]
+    overlap = analyze_literals(pattern.postfix).max_length
+    if overlap is not None:
+        # The length bound counts characters, the shards are cut in bytes
+        return overlap * max(map(utf8_width, labels), default=1), False
+    if any(label_matches(label, "\n") for label in labels):
+        raise ValueError("Matches may span lines and have no length bound, use finditer.")
+    return 0, True
+
+
+def grep_file_parallel(
+    pattern: Union[str, Pattern],
+    path: str,
+    workers: Optional[int] = None,
+    shards: Optional[int] = None,
+) -> Iterator[LineMatch]:
+    """
+    Yield the lines of a file that contain a match, scanning shards in parallel.
+
+    Shards start at line starts, so every line is scanned by one worker, and the
+    line numbers are fixed up with the line counts of the earlier shards.
+
+    Args:
+        pattern: An infix regex or a compiled pattern.
+        path: Path of the file to search.
+        workers: Number of worker processes, the number of CPUs by default.
+        shards: Number of byte ranges the file is split into.
+
+    Yields:
+        LineMatch: The matching lines in file order, as grep_file yields them.
+    """
+    pattern, workers, size, shards = _plan(pattern, path, workers, shards)
+    bounds = _shard_bounds(path, size, shards, align=True)
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(pattern,)) as executor:
+        futures = [
+            executor.submit(_grep_shard, path, start, end) for start, end in zip(bounds, bounds[1:])
+        ]
+        lines_before = 0
+        for future in futures:
+            matches, lines = future.result()
+            for match in matches:
+                yield LineMatch(match.line_number + lines_before, match.start, match.end)
+            lines_before += lines
+
+
+def finditer_file_parallel(
+    pattern: Union[str, Pattern],
+    path: str,
+    workers: Optional[int] = None,
+    shards: Optional[int] = None,
+) -> Iterator[Tuple[int, int]]:
+    """
+    Yield the spans of all non-overlapping leftmost longest matches in a file,
+    scanning shards in parallel. The file is matched as bytes, so the spans are
+    byte offsets and non-ASCII labels match their UTF-8 encoding.
+
+    If matches have a bounded length, shards are plain byte ranges and every
+    shard reads ahead by the longest match length. Where a match crosses into
+    the next shard, the search is replayed from its end until it meets a match
+    the next shard found too, as from there on the two searches agree. If the
+    length is unbounded but no match can contain a newline, shards start at
+    line starts instead and no match crosses a boundary.
+
+    Args:
+        pattern: An infix regex or a compiled pattern.
+        path: Path of the file to search.
+        workers: Number of worker processes, the number of CPUs by default.
+        shards: Number of byte ranges the file is split into.
+
+    Yields:
+        tuple: The (start, end) byte span of each match in file order, as
+            Pattern.finditer would find them in the whole file.
+
+    Raises:
+        ValueError: If matches may contain newlines and have no length bound.
+    """
+    pattern, workers, size, shards = _plan(pattern, path, workers, shards)
+    overlap, align = _overlap(pattern)
+    bounds = _shard_bounds(path, size, shards, align)
+
+    # The results are collected here, so the generator below holds no pool or mapping
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(pattern,)) as executor:
+        futures = [
+            executor.submit(_finditer_shard, path, start, end, overlap)
+            for start, end in zip(bounds, bounds[1:])
+        ]
+        shard_spans = [future.result() for future in futures]
+    return _stitch(pattern, path, bounds, shard_spans, overlap)
+
+
+def _stitch(
+    pattern: Pattern,
+    path: str,
+    bounds: List[int],
+    shard_spans: List[List[Tuple[int, int]]],
+    overlap: int,
+) -> Iterator[Tuple[int, int]]:
+    """
+    Yield the spans found by the shards in file order, replaying the search
+    where a match crossed into the next shard.
+    """
+    size = bounds[-1]
+    # Position the sequential search would continue from
+    position = 0
+    for start, end, spans in zip(bounds, bounds[1:], shard_spans):
+        if position > start:
+            # A match crossed into this shard, replay until the two searches agree
+            index = 0
+            while position < end or position == size:
+                while index < len(spans) and spans[index][0] < position:
+                    index += 1
+                span = pattern.search(_read(path, position, min(size, end + overlap)))
+                if span is None or span[0] + position >= end and end < size:
+                    spans = []
+                    break
+                span = (span[0] + position, span[1] + position)
+                if index < len(spans) and spans[index] == span:
+                    spans = spans[index:]
+                    break
+                yield span
+                position = span[1] if span[1] > span[0] else span[1] + 1
+            else:
+                spans = []
+
+        for span in spans:
+            yield span
+            position = span[1] if span[1] > span[0] else span[1] + 1
@@ -5,25 +5,100 @@ into postfix notation with the shunting yard algorithm.
 
 from .exceptions import MismatchedParenthesesError, PostfixError
 
+# Number of hexadecimal digits after each numeric escape
+HEX_ESCAPE_DIGITS = {"x": 2, "u": 4, "U": 8}
+
+
+def operand_end(text: str, index: int) -> int:
+    """
+    Find the end of the escape sequence or bracket class starting at index.
+
+    A "]" right after "[" or "[^" is taken as a literal, so "[]a]" is one class.
+
+    Returns:
+        int: The index right after the operand.
+
+    Raises:
+        PostfixError: If the escape is incomplete or the class is not closed.
+    """
+    if text[index] == "\\":
+        if index + 1 == len(text):
+            raise PostfixError("Regex cannot end in a backslash.")
+        end = index + 2 + HEX_ESCAPE_DIGITS.get(text[index + 1], 0)
+        if end > len(text):
+            raise PostfixError(f"Incomplete escape sequence: {text[index:]}")
+        return end
+
+    i = index + 1
+    if text[i : i + 1] == "^":
+        i += 1
+    if text[i : i + 1] == "]":
+        i += 1
+    while i < len(text):
+        if text[i] == "]":
+            return i + 1
+        i = operand_end(text, i) if text[i] == "\\" else i + 1
+    raise PostfixError(f"Character class was not closed: {text[index:]}")
+
+
+def quantifier_end(text: str, index: int) -> int:
+    """
+    Find the end of the counted repetition {m}, {m,} or {m,n} starting at index.
+
+    Returns:
+        int: The index right after the closing brace.
+
+    Raises:
+        PostfixError: If the braces are not closed or hold anything but the counts.
+    """
+    end = text.find("}", index)
+    if end == -1:
+        raise PostfixError(f"Quantifier braces were not closed: {text[index:]}")
+    minimum, _, maximum = text[index + 1 : end].partition(",")
+    if not minimum.isdigit() or maximum and not maximum.isdigit():
+        raise PostfixError(f"Invalid quantifier: {text[index : end + 1]}")
+    return end + 1
+
 
 def shunting_yard(infix):
     """
-    Shunting yard algorithm for regex
+    Shunting yard algorithm for regex.
+
+    Operands are alphanumeric characters, escape sequences such as \\d or \\*,
+    and bracket classes such as [a-z]. Escapes and classes are copied to the
+    postfix as they are, and so is a counted repetition such as {2,5}, right
+    after the operand it repeats.
     """
     # Handle empty regex
     if not infix:
         return ""
 
     specials = {"*": 60, "+": 55, "?": 50, ".": 40, "|": 20}
-    postfix = ""
+    # Pieces of the postfix, joined once at the end so building it stays linear
+    postfix = []
     stack = []
 
-    for character in infix:
+    i = 0
+    while i < len(infix):
+        character = infix[i]
+        if character in "\\[":
+            end = operand_end(infix, i)
+            postfix.append(infix[i:end])
+            i = end
+            continue
+        if character == "{":
+            # A quantifier binds tighter than anything, so only pending *, + and ? go first
+            end = quantifier_end(infix, i)
+            while stack and stack[-1] in "*+?":
+                postfix.append(stack.pop())
+            postfix.append(infix[i:end])
+            i = end
+            continue
         if character == "(":
             stack.append(character)
         elif character == ")":
             while stack and stack[-1] != "(":
-                postfix += stack.pop()
+                postfix.append(stack.pop())
             if stack and stack[-1] == "(":
                 stack.pop()  # Remove '('
             else:
@@ -37,16 +112,17 @@ def shunting_yard(infix):
                     or (specials[character] == specials[stack[-1]] and character in ".*")
                 )
             ):
-                postfix += stack.pop()
+                postfix.append(stack.pop())
             stack.append(character)
         elif character.isalnum():
-            postfix += character
+            postfix.append(character)
         else:
             raise PostfixError(f"Invalid character in regex: {character}")
+        i += 1
 
     while stack:
         if stack[-1] == "(":
             raise MismatchedParenthesesError("Mismatched parentheses: '(' without matching ')'")
-        postfix += stack.pop()
+        postfix.append(stack.pop())
 
-    return postfix
+    return "".join(postfix)
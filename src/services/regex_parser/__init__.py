@@ -0,0 +1,20 @@
+"""
+this is an init file to form an import tree
+"""
+
+from .nodes import (
+    Node,
+    Empty,
+    Literal,
+    Concatenation,
+    Alternation,
+    Repetition,
+    EMPTY,
+    concatenation,
+    alternation,
+    repetition,
+    ast_postfix,
+    compile_ast,
+)
+from .parser import parse_regex
+from .optimizer import optimize
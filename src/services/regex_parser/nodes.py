@@ -0,0 +1,259 @@
+"""
+This file defines the abstract syntax tree of a regex. The nodes use __slots__
+to stay small, since a generated pattern can have hundreds of thousands of them.
+
+The functions concatenation, alternation and repetition build nodes in a
+normal form: nested concatenations and alternations are flattened into one
+node, and the empty regex is left out wherever it can be, so that Empty only
+remains as the whole tree of a regex matching just the empty string.
+"""
+
+from typing import List, Optional, Union
+from src.services.non_finite_automaton.char_class import OPERATORS, CharClass
+from src.services.non_finite_automaton.nfa import compile_regex
+from src.services.non_finite_automaton.repeat import Repeat, expand_repeats
+
+
+class Node:
+    """
+    Base class of the syntax tree nodes. Nodes compare equal by structure.
+
+    Nodes are never changed once built, so each one computes its hash when it
+    is created, from the hashes its children already hold. Hashing a node then
+    takes constant time and never walks its subtree, which the optimizer does
+    for every branch it looks up.
+    """
+
+    __slots__ = ("_hash",)
+
+    def __init__(self):
+        self._hash = hash((self.__class__.__name__, self._key()))
+
+    def _key(self) -> tuple:
+        """
+        Return the fields that make up the node, for comparison and hashing.
+        """
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        if other is self:
+            return True
+        return self._hash == other._hash and self._key() == other._key()
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        # The hash is left out, as hashes of strings differ between processes
+        return self.__class__, tuple(getattr(self, name) for name in self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(repr(getattr(self, name)) for name in self.__slots__)
+        return f"{self.__class__.__name__}({fields})"
+
+
+class Empty(Node):
+    """
+    The empty regex, which matches only the empty string.
+    """
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        return "EMPTY"
+
+
+class Literal(Node):
+    """
+    A single character or a character class.
+
+    Attributes:
+        label: The character, or the CharClass of the characters, the node matches.
+    """
+
+    __slots__ = ("label",)
+
+    def __init__(self, label: Union[str, CharClass]):
+        self.label = label
+        super().__init__()
+
+
+class Concatenation(Node):
+    """
+    A sequence of nodes matched one after another.
+
+    Attributes:
+        items: The nodes in order, at least two, none of them a concatenation.
+    """
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: List[Node]):
+        self.items = items
+        super().__init__()
+
+    def _key(self) -> tuple:
+        return tuple(self.items)
+
+
+class Alternation(Node):
+    """
+    A choice between nodes.
+
+    Attributes:
+        items: The branches in order, at least two, none of them an alternation.
+    """
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: List[Node]):
+        self.items = items
+        super().__init__()
+
+    def _key(self) -> tuple:
+        return tuple(self.items)
+
+
+class Repetition(Node):
+    """
+    A node repeated a bounded or unbounded number of times.
+
+    Attributes:
+        item: The repeated node.
+        minimum: The least number of repeats.
+        maximum: The largest number of repeats, or None if unbounded.
+    """
+
+    __slots__ = ("item", "minimum", "maximum")
+
+    def __init__(self, item: Node, minimum: int, maximum: Optional[int]):
+        self.item = item
+        self.minimum = minimum
+        self.maximum = maximum
+        super().__init__()
+
+
+EMPTY = Empty()
+
+
+def concatenation(items: List[Node]) -> Node:
+    """
+    Return the concatenation of the nodes, flattening nested ones and dropping empty ones.
+    """
+    flat: List[Node] = []
+    for item in items:
+        if item.__class__ is Concatenation:
+            flat.extend(item.items)
+        elif item.__class__ is not Empty:
+            flat.append(item)
+    if not flat:
+        return EMPTY
+    return flat[0] if len(flat) == 1 else Concatenation(flat)
+
+
+def alternation(items: List[Node]) -> Node:
+    """
+    Return the alternation of the nodes, flattening nested ones.
+    An empty branch makes the rest optional, so a|b| becomes (a|b)?.
+    """
+    flat: List[Node] = []
+    optional = False
+    for item in items:
+        if item.__class__ is Alternation:
+            flat.extend(item.items)
+        elif item.__class__ is Empty:
+            optional = True
+        else:
+            flat.append(item)
+    if not flat:
+        return EMPTY
+    node = flat[0] if len(flat) == 1 else Alternation(flat)
+    return repetition(node, 0, 1) if optional else node
+
+
+def repetition(item: Node, minimum: int, maximum: Optional[int]) -> Node:
+    """
+    Return the node repeated from minimum to maximum times. x{1} is x itself,
+    and x{0} or a repeated empty regex is the empty regex.
+    """
+    if maximum == 0 or item.__class__ is Empty:
+        return EMPTY
+    if minimum == maximum == 1:
+        return item
+    return Repetition(item, minimum, maximum)
+
+
+# Postfix operators of the repetitions that have one
+REPEAT_OPERATORS = {(0, None): "*", (1, None): "+", (0, 1): "?"}
+
+
+def _balanced(items: List[Node], operator: str) -> list:
+    """
+    Return the items with the binary operators that join them into a balanced
+    tree in postfix. After the i-th item as many operators follow as i has
+    trailing zero bits, like carries in a binary counter, and the operators
+    joining the remaining subtrees follow the last item.
+
+    A balanced tree keeps the chain of accept states every branch of a Thompson
+    alternation exits through, and the literals the prefilter analysis joins,
+    logarithmic in the number of items instead of linear.
+    """
+    sequence: list = []
+    for index, item in enumerate(items, 1):
+        sequence.append(item)
+        sequence.extend(operator * ((index & -index).bit_length() - 1))
+    sequence.extend(operator * (bin(len(items)).count("1") - 1))
+    return sequence
+
+
+def ast_postfix(node: Node) -> list:
+    """
+    Return the postfix tokens of a syntax tree, the operand labels and operators
+    compile_regex and the literal analysis read.
+
+    The tree is walked without recursion, so deeply nested trees work too. A
+    concatenation or alternation of many items is written as a balanced tree of
+    the binary operators, and counted repetitions are expanded as in the simple
+    syntax.
+
+    Returns:
+        list: The tokens, empty for the empty regex.
+    """
+    tokens: list = []
+    counted = False
+    # Nodes still to walk, and operators to write once the nodes below them are written
+    stack: list = [node]
+    while stack:
+        entry = stack.pop()
+        kind = entry.__class__
+        if kind is Literal:
+            label = entry.label
+            if label.__class__ is str and label in OPERATORS:
+                # A literal operator character is kept as a class, like an escape in postfix
+                label = CharClass([(ord(label), ord(label))])
+            tokens.append(label)
+        elif kind is Repetition:
+            operator = REPEAT_OPERATORS.get((entry.minimum, entry.maximum))
+            if operator is None:
+                counted = True
+                operator = Repeat(entry.minimum, entry.maximum)
+            stack.append(operator)
+            stack.append(entry.item)
+        elif kind is Concatenation or kind is Alternation:
+            operator = "." if kind is Concatenation else "|"
+            stack.extend(reversed(_balanced(entry.items, operator)))
+        elif kind is not Empty:
+            tokens.append(entry)
+    return expand_repeats(tokens) if counted else tokens
+
+
+def compile_ast(node: Node, builder=None):
+    """
+    Compile a syntax tree into an NFA with the given builder, as compile_regex does for postfix.
+
+    Raises:
+        EmptyRegexError: If the tree is the empty regex.
+    """
+    return compile_regex(ast_postfix(node), builder)
@@ -0,0 +1,259 @@
+"""
+This file rewrites a syntax tree into an equivalent smaller one before any
+NFA state is allocated. Generated rule sets repeat a lot of structure, and
+every redundant branch would add states that are visited on every character.
+
+The rewrites are:
+    - identical branches of an alternation are kept once,
+    - branches starting with the same node share it, abc|abd -> ab(c|d),
+      which turns a list of words into a trie,
+    - branches ending with the same node share it, a.com|b.com -> (a|b).com,
+    - single character branches are merged into one class, a|b|[0-9] -> [ab0-9],
+    - nested *, + and ? collapse into one, (x*)* and (x+)* -> x*.
+
+The engines find the leftmost longest match and do not prefer one branch over
+another, so the branches of an alternation may be reordered.
+"""
+
+from typing import Dict, List
+from src.services.non_finite_automaton.char_class import CharClass, label_ranges
+from .nodes import (
+    EMPTY,
+    REPEAT_OPERATORS,
+    Alternation,
+    Concatenation,
+    Empty,
+    Literal,
+    Node,
+    Repetition,
+    alternation,
+    concatenation,
+    repetition,
+)
+
+
+def _items(node: Node) -> List[Node]:
+    """
+    Return the nodes a branch is a sequence of.
+    """
+    return node.items if node.__class__ is Concatenation else [node]
+
+
+def _merge_literals(branches: List[Node]) -> List[Node]:
+    """
+    Replace the single character branches with one class at the place of the first one.
+    """
+    literals = [branch for branch in branches if branch.__class__ is Literal]
+    if len(literals) < 2:
+        return branches
+    char_class = CharClass(
+        code_range for literal in literals for code_range in label_ranges(literal.label)
+    )
+    if char_class.ranges[0][0] == char_class.ranges[-1][1]:
+        merged = Literal(chr(char_class.ranges[0][0]))
+    else:
+        merged = Literal(char_class)
+    result = []
+    for branch in branches:
+        if branch.__class__ is not Literal:
+            result.append(branch)
+        elif branch is literals[0]:
+            result.append(merged)
+    return result
+
+
+# The key of a trie node that a branch ends at
+_END = None
+
+
+def _trie(branches: List[Node], optional: bool) -> dict:
+    """
+    Return the trie of the items of the branches.
+
+    A trie node is a dict from each item that follows it to the trie node after
+    that item, with the key _END if a branch ends there. A branch that ends in an
+    alternation, as a(b|c), goes on with each of its branches, as ab|ac.
+    """
+    root: dict = {_END: None} if optional else {}
+    for branch in branches:
+        pending = [(root, branch)]
+        while pending:
+            node, branch = pending.pop()
+            items = _items(branch)
+            for item in items[:-1]:
+                node = node.setdefault(item, {})
+            last = items[-1]
+            if last.__class__ is Alternation and len(items) > 1:
+                pending.extend((node, item) for item in reversed(last.items))
+            else:
+                node.setdefault(last, {})[_END] = None
+    return root
+
+
+def _join_trie(root: dict):
+    """
+    Return the node of the alternation a trie stands for, so every prefix the
+    branches share is matched once, abc|abd -> ab(c|d).
+
+    The trie is walked depth first with an explicit stack. A path of trie
+    nodes with a single item and no branch ending at them is one sequence,
+    and the branches below every other trie node are joined after the nodes
+    below them, like the branches of a whole alternation.
+
+    Yields the alternations of heads _factor_suffixes leaves to optimize.
+    """
+    # Each entry is a trie node, its remaining items, its branches so far and
+    # the sequence of items leading to it from the trie node above
+    stack = [(root, iter(root.items()), [], [])]
+    while True:
+        node, following, branches, path = stack[-1]
+        for item, child in following:
+            if item is _END:
+                continue
+            sequence = [item]
+            while len(child) == 1 and _END not in child:
+                ((item, child),) = child.items()
+                sequence.append(item)
+            if len(child) == 1:
+                branches.append(concatenation(sequence))
+            else:
+                stack.append((child, iter(child.items()), [], sequence))
+                break
+        else:
+            stack.pop()
+            if len(branches) > 1:
+                branches = _merge_literals((yield from _factor_suffixes(branches)))
+            if _END in node:
+                branches.append(EMPTY)
+            joined = alternation(branches)
+            if not stack:
+                return joined
+            stack[-1][2].append(concatenation(path + [joined]))
+
+
+def _factor_suffixes(branches: List[Node]):
+    """
+    Join the branches that end with the same nodes, so the nodes are matched once.
+
+    Yields the alternation of the heads of each group to optimize, and is sent its node.
+    """
+    groups: Dict[Node, List[List[Node]]] = {}
+    for branch in branches:
+        items = _items(branch)
+        groups.setdefault(items[-1], []).append(items[:-1])
+    if len(groups) == len(branches):
+        return branches
+    result = []
+    for last, heads in groups.items():
+        if len(heads) == 1:
+            result.append(concatenation(heads[0] + [last]))
+        else:
+            # Take the whole suffix the heads share at once, so a long one is
+            # not factored out one node and one alternation of heads at a time
+            suffix = [last]
+            while all(heads) and all(head[-1] == heads[0][-1] for head in heads):
+                suffix.append(heads[0][-1])
+                for head in heads:
+                    head.pop()
+            suffix.reverse()
+            rest = yield [concatenation(head) for head in heads]
+            result.append(concatenation([rest] + suffix))
+    return result
+
+
+def _optimize_alternation(branches: List[Node]):
+    """
+    Return the optimized alternation of branches that are optimized already.
+
+    Yields the alternations it needs optimized first, and is sent their nodes.
+    """
+    flat: List[Node] = []
+    optional = False
+    for branch in branches:
+        if branch.__class__ is Alternation:
+            flat.extend(branch.items)
+        elif branch.__class__ is Empty:
+            optional = True
+        else:
+            flat.append(branch)
+    unique = list(dict.fromkeys(flat))
+    if len(unique) > 1:
+        return (yield from _join_trie(_trie(unique, optional)))
+    if optional:
+        unique.append(EMPTY)
+    return alternation(unique)
+
+
+def _alternation(branches: List[Node]) -> Node:
+    """
+    Return the optimized alternation of branches that are optimized already.
+
+    Factoring out a suffix leaves an alternation of the heads before it, whose
+    own factoring can leave another one, as deep as the branches are long. So
+    every alternation is optimized by a generator that yields the alternations
+    it needs, and they run on an explicit stack instead of recursing.
+    """
+    stack = [_optimize_alternation(branches)]
+    joined = None
+    while stack:
+        try:
+            needed = stack[-1].send(joined)
+        except StopIteration as stop:
+            stack.pop()
+            joined = stop.value
+        else:
+            stack.append(_optimize_alternation(needed))
+            joined = None
+    return joined
+
+
+def _repetition(item: Node, minimum: int, maximum) -> Node:
+    """
+    Return the optimized repetition of a node that is optimized already.
+
+    A *, + or ? of a *, + or ? is one repetition whose counts are the products
+    of the two, e.g. (x+)* is x*. For other counts the product is not exact, as
+    (x{2}){0,2} only matches 0, 2 or 4 copies, so they are left as they are.
+    """
+    if (
+        item.__class__ is Repetition
+        and (minimum, maximum) in REPEAT_OPERATORS
+        and (item.minimum, item.maximum) in REPEAT_OPERATORS
+    ):
+        if maximum is not None and item.maximum is not None:
+            maximum *= item.maximum
+        else:
+            maximum = None
+        return repetition(item.item, minimum * item.minimum, maximum)
+    return repetition(item, minimum, maximum)
+
+
+def optimize(node: Node) -> Node:
+    """
+    Return a syntax tree that matches the same strings with fewer nodes.
+
+    The tree is rewritten bottom up without recursion, so every node is built
+    from children that are optimized already.
+    """
+    results: List[Node] = []
+    stack = [(node, False)]
+    while stack:
+        node, visited = stack.pop()
+        kind = node.__class__
+        if kind is Literal or kind is Empty:
+            results.append(node)
+        elif not visited:
+            stack.append((node, True))
+            children = [node.item] if kind is Repetition else node.items
+            stack.extend((child, False) for child in reversed(children))
+        elif kind is Repetition:
+            results.append(_repetition(results.pop(), node.minimum, node.maximum))
+        else:
+            count = len(node.items)
+            children = results[-count:]
+            del results[-count:]
+            if kind is Concatenation:
+                results.append(concatenation(children))
+            else:
+                results.append(_alternation(children))
+    return results.pop()
@@ -0,0 +1,152 @@
+"""
+This file parses a regex written in the usual Python syntax into a syntax tree.
+
+The regex is tokenized once, with the parentheses of groups as tokens of their
+own, and the tokens are read left to right. Every branch of an alternation is
+collected in a list, so a generated pattern such as a 50 000 way alternation
+parses in linear time without building any strings. Groups are parsed with an
+explicit stack instead of recursion, so nesting depth is not limited either.
+"""
+
+from typing import Dict, Iterator, List, Tuple
+from src.services.non_finite_automaton.char_class import ANY, operand_label
+from src.services.non_finite_automaton.exceptions import InvalidRegexError
+from src.services.non_finite_automaton.repeat import parse_repeat
+from src.services.regex_syntax_checker.exceptions import RegexTokenizerError
+from src.services.regex_syntax_checker.regex_tokenizer import RegexTokenizer, TokenTypes
+from .nodes import Literal, Node, alternation, concatenation, repetition
+
+# Counts of the single character quantifiers
+QUANTIFIERS = {"*": (0, None), "+": (1, None), "?": (0, 1)}
+
+
+def _tokenize(regex: str) -> Iterator[Tuple[str, TokenTypes]]:
+    """
+    Return the tokens of a regex with their types, each "(" and ")" a token of its own.
+
+    Raises:
+        InvalidRegexError: If the tokenizer rejects the regex.
+    """
+    try:
+        tokenizer = RegexTokenizer(regex, whole_groups=False)
+    except RegexTokenizerError as error:
+        raise InvalidRegexError(f"Invalid regex: {error}") from error
+    return zip(tokenizer.tokens, tokenizer.token_types)
+
+
+class _Group:
+    """
+    The state of one group being parsed: the finished branches and the items
+    of the current branch.
+    """
+
+    __slots__ = ("branches", "items", "repeated")
+
+    def __init__(self):
+        self.branches: List[Node] = []
+        self.items: List[Node] = []
+        # Whether the last item was just repeated, as a** is an error but (a*)* is not
+        self.repeated = False
+
+    def add(self, node: Node) -> None:
+        """
+        Append a node to the current branch.
+        """
+        self.items.append(node)
+        self.repeated = False
+
+    def branch(self) -> None:
+        """
+        Finish the current branch at a "|".
+        """
+        self.branches.append(concatenation(self.items))
+        self.items = []
+        self.repeated = False
+
+    def repeat(self, token: str, minimum: int, maximum) -> None:
+        """
+        Apply a quantifier to the last item of the current branch.
+
+        Raises:
+            InvalidRegexError: If there is nothing to repeat or the item was already repeated.
+        """
+        if not self.items:
+            raise InvalidRegexError(f"Invalid regex: nothing to repeat before {token}")
+        if self.repeated:
+            raise InvalidRegexError(
+                f"Invalid regex: multiple repeat at {token}, lazy quantifiers are not supported"
+            )
+        self.items[-1] = repetition(self.items[-1], minimum, maximum)
+        self.repeated = True
+
+    def finish(self) -> Node:
+        """
+        Return the node of the whole group.
+        """
+        self.branch()
+        return alternation(self.branches)
+
+
+def parse_regex(regex: str) -> Node:
+    """
+    Parse a regex in Python syntax into a syntax tree.
+
+    Concatenation is implicit and "." matches any character but a newline.
+    The class escapes \\d, \\w and \\s are ASCII only, as with re.ASCII.
+    Groups (...) and (?:...) only group, since the engines report spans but
+    no submatches.
+
+    Returns:
+        Node: The syntax tree, Empty if the regex matches only the empty string.
+
+    Raises:
+        InvalidRegexError: If the regex is invalid or uses anchors, lazy
+            quantifiers or other (?...) groups, which are not supported.
+    """
+    tokens = _tokenize(regex)
+    # Literal nodes by token, so a repeated escape or class is built once
+    literals: Dict[str, Node] = {}
+    stack = [_Group()]
+    # Whether the last token opened a group, which may start with "?:"
+    opened = False
+    for token, kind in tokens:
+        group = stack[-1]
+        node = literals.get(token)
+        if node is not None:
+            group.add(node)
+        elif kind is TokenTypes.CAPTURE_GROUP:
+            if token == "(":
+                stack.append(_Group())
+                opened = True
+                continue
+            if len(stack) == 1:
+                raise InvalidRegexError("Mismatched parentheses: ')' without matching '('")
+            stack.pop()
+            stack[-1].add(group.finish())
+        elif kind is TokenTypes.QUANTIFIER:
+            group.repeat(token, *parse_repeat(token))
+        elif kind is TokenTypes.SPECIAL:
+            if token == "|":
+                group.branch()
+            elif token == "?" and opened:
+                # Only the non-capturing (?:...) of the (?...) groups is supported
+                extension, _ = next(tokens, ("", None))
+                if extension != ":":
+                    raise InvalidRegexError(f"Invalid regex: unsupported group (?{extension}")
+            elif token in QUANTIFIERS:
+                group.repeat(token, *QUANTIFIERS[token])
+            else:
+                raise InvalidRegexError(f"Invalid regex: anchor {token} is not supported")
+        else:
+            if token == ".":
+                label = ANY
+            elif kind in (TokenTypes.ESCAPE_SEQUENCE, TokenTypes.CHARACTER_CLASS):
+                label = operand_label(token)
+            else:
+                label = token
+            node = literals[token] = Literal(label)
+            group.add(node)
+        opened = False
+    if len(stack) > 1:
+        raise InvalidRegexError("Invalid regex: Capture Group was not closed!")
+    return stack[0].finish()
@@ -76,6 +76,7 @@ class RegexTokenizer:
         special_symbols: Symbols with special meanings in regular expressions.
         unconditional_characters: Characters that are always valid.
         quantifier_allowed_preceding_token_types: Token types that can precede quantifiers.
+        whole_groups: Whether a capture group with everything in it is one token.
 
     Methods:
         __tokenize: Divides the input string into tokens.
@@ -85,12 +86,16 @@ class RegexTokenizer:
         __handle_capture_group: Processes capture groups (e.g., (abc)).
     """
 
-    def __init__(self, input_string: str):
+    def __init__(self, input_string: str, whole_groups: bool = True):
         """
         Initialize the RegexTokenizer with the input string and set up attributes.
 
         Args:
             input_string (str): The regular expression string to be tokenized.
+            whole_groups (bool): Make every capture group one token, e.g. "(a(b)c)".
+                With False, each "(" and ")" is a CAPTURE_GROUP token of its own and
+                the characters between them are tokenized like the rest, so nested
+                groups are read in one pass. The parentheses are then not matched up.
         """
         # Initialize attributes for processing the input string
         self.__input_string = input_string
@@ -99,6 +104,7 @@ class RegexTokenizer:
         self.tokens = []
         self.token_types = []
         self.input_string_length = len(input_string)
+        self.whole_groups = whole_groups
         self.literals = string.ascii_letters + "." + string.digits
         self.special_symbols = "$^+*?|"
         self.unconditional_characters = self.literals + self.special_symbols
@@ -162,11 +168,16 @@ class RegexTokenizer:
                         self.tokens.append(self.__handle_curly_brackets())
                         self.token_types.append(TokenTypes.QUANTIFIER)
 
-                    case "(":
+                    case "(" if self.whole_groups:
                         # Handle capture groups
                         self.tokens.append(self.__handle_capture_group())
                         self.token_types.append(TokenTypes.CAPTURE_GROUP)
 
+                    case "(" | ")":
+                        # Handle the parentheses of a group as tokens of their own
+                        self.tokens.append(self.symbol)
+                        self.token_types.append(TokenTypes.CAPTURE_GROUP)
+
                     case _ if self.symbol in self.literals:
                         # Handle literal characters
                         self.tokens.append(self.symbol)
@@ -193,7 +204,9 @@ class RegexTokenizer:
         Args:
             amount (int): The number of steps to skip in the input iterable.
         """
-        self.input_iterable = islice(self.input_iterable, amount, None)
+        # Consume the items in place, wrapping the iterable in another islice
+        # would make every later step pass through one more layer per escape
+        next(islice(self.input_iterable, amount, amount), None)
         self.i += amount
 
     def __handle_escape_sequence(self) -> str:
@@ -303,6 +316,11 @@ class RegexTokenizer:
                             token += symbol
                             token += next_symbol
                             break
+                        if next_symbol == "\\":
+                            # Keep an escape that ends a range whole, e.g. [a-\x7f]
+                            token += symbol
+                            token += self.__handle_escape_sequence()
+                            continue
                         if len(token) > 1 and token[-1] != "[":
                             # Ensure "-" is between two valid characters
                             if (
@@ -361,6 +379,10 @@ class RegexTokenizer:
                         token += symbol
                         break
 
+                    case _:
+                        # Keep every other character, e.g. a space, "~" or "é"
+                        token += symbol
+
             except StopIteration as exc:
                 raise UnclosedGroupError("Squarebracket character set was not closed!") from exc
 
@@ -486,11 +508,10 @@ class RegexTokenizer:
         """
         token = self.symbol  # Start building the token with the opening parenthesis
 
-        i = 0  # Track the position within the capture group
+        depth = 1  # Count the open groups, so nesting is not limited by recursion
         while True:
             try:
                 self.i, symbol = next(self.input_iterable)  # Get the next character
-                i += 1
 
                 match symbol:
 
@@ -499,13 +520,16 @@ class RegexTokenizer:
                         token += self.__handle_escape_sequence()
 
                     case "(":
-                        # Handle nested capture groups
-                        token += self.__handle_capture_group()
+                        # Open a nested capture group
+                        token += symbol
+                        depth += 1
 
                     case ")":
-                        # Closing parenthesis indicates the end of the capture group
+                        # The closing parenthesis of the outermost group ends the token
                         token += symbol
-                        break
+                        depth -= 1
+                        if depth == 0:
+                            break
 
                     case _:
                         # Add other characters to the token
@@ -0,0 +1,3 @@
+"""creating an import tree."""
+
+from .server import MatchServer, serve
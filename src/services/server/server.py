@@ -0,0 +1,474 @@
+"""
+This file defines a matching service for other processes. Clients send JSON
+requests one per line over a Unix or TCP socket. Concurrent requests are
+gathered into small batches that run in a pool of worker processes, and each
+worker keeps its own cache of compiled patterns, so callers pay neither the
+interpreter startup nor the compile cost of a pattern they have used before.
+
+A request is a JSON object such as
+    {"id": 1, "op": "search", "pattern": "a.b+", "string": "xxabb"}
+where op is fullmatch, match, search, finditer or stats, and an optional
+"timeout" overrides the server's timeout in seconds. The response carries the
+same id and either "result" or "error".
+
+The timeout also bounds the work in the worker. Every job carries its
+deadline, a worker skips jobs whose deadline has passed, and where the
+platform has interval timers a job is interrupted with SIGALRM at its
+deadline, so a slow request does not keep holding the worker after its
+caller was answered.
+"""
+
+import asyncio
+import json
+import os
+import signal
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from time import perf_counter, time
+from typing import List, Optional, Tuple
+from src.services.non_finite_automaton import (
+    DEFAULT_CACHE_SIZE,
+    EmptyRegexError,
+    InvalidRegexError,
+    cache_info,
+    cached_pattern,
+    configure_cache,
+)
+from src.services.postfix.exceptions import PostfixError
+
+# Largest number of requests run as one batch
+DEFAULT_BATCH_SIZE = 64
+
+# Seconds the batcher waits for more requests before running a partial batch
+DEFAULT_BATCH_DELAY = 0.002
+
+# Requests waiting for a worker before new requests have to wait to be queued
+DEFAULT_MAX_QUEUE = 1024
+
+# Requests of one connection being served before the server stops reading from it
+DEFAULT_MAX_PENDING = 128
+
+# Seconds a request may wait and run before it is answered with a timeout error
+DEFAULT_TIMEOUT = 5.0
+
+# Longest request line in bytes
+MAX_LINE = 1 << 24
+
+# Number of latest latencies the percentiles are computed from
+LATENCY_SAMPLES = 10_000
+
+OPERATIONS = ("fullmatch", "match", "search", "finditer")
+
+
+class _AlarmState:
+    """
+    The job timer state of a worker process.
+
+    Attributes:
+        limited: Whether a job is running under a time limit, so a late alarm is ignored.
+    """
+
+    __slots__ = ("limited",)
+
+    def __init__(self):
+        self.limited = False
+
+
+_ALARM = _AlarmState()
+
+
+class _JobTimeout(Exception):
+    """
+    Raised in a worker when a job runs past its deadline.
+    """
+
+
+def _on_alarm(_signum, _frame) -> None:
+    """
+    Interrupt the running job when its time limit expires.
+    """
+    if _ALARM.limited:
+        raise _JobTimeout()
+
+
+def _init_worker(cache_size: int) -> None:
+    """
+    Size the pattern cache of a worker process and install the job timer.
+    """
+    configure_cache(cache_size)
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGALRM, _on_alarm)
+
+
+@contextmanager
+def _time_limit(seconds: float):
+    """
+    Interrupt the body with _JobTimeout after the given seconds, where the platform allows.
+    """
+    if not hasattr(signal, "setitimer"):
+        yield
+        return
+    _ALARM.limited = True
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        _ALARM.limited = False
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _run_request(operation: str, infix: str, string: str):
+    """
+    Run one request with the worker's cached pattern.
+    """
+    pattern = cached_pattern(infix)
+    if operation == "fullmatch":
+        return pattern.fullmatch(string)
+    if operation == "match":
+        return pattern.match(string)
+    if operation == "search":
+        return pattern.search(string)
+    return list(pattern.finditer(string))
+
+
+def _run_batch(requests: List[Tuple[str, str, str, float]]) -> Tuple[list, int, int]:
+    """
+    Run a batch of requests in a worker process. Each request ends with its
+    deadline as a time() value, and is stopped once the deadline passes.
+
+    Returns:
+        tuple: An (ok, result or error message) pair per request, and the
+            number of pattern cache hits and misses of the batch.
+    """
+    before = cache_info()
+    results = []
+    for operation, infix, string, deadline in requests:
+        remaining = deadline - time()
+        if remaining <= 0:
+            results.append((False, "Timed out before it was run."))
+            continue
+        try:
+            with _time_limit(remaining):
+                result = (True, _run_request(operation, infix, string))
+        except _JobTimeout:
+            result = (False, "Timed out while it was run.")
+        except (EmptyRegexError, InvalidRegexError, PostfixError) as e:
+            result = (False, f"Invalid regex: {e}")
+        results.append(result)
+    after = cache_info()
+    return results, after.hits - before.hits, after.misses - before.misses
+
+
+def _percentile(samples: List[float], fraction: float) -> Optional[float]:
+    """
+    Return the nearest-rank percentile of sorted samples, or None if there are none.
+    """
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, max(0, -int(-fraction * len(samples)) - 1))]
+
+
+class MatchServer:
+    """
+    Serves match requests from a queue in micro-batches.
+
+    Attributes:
+        workers: Number of worker processes.
+        batch_size: Largest number of requests run as one batch.
+        batch_delay: Seconds to wait for a batch to fill up.
+        timeout: Default seconds before a request is answered with a timeout error.
+        max_pending: Requests of one connection served at a time.
+        requests: Number of match requests answered.
+        errors: Number of requests answered with an error, timeouts included.
+        timeouts: Number of requests that timed out.
+        batches: Number of batches run.
+        hits: Pattern cache hits in the workers.
+        misses: Pattern cache misses in the workers.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        workers: Optional[int] = None,
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        batch_delay: float = DEFAULT_BATCH_DELAY,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        timeout: float = DEFAULT_TIMEOUT,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ):
+        """
+        Raises:
+            ValueError: If a size or limit is less than 1.
+        """
+        if min(batch_size, max_queue, max_pending) < 1:
+            raise ValueError("Batch size, queue and pending limits must be at least 1.")
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.cache_size = cache_size
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.batches = 0
+        self.batched = 0
+        self.hits = 0
+        self.misses = 0
+        self.__max_queue = max_queue
+        self.__queue: Optional[asyncio.Queue] = None
+        self.__latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.__executor: Optional[ProcessPoolExecutor] = None
+        self.__batcher: Optional[asyncio.Task] = None
+        self.__running = set()
+        self.__slots: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def start(self) -> None:
+        """
+        Start the worker processes and the batcher.
+        """
+        self.__queue = asyncio.Queue(self.__max_queue)
+        self.__slots = asyncio.Semaphore(self.workers)
+        self.__executor = ProcessPoolExecutor(
+            self.workers, initializer=_init_worker, initargs=(self.cache_size,)
+        )
+        self.__batcher = asyncio.create_task(self.__batch_loop())
+
+    async def close(self) -> None:
+        """
+        Stop the batcher and wait for the worker processes to exit.
+        """
+        if self.__batcher is not None:
+            self.__batcher.cancel()
+            await asyncio.gather(self.__batcher, *self.__running, return_exceptions=True)
+            self.__batcher = None
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+
+    def stats(self) -> dict:
+        """
+        Return the counters, queue depth, latency percentiles and cache hit rate.
+        """
+        latencies = sorted(self.__latencies)
+        lookups = self.hits + self.misses
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "queue_depth": self.__queue.qsize() if self.__queue is not None else 0,
+            "batches": self.batches,
+            "mean_batch_size": self.batched / self.batches if self.batches else None,
+            "latency_ms": {
+                "p50": _percentile(latencies, 0.5),
+                "p99": _percentile(latencies, 0.99),
+            },
+            "cache": {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+            },
+        }
+
+    async def handle(self, request: dict) -> dict:
+        """
+        Answer one request.
+
+        Returns:
+            dict: The response with the request's id and a result or an error.
+        """
+        response = {"id": request.get("id")} if isinstance(request, dict) else {"id": None}
+        if not isinstance(request, dict):
+            response["error"] = "A request must be a JSON object."
+            return response
+        operation = request.get("op")
+        if operation == "stats":
+            response["result"] = self.stats()
+            return response
+
+        pattern = request.get("pattern")
+        string = request.get("string")
+        timeout = request.get("timeout", self.timeout)
+        if operation not in OPERATIONS:
+            response["error"] = f"Unknown op {operation!r}."
+        elif not isinstance(pattern, str) or not isinstance(string, str):
+            response["error"] = "pattern and string must be strings."
+        elif not isinstance(timeout, (int, float)) or timeout <= 0:
+            response["error"] = "timeout must be a positive number."
+        if "error" in response:
+            self.errors += 1
+            return response
+
+        started = perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        job = (operation, pattern, string, time() + timeout)
+        try:
+            ok, result = await asyncio.wait_for(self.__submit(job, future), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            ok, result = False, f"Timed out after {timeout} s."
+        self.requests += 1
+        self.__latencies.append((perf_counter() - started) * 1000)
+        if ok:
+            response["result"] = result
+        else:
+            self.errors += 1
+            response["error"] = result
+        return response
+
+    async def __submit(self, job: Tuple[str, str, str, float], future: asyncio.Future):
+        """
+        Queue a request, waiting while the queue is full, and wait for its result.
+        """
+        await self.__queue.put((job, future))
+        return await future
+
+    async def __batch_loop(self) -> None:
+        """
+        Take requests off the queue in batches and run each batch in a worker.
+        At most one batch per worker runs at a time, so excess requests wait in
+        the queue and later batches grow instead.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.__slots.acquire()
+            batch = [await self.__queue.get()]
+            deadline = loop.time() + self.batch_delay
+            while len(batch) < self.batch_size:
+                if self.__queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.__queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self.__queue.get_nowait())
+
+            # Requests that timed out while queued are not run at all
+            batch = [(job, future) for job, future in batch if not future.done()]
+            if not batch:
+                self.__slots.release()
+                continue
+            task = asyncio.create_task(self.__run(batch))
+            self.__running.add(task)
+            task.add_done_callback(self.__running.discard)
+
+    async def __run(self, batch: list) -> None:
+        """
+        Run a batch in the worker pool and hand out the results.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            results, hits, misses = await loop.run_in_executor(
+                self.__executor, _run_batch, [job for job, _ in batch]
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            results, hits, misses = [(False, f"Worker failed: {e}")] * len(batch), 0, 0
+        finally:
+            self.__slots.release()
+        self.batches += 1
+        self.batched += len(batch)
+        self.hits += hits
+        self.misses += misses
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def serve_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """
+        Answer the requests of one connection. Requests are served concurrently
+        and answered as they finish, so responses may come out of order. Once
+        max_pending requests are being served, the connection is not read until
+        one finishes, which lets the socket buffers push back on the client.
+        """
+        pending = asyncio.Semaphore(self.max_pending)
+        tasks = set()
+
+        async def answer(line: bytes) -> None:
+            """
+            Decode one request line, answer it and write the response line.
+            """
+            try:
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    self.errors += 1
+                    response = {"id": None, "error": "A request must be a line of JSON."}
+                else:
+                    response = await self.handle(request)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                pending.release()
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(b'{"id": null, "error": "Request line is too long."}\n')
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                await pending.acquire()
+                task = asyncio.create_task(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def serve(
+    server: MatchServer,
+    path: Optional[str] = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    ready=None,
+) -> None:
+    """
+    Serve requests forever on a Unix socket, or on TCP if no path is given.
+
+    Args:
+        server: The match server, started and closed by this coroutine.
+        path: Path of the Unix socket.
+        host: Address to listen on with TCP.
+        port: TCP port, 0 picks a free one.
+        ready: Called with the asyncio server once it listens.
+    """
+    async with server:
+        if path is not None:
+            listener = await asyncio.start_unix_server(
+                server.serve_connection, path, limit=MAX_LINE
+            )
+        else:
+            listener = await asyncio.start_server(
+                server.serve_connection, host, port, limit=MAX_LINE
+            )
+        async with listener:
+            if ready is not None:
+                ready(listener)
+            await listener.serve_forever()
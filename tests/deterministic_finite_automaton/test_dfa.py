@@ -0,0 +1,115 @@
+"""
+This is a test file for the ahead-of-time built and minimized DFA.
+"""
+
+import pytest
+from src.services.non_finite_automaton import compile_regex, compile_pattern
+from src.services.deterministic_finite_automaton import DFA, DFAStateLimitError
+
+CASES = [
+    ("a.b.c", ["abc", "ab", "abcc", ""]),
+    ("a.(b|d).c", ["abc", "adc", "aac", "axc"]),
+    ("a.b|c*", ["ab", "ccc", "", "ac"]),
+    ("(a|b)*.a.(a|b)*", ["a", "bab", "bbb", "", "abba"]),
+    ("a.b?", ["a", "ab", "abb"]),
+    ("a.b+", ["a", "ab", "abbb", "abc"]),
+]
+
+
+@pytest.mark.parametrize("infix, strings", CASES)
+def test_dfa_agrees_with_thompson(infix, strings):
+    """
+    Test that the table-driven DFA gives the same results as the Thompson simulation.
+    """
+    thompson = compile_pattern(infix, engine="thompson")
+    dfa = compile_pattern(infix, engine="dfa")
+    for string in strings:
+        assert dfa.fullmatch(string) == thompson.fullmatch(
+            string
+        ), f"Engines disagree on fullmatch of {string!r} against {infix!r}."
+        assert dfa.search(string) == thompson.search(
+            string
+        ), f"Engines disagree on search of {string!r} against {infix!r}."
+
+
+def test_dfa_minimization_state_count():
+    """
+    Test that Hopcroft minimization leaves the minimal number of states.
+    """
+    nfa = compile_regex("ab|*a.ab|.")
+    minimized = DFA.from_nfa(nfa)
+    # Four states remember the last two characters, plus the dead state
+    assert minimized.state_count == 5, "Minimized DFA does not have the minimal state count."
+    assert minimized.class_count == 2, "DFA alphabet should have two classes."
+    assert minimized.table_size == 10, "Table size should be states times classes."
+
+
+def test_dfa_merges_equivalent_branches():
+    """
+    Test that equivalent branches of an alternation become the same DFA states.
+    """
+    nfa = compile_regex("ab.cb.|")
+    unminimized = DFA.from_nfa(nfa, minimize=False)
+    dfa = DFA.from_nfa(nfa)
+    # start, after 'a' or 'c', after 'b', and the dead state
+    assert unminimized.state_count == 5, "Subset construction built the wrong states."
+    assert dfa.state_count == 4, "Equivalent branches were not merged."
+    assert dfa.fullmatch("cb"), "Failed to match a valid string."
+
+
+def test_dfa_dead_state_and_unknown_characters():
+    """
+    Test that characters outside the alphabet lead to the dead state.
+    """
+    dfa = DFA.from_nfa(compile_regex("ab*."))
+    assert dfa.table[0] == (0, 0), "Dead state should loop to itself."
+    assert not dfa.fullmatch("ax"), "Incorrectly matched a character outside the alphabet."
+    assert dfa.longest_match("abbx", 0) == 3, "Failed to stop at an unknown character."
+
+
+def test_dfa_state_limit():
+    """
+    Test that the subset construction fails cleanly when it exceeds the state limit.
+    """
+    nfa = compile_regex("ab|*a.ab|.ab|.ab|.ab|.")
+    with pytest.raises(
+        DFAStateLimitError, match="DFA construction exceeded the limit of 8 states."
+    ):
+        DFA.from_nfa(nfa, max_states=8)
+
+    with pytest.raises(DFAStateLimitError):
+        compile_pattern("(a|b)*.a.(a|b).(a|b).(a|b).(a|b)", engine="dfa", max_states=8)
+
+    assert DFA.from_nfa(nfa, max_states=1000).state_count == 33, "Wrong minimal state count."
+
+
+def test_equivalent_characters_share_a_class():
+    """
+    Test that characters no state tells apart are merged into one column.
+    """
+    pattern = compile_pattern("(a|b|c)*.d.(a|b|c)")
+    merged = DFA.from_nfa(pattern.automaton)
+    unmerged = DFA.from_nfa(pattern.automaton, merge_classes=False)
+    assert unmerged.class_count == 4, "Every character should have its own column."
+    assert merged.class_count == 2, "a, b and c should share a class."
+    assert merged.class_of["a"] == merged.class_of["b"] == merged.class_of["c"], "Wrong classes."
+    assert merged.table_size < unmerged.table_size, "The table should shrink."
+    for string in ["dab", "abcdc", "dd", "abc", "adbx", ""]:
+        assert merged.fullmatch(string) == unmerged.fullmatch(string), f"Differs on {string!r}."
+        assert merged.longest_match(string, 0) == unmerged.longest_match(string, 0), string
+
+
+def test_byte_dfa_translation_table():
+    """
+    Test that a DFA over bytes maps input through bytes.translate to its classes.
+    """
+    pattern = compile_pattern("(a|b)*.ä", engine="dfa")
+    dfa = pattern.byte_matcher
+    assert dfa.translation is not None, "A byte DFA should have a translation table."
+    assert len(dfa.translation) == 256, "The table should cover every byte."
+    assert dfa.translation[ord("a")] == dfa.translation[ord("b")], "a and b should share a class."
+    assert compile_pattern("a").matcher.translation is None, "A str DFA has no translation."
+    for string in ["abä", "ä", "ab", "äa", "xä"]:
+        data = string.encode("utf-8")
+        assert pattern.fullmatch(data) == pattern.fullmatch(string), f"Differs on {string!r}."
+        assert pattern.fullmatch(bytearray(data)) == pattern.fullmatch(string), string
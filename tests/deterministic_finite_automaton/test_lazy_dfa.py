@@ -0,0 +1,88 @@
+"""
+This is a test file for the lazily built DFA.
+"""
+
+import pytest
+from src.services.non_finite_automaton import compile_regex, compile_pattern
+from src.services.deterministic_finite_automaton import LazyDFA
+from src.services.postfix import shunting_yard
+
+CASES = [
+    ("a.b.c", ["abc", "ab", "abcc", ""]),
+    ("a.(b|d).c", ["abc", "adc", "aac"]),
+    ("a.b|c*", ["ab", "ccc", "", "ac"]),
+    ("(a|b)*.a.(a|b)*", ["a", "bab", "bbb", "", "abba"]),
+    ("a.b?", ["a", "ab", "abb"]),
+    ("a.b+", ["a", "ab", "abbb"]),
+]
+
+
+@pytest.mark.parametrize("infix, strings", CASES)
+def test_lazy_dfa_agrees_with_thompson(infix, strings):
+    """
+    Test that the lazy DFA engine gives the same results as the Thompson simulation.
+    """
+    thompson = compile_pattern(infix, engine="thompson")
+    lazy = compile_pattern(infix, engine="lazy_dfa")
+    for string in strings:
+        assert lazy.fullmatch(string) == thompson.fullmatch(
+            string
+        ), f"Engines disagree on fullmatch of {string!r} against {infix!r}."
+        assert lazy.search(string) == thompson.search(
+            string
+        ), f"Engines disagree on search of {string!r} against {infix!r}."
+
+
+def test_lazy_dfa_caches_transitions():
+    """
+    Test that DFA states are built only when a transition is first used.
+    """
+    dfa = LazyDFA(compile_regex("ab|*"))
+    assert dfa.state_count == 2, "DFA built states before they were needed."
+    assert dfa.fullmatch("abab"), "Failed to match a valid string."
+    built = dfa.state_count
+    assert dfa.fullmatch("baba"), "Failed to match a valid string."
+    assert dfa.state_count == built, "DFA rebuilt states that were already cached."
+
+
+def test_lazy_dfa_dead_state():
+    """
+    Test that a string leaving the automaton ends in the dead state and fails.
+    """
+    dfa = LazyDFA(compile_regex("ab."))
+    assert not dfa.fullmatch("ba"), "Incorrectly matched an invalid string."
+    assert dfa.start.transitions["b"] is dfa.dead, "Failed transition was not cached as dead."
+    assert dfa.longest_match("abx", 0) == 2, "Failed to find the longest match."
+
+
+def test_lazy_dfa_cache_flush():
+    """
+    Test that the DFA flushes its cache when the state limit is reached and still matches.
+    """
+    dfa = LazyDFA(compile_regex("ab|*a.ab|.ab|."), cache_states=3)
+    assert dfa.fullmatch("bbabbabb"), "Failed to match after flushing the cache."
+    assert not dfa.fullmatch("bbabbba"), "Incorrectly matched after flushing the cache."
+    assert dfa.flushes > 0, "DFA did not flush its cache."
+    assert dfa.state_count <= 3, "DFA kept more states than allowed."
+
+
+def test_lazy_dfa_falls_back_when_thrashing():
+    """
+    Test that a match that keeps filling the cache is handed to the Pike VM.
+    """
+    infix = "(a|b)*.a.(a|b).(a|b).(a|b).(a|b).(a|b)"
+    dfa = LazyDFA(compile_regex(shunting_yard(infix)), cache_states=8)
+    string = "ab" * 50 + "abbbbb"
+    assert dfa.fullmatch(string) and dfa.fallbacks == 1, "Should match with the Pike VM."
+    assert dfa.longest_match("b" + string, 0) == len(string) + 1, "Wrong longest match."
+    assert dfa.fallbacks == 2, "The longest match should also fall back."
+    roomy = LazyDFA(compile_regex(shunting_yard(infix)))
+    assert roomy.fullmatch(string) and roomy.fallbacks == 0, "A large cache should not thrash."
+
+
+def test_pattern_unknown_engine():
+    """
+    Test that an unknown engine name raises a ValueError.
+    """
+    with pytest.raises(ValueError, match="Unknown engine: .*"):
+        compile_pattern("a", engine="backtracking")
@@ -0,0 +1,87 @@
+"""
+This is a test file for the NumPy batch DFA.
+"""
+
+import random
+import pytest
+from src.services.deterministic_finite_automaton import DFA, VectorizedDFA, encode
+from src.services.deterministic_finite_automaton import vectorized
+from src.services.non_finite_automaton import compile_pattern
+
+requires_numpy = pytest.mark.skipif(vectorized.np is None, reason="NumPy is not installed.")
+
+
+def random_strings(count, lengths, alphabet="abcx"):
+    """
+    Random strings with lengths drawn from the given ones.
+    """
+    rng = random.Random(count)
+    return ["".join(rng.choice(alphabet) for _ in range(rng.choice(lengths))) for _ in range(count)]
+
+
+@requires_numpy
+@pytest.mark.parametrize("infix", ["(a|b)*.c", "a.b.c.a", "(a.b|c)+", "x?.(a|b|c)*"])
+def test_equal_length_batch(infix):
+    """
+    Test that a batch of equal-length strings agrees with fullmatch.
+    """
+    pattern = compile_pattern(infix)
+    strings = random_strings(500, [4])
+    result = VectorizedDFA.from_pattern(pattern).fullmatch_many(strings)
+    assert result.dtype == bool, "The result should be a boolean vector."
+    assert result.tolist() == [pattern.fullmatch(string) for string in strings], "Wrong results."
+
+
+@requires_numpy
+def test_ragged_batch():
+    """
+    Test that strings of different lengths, the empty string included, are bucketed correctly.
+    """
+    pattern = compile_pattern("(a|b)*.c?")
+    strings = random_strings(400, range(0, 12))
+    result = VectorizedDFA.from_pattern(pattern).fullmatch_many(strings)
+    assert result.tolist() == [pattern.fullmatch(string) for string in strings], "Wrong results."
+
+
+@requires_numpy
+def test_characters_outside_alphabet():
+    """
+    Test that characters outside the alphabet, including ones past the lookup array, reject.
+    """
+    matcher = VectorizedDFA.from_pattern(compile_pattern("a.b"))
+    assert matcher.fullmatch_many(["ab", "a€", "\x00b", "ba"]).tolist() == [
+        True,
+        False,
+        False,
+        False,
+    ], "Only 'ab' should match."
+
+
+@requires_numpy
+def test_encode():
+    """
+    Test that strings are encoded as rows of code points.
+    """
+    codes = encode(["ab", "c€"], 2)
+    assert codes.shape == (2, 2), "Wrong shape."
+    assert codes.tolist() == [[97, 98], [99, 0x20AC]], "Wrong code points."
+
+
+def test_missing_numpy(monkeypatch):
+    """
+    Test that building the matcher without NumPy raises ImportError.
+    """
+    monkeypatch.setattr(vectorized, "np", None)
+    with pytest.raises(ImportError):
+        VectorizedDFA(DFA.from_nfa(compile_pattern("a").automaton))
+
+
+@requires_numpy
+def test_class_ranges_use_searchsorted():
+    """
+    Test that characters in Unicode ranges of a class get their column by range lookup.
+    """
+    pattern = compile_pattern("[^a\\n]*.[α-ω]")
+    strings = random_strings(400, [0, 1, 3], alphabet="ab\nβω中\U0001f600")
+    result = VectorizedDFA.from_pattern(pattern).fullmatch_many(strings)
+    assert result.tolist() == [pattern.fullmatch(string) for string in strings], "Wrong results."
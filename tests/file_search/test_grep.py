@@ -0,0 +1,96 @@
+"""
+This is a test file for the memory mapped line search.
+"""
+
+import random
+import pytest
+from src.services.file_search import grep, grep_file, scan_lines
+from src.services.non_finite_automaton import compile_pattern
+
+
+def expected_lines(pattern, text):
+    """
+    Number and text of the lines that contain a match, found line by line.
+    """
+    lines = text.split("\n")
+    if text.endswith("\n") or not text:
+        lines.pop()
+    return [(number, line) for number, line in enumerate(lines, 1) if pattern.search(line)]
+
+
+def found_lines(matches, data):
+    """
+    Number and text of the reported lines.
+    """
+    return [(match.line_number, data[match.start : match.end].decode()) for match in matches]
+
+
+@pytest.mark.parametrize("infix", ["a.b+", "a*", "(a|b)*.c", "c?.(a|b).c"])
+def test_scan_lines_agrees_with_search(infix):
+    """
+    Test that the scanner reports the same lines as searching every line on its own.
+    """
+    pattern = compile_pattern(infix)
+    rng = random.Random(infix)
+    for _ in range(200):
+        text = "".join(rng.choice("abcd\n") for _ in range(rng.randint(0, 30)))
+        data = text.encode()
+        assert found_lines(scan_lines(pattern, data), data) == expected_lines(
+            pattern, text
+        ), f"Scanning {text!r} for {infix!r} gave the wrong lines."
+
+
+def test_grep_file_across_windows(tmp_path, monkeypatch):
+    """
+    Test that lines crossing window boundaries, and lines longer than a window, are found.
+    """
+    monkeypatch.setattr(grep, "WINDOW_SIZE", 4096)
+    pattern = compile_pattern("a.b.c")
+    rng = random.Random(1)
+    lines = ["".join(rng.choice("abcx") for _ in range(rng.randint(0, 9000))) for _ in range(40)]
+    text = "\n".join(lines) + "\n"
+    path = tmp_path / "input.txt"
+    path.write_text(text)
+
+    data = text.encode()
+    assert found_lines(grep_file(pattern, str(path)), data) == expected_lines(
+        pattern, text
+    ), "Windowed scan gave the wrong lines."
+
+
+def test_grep_file_last_line_without_newline(tmp_path):
+    """
+    Test that a last line without a newline is reported.
+    """
+    path = tmp_path / "input.txt"
+    path.write_bytes(b"xx\nyab")
+    assert list(grep_file("a.b", str(path))) == [(2, 3, 6)], "Last line should be reported."
+
+
+def test_grep_empty_file(tmp_path):
+    """
+    Test that an empty file has no matching lines.
+    """
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+    assert not list(grep_file("a*", str(path))), "Empty file should have no lines."
+
+
+def test_grep_file_can_be_abandoned(tmp_path):
+    """
+    Test that stopping a search early closes the mapping cleanly.
+    """
+    path = tmp_path / "input.txt"
+    path.write_bytes(b"ab\n" * 100)
+    matches = grep_file("a.b", str(path))
+    assert next(matches) == (1, 0, 2), "First line should match."
+    matches.close()
+
+
+def test_scan_lines_matches_utf8_labels():
+    """
+    Test that non-ASCII labels match their UTF-8 bytes.
+    """
+    data = "tämä rivi\nei osumaa\nhyvä päivä\n".encode("utf-8")
+    lines = [line.line_number for line in scan_lines("ä.i", data)]
+    assert lines == [3], "Only the line with 'äi' should match."
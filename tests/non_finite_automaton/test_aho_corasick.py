@@ -0,0 +1,66 @@
+"""
+This is a test file for the Aho-Corasick keyword automaton.
+"""
+
+import random
+import pytest
+from src.services.non_finite_automaton import PatternSet
+from src.services.non_finite_automaton.aho_corasick import AhoCorasick
+
+
+def brute_force_occurrences(literals, string):
+    """
+    Every occurrence of every literal, found with str.startswith.
+    """
+    return sorted(
+        ((i, i + len(literal)), literal_id)
+        for literal_id, literal in enumerate(literals)
+        for i in range(len(string))
+        if string.startswith(literal, i)
+    )
+
+
+def test_finditer_agrees_with_brute_force():
+    """
+    Test that every occurrence, overlapping ones included, is found.
+    """
+    rng = random.Random(0)
+    for _ in range(300):
+        literals = sorted(
+            {"".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(5)}
+        )
+        string = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 30)))
+        keywords = AhoCorasick(literals)
+        assert sorted(keywords.finditer(string)) == brute_force_occurrences(
+            literals, string
+        ), f"Wrong occurrences of {literals} in {string!r}."
+
+
+def test_find_returns_first_ending_occurrence():
+    """
+    Test that find reports the occurrence that ends first.
+    """
+    keywords = AhoCorasick(["abcd", "bc", "x"])
+    assert keywords.find("zabcdx") == (4, 1), "'bc' ends before 'abcd'."
+    assert keywords.find("zabcdx", 4) == (6, 2), "Only 'x' ends after index 4."
+    assert keywords.find("zzz") is None, "Nothing should be found."
+
+
+def test_empty_literal_is_rejected():
+    """
+    Test that an empty literal raises ValueError.
+    """
+    with pytest.raises(ValueError):
+        AhoCorasick(["a", ""])
+
+
+def test_pattern_set_prefilter():
+    """
+    Test that a pattern set gets a keyword prefilter only if every pattern needs a literal.
+    """
+    pattern_set = PatternSet(["f.o.o.x*", "(b.a.r|b.a.z).y"])
+    assert pattern_set.prefilter.literals == ["bary", "bazy", "foo"], "Wrong keywords."
+    assert pattern_set.search_matches("xxbazyfoo") == {0, 1}, "Both patterns should be found."
+    assert pattern_set.search_any("xxxx") is None, "Nothing should be found."
+    assert PatternSet(["f.o.o", "a*"]).prefilter is None, "a* needs no literal."
+    assert PatternSet(["f.o.o"], prefilter=False).prefilter is None, "Prefilter was disabled."
@@ -0,0 +1,75 @@
+"""
+This is a test file for the array-backed NFA.
+"""
+
+import pytest
+from src.services.non_finite_automaton import (
+    ArrayNFA,
+    ENGINES,
+    compile_regex,
+    compile_pattern,
+    InvalidRegexError,
+    EmptyRegexError,
+)
+
+CASES = [
+    ("a.b.c", ["abc", "ab", "abcc", ""]),
+    ("a.(b|d).c", ["abc", "adc", "aac"]),
+    ("a.b|c*", ["ab", "ccc", "", "ac"]),
+    ("(a|b)*.a.(a|b)*", ["a", "bab", "bbb", "", "abba"]),
+    ("a.b?", ["a", "ab", "abb"]),
+    ("a.b+", ["a", "ab", "abbb"]),
+]
+
+
+def test_array_nfa_from_postfix_columns():
+    """
+    Test that compiling into arrays lays out one column entry per state.
+    """
+    automaton = ArrayNFA.from_postfix("ab.")
+    assert automaton.state_count == 4, "Failed to create every state."
+    assert list(automaton.epsilon) == [0, 1, 0, 1], "Epsilon flags are wrong."
+    assert chr(automaton.labels[automaton.start]) == "a", "Initial state lost its label."
+    assert automaton.alphabet == ["a", "b"], "Failed to collect the alphabet."
+    assert automaton.nbytes > 0, "Failed to report the array size."
+
+
+def test_array_nfa_from_nfa_matches_from_postfix():
+    """
+    Test that converting a linked NFA gives the same language as compiling into arrays.
+    """
+    converted = ArrayNFA.from_nfa(compile_regex("ab|*a."))
+    compiled = ArrayNFA.from_postfix("ab|*a.")
+    assert converted.state_count == compiled.state_count, "Conversion lost states."
+    for automaton in (converted, compiled):
+        assert automaton.accept in automaton.step(automaton.initial, "a"), "Failed on 'a'."
+        assert automaton.accept not in automaton.step(automaton.initial, "b"), "Matched 'b'."
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("infix, strings", CASES)
+def test_engines_run_on_array_nfa(engine, infix, strings):
+    """
+    Test that every engine gives the same results on the array-backed NFA.
+    """
+    linked = compile_pattern(infix, engine=engine)
+    compact = compile_pattern(infix, engine=engine, compact=True)
+    assert isinstance(compact.automaton, ArrayNFA), "Compact pattern did not use arrays."
+    for string in strings:
+        assert compact.fullmatch(string) == linked.fullmatch(
+            string
+        ), f"Array NFA disagrees on {string!r} against {infix!r} with engine {engine}."
+        assert compact.search(string) == linked.search(string), "Array NFA search disagrees."
+
+
+def test_array_nfa_errors():
+    """
+    Test that compiling into arrays raises the same errors as compile_regex.
+    """
+    with pytest.raises(EmptyRegexError, match="The provided regex is empty."):
+        ArrayNFA.from_postfix("")
+
+    with pytest.raises(
+        InvalidRegexError, match="Invalid regex: \\| operator requires two operands"
+    ):
+        ArrayNFA.from_postfix("a|")
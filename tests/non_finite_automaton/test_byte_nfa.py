@@ -0,0 +1,79 @@
+"""
+This is a test file for matching bytes-like input with the byte-level NFA.
+"""
+
+import array
+import pytest
+from src.services.non_finite_automaton import ENGINES, byte_automaton, compile_pattern, match_regex
+
+CASES = [
+    ("a.b*|c", ["ab", "abbb", "c", "", "ba", "cc"]),
+    ("ä.(ö|b)+", ["äö", "äbö", "ä", "aö", "äx"]),
+    ("(中|a)*.z", ["z", "中中az", "中", "a中"]),
+]
+
+
+@pytest.mark.parametrize("engine", list(ENGINES))
+@pytest.mark.parametrize("infix, strings", CASES)
+def test_bytes_agree_with_str(engine, infix, strings):
+    """
+    Test that bytes, bytearray and memoryview input give the same answers as the
+    decoded str, with spans in byte offsets.
+    """
+    pattern = compile_pattern(infix, engine=engine)
+    for string in strings:
+        data = string.encode("utf-8")
+        expected = pattern.fullmatch(string)
+        for variant in (data, bytearray(data), memoryview(data)):
+            assert pattern.fullmatch(variant) == expected, f"fullmatch differs on {variant!r}."
+        text = "x" + string + "y" + string
+        spans = [
+            (len(text[:start].encode()), len(text[:end].encode()))
+            for start, end in pattern.finditer(text)
+        ]
+        assert list(pattern.finditer(text.encode())) == spans, f"finditer differs on {text!r}."
+        match = pattern.match(string)
+        byte_match = None if match is None else (0, len(string[: match[1]].encode()))
+        assert pattern.match(data) == byte_match, f"match differs on {string!r}."
+
+
+def test_byte_automaton_chains_utf8_bytes():
+    """
+    Test that a non-ASCII label becomes a chain of one state per UTF-8 byte.
+    """
+    pattern = compile_pattern("中.a")
+    automaton = byte_automaton(pattern.automaton)
+    assert automaton.state_count == pattern.automaton.state_count + 2, "Expected two extra states."
+    assert sorted(automaton.alphabet) == sorted("中a".encode()), "Labels should be bytes."
+
+
+def test_prefiltered_byte_search():
+    """
+    Test that byte search with literal and Aho-Corasick prefilters agrees with plain search.
+    """
+    data = "xx för foo 中bar bar中 baz".encode()
+    for infix in ["f.ö.r", "b.a.r.中?", "(f.o.o|b.a.z).中*", "中.b.a.r"]:
+        filtered = compile_pattern(infix)
+        plain = compile_pattern(infix, prefilter=False)
+        assert filtered.prefilter is not None, f"{infix!r} should have a prefilter."
+        for variant in (data, bytearray(data), memoryview(data)):
+            assert list(filtered.finditer(variant)) == list(
+                plain.finditer(data)
+            ), f"Prefiltered search of {infix!r} differs."
+
+
+def test_memoryview_of_other_format():
+    """
+    Test that a memoryview of wider items is matched as its raw bytes.
+    """
+    view = memoryview(array.array("H", [0x6261]))
+    assert compile_pattern("a.b").fullmatch(view), "The view should be read as b'ab'."
+
+
+def test_match_regex_accepts_bytes():
+    """
+    Test match_regex with bytes, including the empty regex on empty input.
+    """
+    assert match_regex("a.b", b"ab"), "b'ab' should match."
+    assert not match_regex("a.b", b"abb"), "b'abb' should not match."
+    assert match_regex("", b""), "The empty regex matches empty bytes."
@@ -0,0 +1,104 @@
+"""
+This is a test file for the compiled pattern cache.
+"""
+
+import pytest
+from src.services.non_finite_automaton import (
+    Pattern,
+    PatternCache,
+    cached_pattern,
+    cache_info,
+    configure_cache,
+    clear_cache,
+    match_regex,
+    EmptyRegexError,
+    DEFAULT_CACHE_SIZE,
+)
+
+
+def test_cache_hits_and_misses():
+    """
+    Test that a repeated lookup is answered from the cache.
+    """
+    cache = PatternCache(Pattern, maxsize=4)
+    first = cache.get("a.b")
+    second = cache.get("a.b")
+    assert first is second, "Cache compiled the same pattern twice."
+    info = cache.info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1), "Wrong cache counters."
+
+
+def test_cache_canonicalises_equivalent_spellings():
+    """
+    Test that spellings with the same postfix form share one cache entry.
+    """
+    cache = PatternCache(Pattern, maxsize=4)
+    first = cache.get("a.b")
+    assert cache.get("(a.b)") is first, "Equivalent spelling did not share the cache entry."
+    assert cache.get("((a).(b))") is first, "Equivalent spelling did not share the cache entry."
+    assert len(cache) == 1, "Equivalent spellings were cached separately."
+
+
+def test_cache_lru_eviction():
+    """
+    Test that the least recently used pattern is evicted when the cache is full.
+    """
+    cache = PatternCache(Pattern, maxsize=2)
+    a = cache.get("a")
+    cache.get("b")
+    cache.get("a")  # "b" is now the least recently used
+    cache.get("c")
+    assert cache.info().evictions == 1, "Cache did not evict when full."
+    assert cache.get("a") is a, "Cache evicted the recently used pattern."
+    misses = cache.info().misses
+    cache.get("b")
+    assert cache.info().misses == misses + 1, "Cache did not evict the least recently used one."
+
+
+def test_cache_configure_and_clear():
+    """
+    Test that the cache can be resized, disabled and cleared.
+    """
+    cache = PatternCache(Pattern, maxsize=3)
+    for infix in ("a", "b", "c"):
+        cache.get(infix)
+    cache.configure(1)
+    assert len(cache) == 1, "Shrinking the cache did not evict entries."
+    assert cache.info().evictions == 2, "Shrinking the cache did not count evictions."
+
+    cache.configure(0)
+    assert cache.get("d") is not cache.get("d"), "A disabled cache returned a cached pattern."
+
+    cache.clear()
+    assert cache.info() == (0, 0, 0, 0, 0), "Clearing the cache did not reset it."
+
+    with pytest.raises(ValueError):
+        cache.configure(-1)
+
+
+def test_cache_does_not_store_errors():
+    """
+    Test that an invalid pattern raises on every lookup and is not cached.
+    """
+    cache = PatternCache(Pattern, maxsize=2)
+    for _ in range(2):
+        with pytest.raises(EmptyRegexError):
+            cache.get("")
+    assert len(cache) == 0, "Cache stored a failed compilation."
+
+
+def test_match_regex_uses_process_wide_cache():
+    """
+    Test that match_regex reuses patterns from the process-wide cache.
+    """
+    clear_cache()
+    assert match_regex("a.b*", "abb"), "Failed to match with a cached pattern."
+    assert not match_regex("(a).b*", "ba"), "Incorrectly matched with a cached pattern."
+    info = cache_info()
+    assert (info.hits, info.misses) == (1, 1), "match_regex did not use the cache."
+    assert cached_pattern("a.b*") is cached_pattern("(a.(b*))"), "Cache entries not shared."
+
+    configure_cache(0)
+    assert cache_info().currsize == 0, "Disabling the cache did not empty it."
+    configure_cache(DEFAULT_CACHE_SIZE)
+    clear_cache()
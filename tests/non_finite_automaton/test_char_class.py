@@ -0,0 +1,252 @@
+"""
+This is a test file for character classes as NFA labels.
+"""
+
+import pickle
+import random
+import re
+import pytest
+from src.services.deterministic_finite_automaton import DFA
+from src.services.non_finite_automaton import (
+    ENGINES,
+    ArrayNFA,
+    BitParallelGlushkov,
+    CharClass,
+    InvalidRegexError,
+    PatternSet,
+    StreamMatcher,
+    compile_pattern,
+    parse_bracket,
+)
+from src.services.non_finite_automaton.byte_nfa import byte_automaton
+from src.services.non_finite_automaton.char_class import ANY, alphabet_partition, match_labels
+from src.services.postfix import shunting_yard
+
+# (infix, equivalent Python regex)
+CASES = [
+    ("[a-c]+.x", "[a-c]+x"),
+    ("\\d+.\\.?.\\d*", r"\d+\.?\d*"),
+    ("[^ab]*.b", "[^ab]*b"),
+    ("\\N+", ".+"),
+    ("(\\w|\\-)+", r"[\w-]+"),
+    ("[α-ω]+.[^α-ω\\s]", r"[α-ω]+[^α-ω\s]"),
+    ("\\s.\\S", r"\s\S"),
+    ("[]a]*.1", "[]a]*1"),
+    ("\\*.\\|", r"\*\|"),
+    ("[a\\-z]+", r"[a\-z]+"),
+    ("(a|[^a\\n])*.中", "(a|[^a\\n])*中"),
+]
+
+TEXT_ALPHABET = "abcx.-*|]19 \nαβω中"
+
+
+def random_strings(seed, count=150, length=8):
+    """
+    Random strings over an alphabet that hits the edges of the classes.
+    """
+    rng = random.Random(seed)
+    return [
+        "".join(rng.choice(TEXT_ALPHABET) for _ in range(rng.randrange(length)))
+        for _ in range(count)
+    ]
+
+
+def expected_search(regex, string):
+    """
+    The leftmost longest match of a Python regex, found by brute force.
+    """
+    for start in range(len(string) + 1):
+        for end in range(len(string), start - 1, -1):
+            if regex.fullmatch(string, start, end):
+                return start, end
+    return None
+
+
+def test_membership_ascii_and_unicode():
+    """
+    Test that membership is tested by mask below 256 and by bisect above it.
+    """
+    char_class = CharClass([(ord("a"), ord("f")), (0x3B1, 0x3C9), (0x4E2D, 0x4E2D)])
+    assert "c" in char_class and "g" not in char_class, "Wrong ASCII membership."
+    assert "β" in char_class and "中" in char_class, "Wrong membership above ASCII."
+    assert "ϊ" not in char_class and "A" not in char_class, "Character outside should not match."
+    assert ord("d") in char_class, "Ints should be tested as code points."
+    assert char_class.mask == 0b111111 << ord("a"), "Wrong ASCII mask."
+
+
+def test_match_labels_use_membership():
+    """
+    Test that match labels are tested with in, while a class keeps plain equality.
+    """
+    digits = CharClass([(ord("0"), ord("9"))])
+    labels = match_labels(["a", digits, None, 98, CharClass([(ord("0"), ord("9"))])])
+    assert "a" in labels[0] and "b" not in labels[0], "A character should match itself."
+    assert "7" in labels[1] and "x" not in labels[1], "A class should match its members."
+    assert "a" not in labels[2] and 97 not in labels[2], "An epsilon state matches nothing."
+    assert 98 in labels[3] and 97 not in labels[3], "A byte should match itself."
+    assert labels[4] is labels[1], "Equal classes should share one label."
+    assert digits != "7" and hash(labels[1]) == hash(digits), "== should stay equality."
+
+
+def test_negated_class_is_complemented():
+    """
+    Test that a negated class is stored as the ranges of its complement.
+    """
+    char_class = CharClass([(ord("b"), ord("y"))], negated=True)
+    assert char_class.ranges == ((0, ord("a")), (ord("z"), 0x10FFFF)), "Wrong complement."
+    assert "a" in char_class and "中" in char_class and "m" not in char_class, "Wrong membership."
+    assert "\n" not in ANY and "x" in ANY and "\U0001f600" in ANY, "Wrong any character class."
+
+
+def test_ranges_are_merged():
+    """
+    Test that overlapping and adjacent ranges are merged, so equal sets compare equal.
+    """
+    assert parse_bracket("[a-cb-fg]") == parse_bracket("[a-g]"), "Ranges should be merged."
+    assert hash(parse_bracket("[ba]")) == hash(parse_bracket("[a-b]")), "Hashes should agree."
+    assert parse_bracket("[\\d_]").ranges == ((48, 57), (95, 95)), "Wrong class escape in brackets."
+
+
+def test_invalid_classes():
+    """
+    Test that reversed ranges, unknown escapes and unclosed classes are rejected.
+    """
+    with pytest.raises(InvalidRegexError, match="Invalid range"):
+        compile_pattern("[z-a]")
+    with pytest.raises(InvalidRegexError, match="Unknown escape"):
+        compile_pattern("\\q")
+    with pytest.raises(Exception, match="Character class was not closed"):
+        compile_pattern("a.[bc")
+
+
+def test_shunting_yard_keeps_operands():
+    """
+    Test that escapes and bracket classes are copied to the postfix as one operand.
+    """
+    assert shunting_yard("[a-z]+.\\d") == "[a-z]+\\d.", "Wrong postfix with classes."
+    assert shunting_yard("[(|)].\\.") == "[(|)]\\..", "Operators inside a class are literal."
+
+
+@pytest.mark.parametrize("engine", list(ENGINES))
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("infix, regex", CASES)
+def test_engines_agree_with_re(engine, compact, infix, regex):
+    """
+    Test that every engine accepts the same strings as the equivalent Python regex.
+    """
+    pattern = compile_pattern(infix, engine=engine, compact=compact)
+    compiled = re.compile(regex, re.ASCII)
+    for string in random_strings(len(infix)):
+        expected = compiled.fullmatch(string) is not None
+        assert pattern.fullmatch(string) == expected, f"{infix!r} on {string!r} with {engine}."
+        assert pattern.fullmatch(string.encode("utf-8")) == expected, f"Bytes {string!r}."
+
+
+@pytest.mark.parametrize("infix, regex", CASES)
+def test_search_agrees_with_re(infix, regex):
+    """
+    Test that search finds the leftmost longest match, for str and in UTF-8 bytes.
+    """
+    pattern = compile_pattern(infix)
+    compiled = re.compile(regex, re.ASCII)
+    for string in random_strings(len(infix) + 1, count=60):
+        expected = expected_search(compiled, string)
+        assert pattern.search(string) == expected, f"{infix!r} on {string!r}."
+        if expected is not None:
+            start, end = (len(string[:i].encode("utf-8")) for i in expected)
+            expected = (start, end)
+        assert pattern.search(string.encode("utf-8")) == expected, f"Bytes {string!r}."
+
+
+def test_class_is_one_state():
+    """
+    Test that a class compiles to one labelled state instead of one per character.
+    """
+    chain = compile_pattern("|".join("abcdefghijklmnopqrstuvwxyz"))
+    char_class = compile_pattern("[a-z]")
+    assert char_class.automaton.state_count == 2, "A class should need two states."
+    assert chain.automaton.state_count > 20 * char_class.automaton.state_count, "Chain is larger."
+
+
+def test_array_nfa_stores_classes_once():
+    """
+    Test that the array NFA keeps each distinct class once and labels states with its index.
+    """
+    automaton = ArrayNFA.from_postfix(shunting_yard("[a-z].\\d.[a-z]"))
+    assert automaton.classes == [parse_bracket("[a-z]"), parse_bracket("[0-9]")], "Wrong classes."
+    assert sorted(label for label in automaton.labels if label < 0) == [-2, -1, -1], "Wrong ids."
+    assert automaton.alphabet == [], "Classes are not part of the alphabet."
+
+
+def test_dfa_partitions_alphabet():
+    """
+    Test that the DFA gets one column per block of characters no label tells apart,
+    with Unicode ranges looked up by bisect.
+    """
+    dfa = DFA.from_nfa(compile_pattern("[a-z]*.k.\\N").automaton)
+    assert dfa.class_count == 3, "Expected columns for k, the rest of a-z and any other character."
+    assert dfa.fullmatch("abkk") and dfa.fullmatch("zk中"), "Should match."
+    assert not dfa.fullmatch("ak\n") and not dfa.fullmatch("Ak!"), "Should not match."
+    assert dfa.ranges == [(256, 0x10FFFF, dfa.class_of["!"])], "Wrong range of the any class."
+
+
+def test_alphabet_partition_blocks():
+    """
+    Test that code points matched by the same labels form one block.
+    """
+    blocks = alphabet_partition(["b", parse_bracket("[a-c]"), parse_bracket("[c-d]")])
+    assert blocks == [[(97, 97)], [(98, 98)], [(99, 99)], [(100, 100)]], "Wrong blocks."
+    blocks = alphabet_partition([parse_bracket("[a-cx-z]"), "q"])
+    assert blocks == [[(97, 99), (120, 122)], [(113, 113)]], "Equal ranges should share a block."
+
+
+def test_byte_automaton_compiles_utf8_ranges():
+    """
+    Test that a class is matched by exactly the UTF-8 encodings of its members.
+    """
+    automaton = byte_automaton(compile_pattern("[^a]").automaton)
+    matcher = ENGINES["pike_vm"](automaton)
+    for code in [0, 0x61, 0x7F, 0x80, 0x7FF, 0x800, 0xD7FF, 0xE000, 0xFFFF, 0x10000, 0x10FFFF]:
+        expected = code != 0x61
+        assert matcher.fullmatch(chr(code).encode("utf-8")) == expected, f"Wrong on {code:#x}."
+    assert not matcher.fullmatch(b"\xc3"), "A truncated encoding should not match."
+    assert not matcher.fullmatch(b"\xc3\xa4\xc3\xa4"), "Two characters should not match."
+
+
+def test_glushkov_memoizes_class_masks():
+    """
+    Test that the Glushkov matcher computes masks for characters matched by classes.
+    """
+    matcher = BitParallelGlushkov.from_postfix(shunting_yard("[a-c]+.a"))
+    assert matcher.fullmatch("cba") and not matcher.fullmatch("cbd"), "Wrong match."
+    assert matcher.masks["b"] == 0b10 and matcher.masks["a"] == 0b110, "Wrong memoized masks."
+
+
+def test_pattern_set_and_stream():
+    """
+    Test that the pattern set and the streaming matcher match class labels.
+    """
+    patterns = PatternSet(["\\d+", "[a-f]+", "\\N*.x"])
+    assert patterns.matches("12") == {0} and patterns.matches("fx") == {2}, "Wrong matches."
+    assert patterns.search_matches("..ab..") == {1}, "Wrong search."
+    matcher = StreamMatcher(compile_pattern("[0-9]+"))
+    spans = matcher.feed("ab12") + matcher.feed("3c45") + matcher.finish()
+    assert spans == [(2, 5), (6, 8)], "Stream spans should cross chunk boundaries."
+
+
+def test_prefilter_keeps_escaped_literals():
+    """
+    Test that escaped operators are still literals for the prefilter.
+    """
+    pattern = compile_pattern("w.w.w.\\..e.x.\\..c.o.m")
+    assert pattern.prefilter.literal == "www.ex.com", "Escaped dots should stay in the literal."
+    assert pattern.search("at www.ex.com now") == (3, 13), "Wrong span."
+    assert compile_pattern("[ab].x").prefilter is not None, "Small classes give alternatives."
+
+
+def test_pattern_with_classes_pickles():
+    """
+    Test that a pattern with classes survives pickling.
+    """
+    pattern = pickle.loads(pickle.dumps(compile_pattern("[^0-9]+", compact=True)))
+    assert pattern.fullmatch("abc中") and not pattern.fullmatch("a1"), "Pickled pattern broke."
@@ -0,0 +1,70 @@
+"""
+This is a test file for the bit-parallel Glushkov matcher.
+"""
+
+import random
+import pytest
+from src.services.postfix import shunting_yard
+from src.services.non_finite_automaton import (
+    BitParallelGlushkov,
+    compile_pattern,
+    glushkov_positions,
+)
+from src.services.non_finite_automaton.glushkov import MAX_POSITIONS
+
+INFIXES = [
+    "a.b.c",
+    "a*",
+    "(a|b)*.a.(a|b)",
+    "(a.b|b)*.a?",
+    "((a|b|c)*.(a|b|c)*)*.c",
+    "(a|b).(a|b).(a|b).(a|b).(a|b).(a|b).(a|b).(a|b).(a|b).c*",
+]
+
+
+def test_positions_of_simple_pattern():
+    """
+    Test the positions, follow masks and accepting mask of (a|b)*.c.
+    """
+    symbols, follow, accepting = glushkov_positions(shunting_yard("(a|b)*.c"))
+    assert symbols == [None, "a", "b", "c"], "Every character should be a position."
+    assert follow == [0b1110, 0b1110, 0b1110, 0], "Wrong follow masks."
+    assert accepting == 0b1000, "Only c should be accepting."
+
+
+@pytest.mark.parametrize("infix", INFIXES)
+def test_matches_like_thompson(infix):
+    """
+    Test that both constructions accept the same strings as the Thompson simulation.
+    """
+    thompson = compile_pattern(infix, engine="thompson")
+    from_postfix = BitParallelGlushkov.from_postfix(shunting_yard(infix))
+    from_nfa = BitParallelGlushkov.from_nfa(thompson.automaton)
+    rng = random.Random(infix)
+    for _ in range(300):
+        string = "".join(rng.choice("abc") for _ in range(rng.randint(0, 14)))
+        expected = thompson.fullmatch(string)
+        assert from_postfix.fullmatch(string) == expected, f"{infix!r} on {string!r} differs."
+        assert from_nfa.fullmatch(string) == expected, f"{infix!r} on {string!r} differs."
+        start = rng.randint(0, len(string))
+        assert from_postfix.longest_match(string, start) == thompson.matcher.longest_match(
+            string, start
+        ), f"Longest match of {infix!r} in {string!r} from {start} differs."
+
+
+def test_pattern_engine():
+    """
+    Test that glushkov can be chosen as the engine of a pattern.
+    """
+    pattern = compile_pattern("a.b*", engine="glushkov", compact=True)
+    assert pattern.fullmatch("abbb"), "'abbb' should match."
+    assert not pattern.fullmatch("ba"), "'ba' should not match."
+    assert pattern.matcher.position_count == 2, "The pattern has two positions."
+
+
+def test_too_many_positions():
+    """
+    Test that a pattern with too many positions is rejected.
+    """
+    with pytest.raises(ValueError):
+        BitParallelGlushkov.from_postfix("a" + "a." * MAX_POSITIONS)
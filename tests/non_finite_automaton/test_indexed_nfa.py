@@ -0,0 +1,58 @@
+"""
+This is a test file for the indexed NFA and its precomputed epsilon closures.
+"""
+
+from src.services.non_finite_automaton import compile_regex, IndexedNFA, NO_EDGE
+
+
+def test_indexed_nfa_numbers_states():
+    """
+    Test that every state of the linked NFA gets an id and its edges are kept.
+    """
+    automaton = IndexedNFA.from_nfa(compile_regex("ab."))
+    assert automaton.state_count == 4, "Failed to number every state."
+    assert automaton.start == 0, "Initial state should be numbered first."
+    assert automaton.labels[automaton.start] == "a", "Initial state lost its label."
+    assert automaton.edge2[automaton.accept] == NO_EDGE, "Accept state should have no edges."
+    assert automaton.alphabet == ["a", "b"], "Failed to collect the alphabet."
+
+
+def test_indexed_nfa_closures_contain_only_important_states():
+    """
+    Test that closures skip epsilon relays and keep labelled states and the accept state.
+    """
+    automaton = IndexedNFA.from_nfa(compile_regex("ab|*"))
+    labels = automaton.labels
+    assert sorted(labels[state] or "accept" for state in automaton.initial) == [
+        "a",
+        "accept",
+        "b",
+    ], "Initial closure should hold both letters and the accept state."
+    for state, label in enumerate(labels):
+        if label is not None:
+            assert automaton.follow[state] == automaton.initial, "Star closure is wrong."
+        else:
+            assert automaton.follow[state] == (), "Epsilon states should have no follow set."
+
+
+def test_indexed_nfa_step_unions_closures():
+    """
+    Test that a step takes the union of the closures of the matching states.
+    """
+    automaton = IndexedNFA.from_nfa(compile_regex("ab|*a."))
+    after_a = automaton.step(automaton.initial, "a")
+    assert automaton.accept in after_a, "Failed to reach the accept state after 'a'."
+    after_b = automaton.step(automaton.initial, "b")
+    assert automaton.accept not in after_b, "Incorrectly reached the accept state after 'b'."
+    assert automaton.step(automaton.initial, "c") == set(), "Unknown character should fail."
+
+
+def test_indexed_nfa_shares_closures_of_epsilon_chains():
+    """
+    Test that the branches of a starred alternation share one follow closure.
+    """
+    automaton = IndexedNFA.from_nfa(compile_regex("ab.cd.|ef.|*"))
+    ends = [automaton.labels.index(label) for label in "bdf"]
+    closures = [automaton.follow[state] for state in ends]
+    assert closures[0] is closures[1] is closures[2], "The closure should be stored once."
+    assert len(closures[0]) == 4, "Every branch start and the accept state should be reachable."
@@ -0,0 +1,125 @@
+"""
+This is a test file for required literal extraction and the literal prefilter.
+"""
+
+import random
+import pytest
+from src.services.postfix import shunting_yard
+from src.services.non_finite_automaton import compile_pattern
+from src.services.non_finite_automaton.literals import (
+    AhoCorasickPrefilter,
+    LiteralPrefilter,
+    analyze_literals,
+    required_alternatives,
+)
+
+
+@pytest.mark.parametrize(
+    "infix, prefix, required",
+    [
+        ("e.r.r.o.r.(a|b)*", "error", "error"),
+        ("(a|b)*.f.o.o.x?", "", "foo"),
+        ("a.b.c|a.b.d", "ab", "ab"),
+        ("x*.(a.b.c|d.b.c)", "", "bc"),
+        ("(a.b)+.c", "ab", "abc"),
+        ("a*|b", "", ""),
+    ],
+)
+def test_analyze_literals(infix, prefix, required):
+    """
+    Test that the prefix and the required literal are found.
+    """
+    info = analyze_literals(shunting_yard(infix))
+    assert info.prefix == prefix, f"Wrong prefix for {infix!r}: {info.prefix!r}."
+    assert info.required == required, f"Wrong required literal for {infix!r}: {info.required!r}."
+
+
+def test_max_length():
+    """
+    Test that the longest match length is bounded only without loops.
+    """
+    assert analyze_literals(shunting_yard("a.(b|c.d).e?")).max_length == 4, "Longest is 'acde'."
+    assert analyze_literals(shunting_yard("a.b*")).max_length is None, "b* is unbounded."
+
+
+def test_chosen_literal_is_reported():
+    """
+    Test that a pattern reports the literal its search skips ahead to.
+    """
+    pattern = compile_pattern("(a|b)*.f.o.o")
+    assert pattern.prefilter.literal == "foo", "The inner literal should be chosen."
+    assert not pattern.prefilter.is_prefix, "foo is not a prefix."
+    assert compile_pattern("e.r.r.o.r.x*").prefilter.is_prefix, "error is a prefix."
+    assert compile_pattern("a*|b").prefilter is None, "No literal is required."
+    assert compile_pattern("a.b", prefilter=False).prefilter is None, "Prefilter was disabled."
+
+
+def test_alternatives_choose_aho_corasick():
+    """
+    Test that an alternation of literals gets an Aho-Corasick prefilter.
+    """
+    assert required_alternatives(shunting_yard("(f.o.o|b.a.r|b.a.z).x*")) == {
+        "foo",
+        "bar",
+        "baz",
+    }, "Each branch is a required literal."
+    assert required_alternatives(shunting_yard("a*.b?")) is None, "Nothing is required."
+    prefilter = compile_pattern("(f.o.o|b.a.r|b.a.z).x*").prefilter
+    assert isinstance(prefilter, AhoCorasickPrefilter), "A literal set should use Aho-Corasick."
+    assert isinstance(
+        compile_pattern("e.r.r.o.r.(a|b)").prefilter, LiteralPrefilter
+    ), "A long single literal beats the set {'errora', 'errorb'}."
+
+
+@pytest.mark.parametrize(
+    "infix",
+    [
+        "(a.b.c|b.d|d.a).c*",
+        "(a|b).(c|d).a*",
+        "a.b.(c|d)*",
+        "(a|b)*.c.d",
+        "c?.a.b.c",
+        "(a.b|c.b).a",
+        "b.a+|b.c",
+        "d*.a.b.c.d",
+        "(a|b|c){0,3}.d.a",
+        "[a-c]{1,2}.b.d.[a-d]?",
+    ],
+)
+def test_prefiltered_search_agrees_with_plain_search(infix):
+    """
+    Test that searching with the prefilter finds the same spans as without it.
+    """
+    filtered = compile_pattern(infix)
+    plain = compile_pattern(infix, prefilter=False)
+    assert filtered.prefilter is not None, f"{infix!r} should have a prefilter."
+    rng = random.Random(infix)
+    for _ in range(300):
+        string = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 16)))
+        assert list(filtered.finditer(string)) == list(
+            plain.finditer(string)
+        ), f"Prefiltered search of {infix!r} in {string!r} gave the wrong spans."
+
+
+def test_inner_literal_is_verified_in_a_window():
+    """
+    Test that a bounded pattern only runs the automaton in windows around the literal.
+    """
+    pattern = compile_pattern("[a-c]{0,2}.x.y.z.[0-9]")
+    searcher = pattern.searcher
+    scanned = []
+
+    class CountingSearcher:
+        """
+        Records the length of every string the automaton searches.
+        """
+
+        @staticmethod
+        def search(string, pos=0):
+            scanned.append(len(string) - pos)
+            return searcher.search(string, pos)
+
+    pattern._Pattern__searcher = CountingSearcher()
+    string = ("a" * 1000 + "xyz") * 20 + "bxyz7"
+    assert pattern.search(string) == (len(string) - 5, len(string)), "Wrong span."
+    assert len(scanned) == 21 and max(scanned) <= 12, "Only windows should be scanned."
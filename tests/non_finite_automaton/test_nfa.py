@@ -9,6 +9,7 @@ from src.services.non_finite_automaton import (
     InvalidRegexError,
     EmptyRegexError,
 )
+from src.services.non_finite_automaton.nfa import match_regex as nfa_match_regex
 
 
 def test_compile_regex():
@@ -180,3 +181,11 @@ def test_match_regex_empty_regex_error():
     """
     with pytest.raises(EmptyRegexError, match="The provided regex is empty."):
         match_regex("", "abc")
+
+
+def test_match_regex_from_nfa_module():
+    """
+    Test that match_regex can still be imported from the nfa module.
+    """
+    assert nfa_match_regex("a.b*", "abb"), "Failed to match through the nfa module."
+    assert not nfa_match_regex("a.b*", "ba"), "Incorrectly matched through the nfa module."
@@ -0,0 +1,84 @@
+"""
+This is a test file for the compiled Pattern functionality.
+"""
+
+import pytest
+from src.services.non_finite_automaton import (
+    Pattern,
+    compile_pattern,
+    EmptyRegexError,
+    InvalidRegexError,
+)
+
+
+def test_compile_pattern_returns_pattern():
+    """
+    Test that compile_pattern returns a Pattern holding the compiled NFA.
+    """
+    pattern = compile_pattern("a.b*")
+    assert isinstance(pattern, Pattern), "compile_pattern did not return a Pattern."
+    assert pattern.pattern == "a.b*", "Pattern did not store the infix regex."
+    assert pattern.postfix == "ab*.", "Pattern did not store the postfix regex."
+    assert pattern.nfa.accept_state is not None, "Pattern did not store the NFA."
+
+
+def test_pattern_fullmatch_reuses_nfa():
+    """
+    Test that a pattern can be matched against many strings with the same NFA.
+    """
+    pattern = compile_pattern("a.(b|c)*")
+    nfa = pattern.nfa
+    assert pattern.fullmatch("a"), "Failed to fullmatch a single 'a'."
+    assert pattern.fullmatch("abcb"), "Failed to fullmatch 'abcb'."
+    assert not pattern.fullmatch("abd"), "Incorrectly fullmatched 'abd'."
+    assert not pattern.fullmatch(""), "Incorrectly fullmatched the empty string."
+    assert pattern.nfa is nfa, "Pattern rebuilt its NFA between matches."
+
+
+def test_pattern_match_longest_prefix():
+    """
+    Test that match returns the span of the longest match at the start of the string.
+    """
+    pattern = compile_pattern("a.b*")
+    assert pattern.match("abbbc") == (0, 4), "Failed to find the longest prefix match."
+    assert pattern.match("a") == (0, 1), "Failed to match the whole string."
+    assert pattern.match("ba") is None, "Incorrectly matched a string not starting with 'a'."
+
+
+def test_pattern_match_empty_match():
+    """
+    Test that a pattern accepting the empty string matches at the start of any string.
+    """
+    pattern = compile_pattern("a*")
+    assert pattern.match("bbb") == (0, 0), "Failed to return an empty match."
+    assert pattern.search("bbb") == (0, 0), "Failed to return an empty search result."
+
+
+def test_pattern_search():
+    """
+    Test that search finds the leftmost longest match anywhere in the string.
+    """
+    pattern = compile_pattern("a.b+")
+    assert pattern.search("xxabbyab") == (2, 5), "Failed to find the leftmost longest match."
+    assert pattern.search("xxxa") is None, "Incorrectly found a match."
+
+
+def test_compile_pattern_errors():
+    """
+    Test that compiling an empty or invalid pattern raises the NFA errors.
+    """
+    with pytest.raises(EmptyRegexError, match="The provided regex is empty."):
+        compile_pattern("")
+
+    with pytest.raises(InvalidRegexError, match="Invalid regex: .*"):
+        compile_pattern("a|")
+
+
+def test_compile_options_are_keyword_only():
+    """
+    Test that the options after the engine must be passed by keyword.
+    """
+    with pytest.raises(TypeError):
+        compile_pattern("a.b", "pike_vm", True)  # pylint: disable=too-many-function-args
+    pattern = compile_pattern("a.b", "pike_vm", compact=True, prefilter=False)
+    assert pattern.fullmatch("ab") and pattern.prefilter is None, "Options were not applied."
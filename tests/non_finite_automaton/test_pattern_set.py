@@ -0,0 +1,91 @@
+"""
+This is a test file for matching many patterns at once with a PatternSet.
+"""
+
+import random
+import pytest
+from src.services.non_finite_automaton import EmptyRegexError, PatternSet, compile_pattern
+
+PATTERNS = ["a.b+", "a*", "(a|b)*.c", "a.b.c.d|c", "c?.(a|b).c", "b", "d.d*"]
+
+
+def random_strings(seed, count=300):
+    """
+    Random short strings over a small alphabet.
+    """
+    rng = random.Random(seed)
+    return ["".join(rng.choice("abcd") for _ in range(rng.randint(0, 10))) for _ in range(count)]
+
+
+def test_matches_agrees_with_single_patterns():
+    """
+    Test that matches returns exactly the patterns that fully match on their own.
+    """
+    pattern_set = PatternSet(PATTERNS)
+    compiled = [compile_pattern(infix) for infix in PATTERNS]
+    for string in random_strings(1):
+        expected = {i for i, pattern in enumerate(compiled) if pattern.fullmatch(string)}
+        assert pattern_set.matches(string) == expected, f"Wrong patterns matched {string!r}."
+
+
+def test_search_matches_agrees_with_single_patterns():
+    """
+    Test that search_matches returns exactly the patterns found somewhere in the string.
+    """
+    pattern_set = PatternSet(PATTERNS)
+    compiled = [compile_pattern(infix) for infix in PATTERNS]
+    for string in random_strings(2):
+        expected = {i for i, pattern in enumerate(compiled) if pattern.search(string)}
+        assert (
+            pattern_set.search_matches(string) == expected
+        ), f"Wrong patterns found in {string!r}."
+
+
+def test_any_match():
+    """
+    Test that any_match returns the smallest matching id, or None.
+    """
+    pattern_set = PatternSet(["a.b", "a.b+", "c"])
+    assert pattern_set.any_match("ab") == 0, "Both first patterns match 'ab'."
+    assert pattern_set.any_match("abb") == 1, "Only the second pattern matches 'abb'."
+    assert pattern_set.any_match("abc") is None, "No pattern matches 'abc'."
+
+
+def test_search_any_stops_at_first_match():
+    """
+    Test that search_any reports the pattern that matches first in the string.
+    """
+    pattern_set = PatternSet(["x.y.z", "b"])
+    assert pattern_set.search_any("aabxyz") == 1, "'b' is found before 'xyz'."
+    assert pattern_set.search_any("aaa") is None, "Nothing should be found."
+
+
+def test_flushed_cache_gives_same_results():
+    """
+    Test that a tiny DFA cache gives the same results.
+    """
+    small = PatternSet(PATTERNS, cache_states=3)
+    large = PatternSet(PATTERNS)
+    for string in random_strings(3, 100):
+        assert small.matches(string) == large.matches(string), "Flushing changed the result."
+    assert small.flushes > 0, "The cache should have been flushed."
+
+
+def test_empty_set_and_empty_pattern():
+    """
+    Test that an empty set matches nothing and an empty pattern is rejected.
+    """
+    assert PatternSet([]).matches("") == set(), "An empty set matches nothing."
+    with pytest.raises(EmptyRegexError):
+        PatternSet(["a", ""])
+
+
+def test_pattern_set_shares_closures_of_epsilon_chains():
+    """
+    Test that the branches of a starred alternation share one follow closure in the union.
+    """
+    pattern_set = PatternSet(["(a.b|c.d|e.f)*", "x"])
+    ends = [pattern_set.labels.index(label) for label in "bdf"]
+    closures = [pattern_set.follow[state] for state in ends]
+    assert closures[0] is closures[1] is closures[2], "The closure should be stored once."
+    assert pattern_set.matches("abef") == {0}, "The starred pattern should still match."
@@ -0,0 +1,94 @@
+"""
+This is a test file for the Pike VM executor and its sparse sets.
+"""
+
+import pytest
+from src.services.non_finite_automaton import (
+    PikeVM,
+    SparseSet,
+    compile_regex,
+    compile_pattern,
+)
+from src.services.deterministic_finite_automaton import DFA
+
+CASES = [
+    ("a.b.c", ["abc", "ab", "abcc", ""]),
+    ("a.(b|d).c", ["abc", "adc", "aac"]),
+    ("a.b|c*", ["ab", "ccc", "", "ac"]),
+    ("(a|b)*.a.(a|b)*", ["a", "bab", "bbb", "", "abba"]),
+    ("a.b?", ["a", "ab", "abb"]),
+    ("a.b+", ["a", "ab", "abbb"]),
+]
+
+
+def test_sparse_set_add_contains_clear():
+    """
+    Test that the sparse set deduplicates values and clears in constant time.
+    """
+    values = SparseSet(10)
+    for value in (3, 7, 3, 0, 7):
+        values.add(value)
+    assert list(values) == [3, 7, 0], "Sparse set did not keep insertion order without duplicates."
+    assert 7 in values and 5 not in values, "Sparse set membership is wrong."
+    values.clear()
+    assert len(values) == 0 and 3 not in values, "Clearing the sparse set left values behind."
+    values.add(5)
+    assert list(values) == [5], "Stale entries leaked into the cleared sparse set."
+
+
+@pytest.mark.parametrize("infix, strings", CASES)
+def test_pike_vm_agrees_with_thompson(infix, strings):
+    """
+    Test that the Pike VM gives the same results as the Thompson simulation.
+    """
+    thompson = compile_pattern(infix, engine="thompson")
+    pike_vm = compile_pattern(infix, engine="pike_vm")
+    for string in strings:
+        assert pike_vm.fullmatch(string) == thompson.fullmatch(
+            string
+        ), f"Engines disagree on fullmatch of {string!r} against {infix!r}."
+        assert pike_vm.search(string) == thompson.search(
+            string
+        ), f"Engines disagree on search of {string!r} against {infix!r}."
+
+
+def test_pike_vm_reuses_state_lists():
+    """
+    Test that consecutive searches reuse the same preallocated state lists.
+    """
+    vm = PikeVM(compile_regex("ab|*a."))
+    assert vm.search("cabac") == (1, 4), "Failed to find a match."
+    assert vm.search("cbbc") is None, "Incorrectly found a match."
+    assert vm.search("aabb", 1) == (1, 2), "Failed to find the longest match."
+    assert len(vm._PikeVM__spare) == 1, "Pike VM allocated new state lists for every match."
+
+
+def test_auto_engine_prefers_dfa():
+    """
+    Test that the default engine uses a DFA when it fits in the state limit.
+    """
+    pattern = compile_pattern("a.(b|c)*")
+    assert pattern.engine == "auto", "The default engine should be auto."
+    assert isinstance(pattern.matcher, DFA), "Auto engine did not build a DFA."
+
+
+def test_auto_engine_falls_back_to_pike_vm():
+    """
+    Test that the default engine falls back to the Pike VM when the DFA is too large.
+    """
+    pattern = compile_pattern("(a|b)*.a.(a|b).(a|b).(a|b).(a|b)", max_states=8)
+    assert isinstance(pattern.matcher, PikeVM), "Auto engine did not fall back to the Pike VM."
+    assert pattern.fullmatch("babbbb"), "Fallback engine failed to match a valid string."
+    assert not pattern.fullmatch("bbbbbb"), "Fallback engine matched an invalid string."
+
+
+def test_pike_vm_merges_shared_closures_once():
+    """
+    Test that states with equal follow closures share one closure tuple and still match.
+    """
+    vm = PikeVM(compile_regex("ab|c|*ab|c|*.*c."))
+    closures = {id(vm.follow[state]) for state, label in enumerate(vm.labels) if label == "a"}
+    assert len(closures) == 1, "Equal closures should be stored as one tuple."
+    assert vm.fullmatch("abcac"), "Failed to match a valid string."
+    assert not vm.fullmatch("abca"), "Incorrectly matched an invalid string."
+    assert vm.search("bbacb") == (0, 4), "Failed to find the leftmost longest match."
@@ -0,0 +1,136 @@
+"""
+This is a test file for the NFA reduction passes.
+"""
+
+import itertools
+import pickle
+import random
+import pytest
+from src.services.non_finite_automaton import (
+    ArrayBuilder,
+    ArrayNFA,
+    IndexedNFA,
+    NFASize,
+    PikeVM,
+    compile_pattern,
+    compile_regex,
+    nfa_size,
+    reduce_nfa,
+    reduction_report,
+)
+from src.services.non_finite_automaton.nfa import NFA, State
+from src.services.postfix.postfix import shunting_yard
+
+STRINGS = ["".join(t) for n in range(6) for t in itertools.product("abc", repeat=n)]
+
+
+def random_regex(rng, depth):
+    """
+    Return a random regex in the simple syntax.
+    """
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice(["a", "b", "c", "[ab]"])
+    left, right = random_regex(rng, depth - 1), random_regex(rng, depth - 1)
+    kind = rng.random()
+    if kind < 0.35:
+        return f"({left}.{right})"
+    if kind < 0.7:
+        return f"({left}|{right})"
+    return f"({left}){rng.choice(['*', '+', '?', '{2}', '{0,2}'])}"
+
+
+def labelled(nfa):
+    """
+    Return the labels of the labelled states of a linked NFA.
+    """
+    automaton = IndexedNFA.from_nfa(nfa)
+    return sorted(label for label in automaton.labels if label is not None)
+
+
+def test_contract_epsilon_chains():
+    """
+    Test that a concatenation keeps one state per character and the accept state.
+    """
+    report = reduction_report(compile_regex("ab.c.d."))
+    assert [name for name, _ in report] == [
+        "compiled",
+        "dead states",
+        "epsilon chains",
+        "equivalent states",
+        "epsilon chains",
+    ], "Wrong passes."
+    assert report[0][1] == NFASize(8, 7), "Thompson should give two states per character."
+    assert report[-1][1] == NFASize(5, 4), "Epsilon chains should be contracted."
+
+
+def test_merge_equivalent_states():
+    """
+    Test that branches with the same ending share its states.
+    """
+    nfa = reduce_nfa(compile_regex(shunting_yard("(a.b.c|x.b.c)*.d")))
+    assert labelled(nfa) == ["a", "b", "c", "d", "x"], "b and c should be merged."
+    star = reduce_nfa(compile_regex("a*"))
+    assert nfa_size(star) == NFASize(3, 3), "The entry and the loop of a* are the same state."
+
+
+def test_remove_dead_states():
+    """
+    Test that states that cannot reach the accept state are removed.
+    """
+    start, live, dead, trap, accept = State(), State("a"), State("b"), State(), State()
+    start.edge1, start.edge2 = dead, live
+    live.edge1 = accept
+    dead.edge1 = trap
+    trap.edge1 = dead
+    reduced = reduce_nfa(NFA(start, accept))
+    assert labelled(reduced) == ["a"], "The b loop can never accept."
+    assert PikeVM(IndexedNFA.from_nfa(reduced)).fullmatch("a"), "Should still match a."
+
+    nothing = State("a")
+    nothing.edge1 = State()
+    nothing.edge1.edge1 = nothing
+    reduced = IndexedNFA.from_nfa(reduce_nfa(NFA(nothing, State())))
+    assert reduced.state_count == 2 and not PikeVM(reduced).fullmatch("a"), "Matches nothing."
+
+
+def test_epsilon_cycles():
+    """
+    Test that nested stars, whose epsilon edges form cycles, keep their language.
+    """
+    nfa = reduce_nfa(compile_regex(shunting_yard("((a*)*|b)*")))
+    vm = PikeVM(IndexedNFA.from_nfa(nfa))
+    for string in STRINGS:
+        assert vm.fullmatch(string) == ("c" not in string), f"Wrong result on {string!r}."
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_reduce_keeps_language(seed):
+    """
+    Test that random regexes accept the same strings and find the same spans after reducing.
+    """
+    rng = random.Random(seed)
+    for _ in range(40):
+        regex = random_regex(rng, 4)
+        postfix = shunting_yard(regex)
+        plain = PikeVM(IndexedNFA.from_nfa(compile_regex(postfix)))
+        reduced = PikeVM(IndexedNFA.from_nfa(reduce_nfa(compile_regex(postfix))))
+        arrays = PikeVM(reduce_nfa(ArrayNFA.from_postfix(postfix), ArrayBuilder()))
+        for string in STRINGS:
+            expected = plain.fullmatch(string)
+            assert reduced.fullmatch(string) == expected, f"{regex!r} on {string!r}."
+            assert arrays.fullmatch(string) == expected, f"Arrays, {regex!r} on {string!r}."
+            assert reduced.search(string) == plain.search(string), f"Span of {regex!r}."
+
+
+def test_pattern_reduces_nfa():
+    """
+    Test that patterns are reduced by default, compact or not, and keep that on pickling.
+    """
+    plain = compile_pattern("(a.b.c|x.b.c)*.d", reduce=False)
+    reduced = compile_pattern("(a.b.c|x.b.c)*.d")
+    compact = compile_pattern("(a.b.c|x.b.c)*.d", compact=True)
+    assert reduced.automaton.state_count < plain.automaton.state_count // 2, "Should shrink."
+    assert compact.automaton.state_count == reduced.automaton.state_count, "Same reduction."
+    copy = pickle.loads(pickle.dumps(reduced))
+    assert nfa_size(copy.nfa) == nfa_size(reduced.nfa), "Unpickled NFA should be reduced."
+    assert copy.search("xxbcabcd") == (1, 8), "Wrong span."
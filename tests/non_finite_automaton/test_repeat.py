@@ -0,0 +1,119 @@
+"""
+This is a test file for counted repetition.
+"""
+
+import itertools
+import re
+import pytest
+from src.services.non_finite_automaton import ENGINES, InvalidRegexError, compile_pattern
+from src.services.non_finite_automaton.char_class import postfix_tokens
+from src.services.non_finite_automaton.literals import analyze_literals
+from src.services.non_finite_automaton.repeat import MAX_REPEAT_TOKENS, Repeat, parse_repeat
+from src.services.postfix import shunting_yard
+
+# (infix, equivalent Python regex)
+CASES = [
+    ("a{3}", "a{3}"),
+    ("a{2,4}", "a{2,4}"),
+    ("a{0,3}.b", "a{0,3}b"),
+    ("a{2,}", "a{2,}"),
+    ("a{0,}.b", "a*b"),
+    ("(a|b.c){1,3}", "(a|bc){1,3}"),
+    ("a*{2}.b", "(?:a*){2}b"),
+    ("a?{2}.b?", "(?:a?){2}b?"),
+    ("(a?.b){0,2}.c", "(a?b){0,2}c"),
+    ("[ab]{2}.c{1,2}", "[ab]{2}c{1,2}"),
+]
+
+
+def strings(alphabet="abc", length=7):
+    """
+    Every string over the alphabet up to the given length.
+    """
+    for size in range(length):
+        for characters in itertools.product(alphabet, repeat=size):
+            yield "".join(characters)
+
+
+def test_parse_repeat():
+    """
+    Test that the three forms of braces are read into their counts.
+    """
+    assert parse_repeat("{3}") == Repeat(3, 3), "Wrong exact count."
+    assert parse_repeat("{2,}") == Repeat(2, None), "Wrong unbounded count."
+    assert parse_repeat("{0,5}") == Repeat(0, 5), "Wrong range."
+
+
+def test_shunting_yard_places_quantifier_after_operand():
+    """
+    Test that a quantifier follows its operand in the postfix, after pending unary operators.
+    """
+    assert shunting_yard("(a.b){2,3}.c") == "ab.{2,3}c.", "Wrong postfix of a repeated group."
+    assert shunting_yard("a*{2}") == "a*{2}", "The star applies first."
+    assert shunting_yard("a{2}*") == "a{2}*", "The star applies to the repeat."
+
+
+def test_expansion_uses_nested_optional_tail():
+    """
+    Test that x{1,3} expands to x(x(x)?)? in postfix.
+    """
+    assert "".join(postfix_tokens("a{1,3}")) == "aaa?.?.", "Wrong expansion."
+    assert "".join(postfix_tokens("a{2,}")) == "aa+.", "Wrong unbounded expansion."
+
+
+@pytest.mark.parametrize("engine", list(ENGINES))
+@pytest.mark.parametrize("infix, regex", CASES)
+def test_engines_agree_with_re(engine, infix, regex):
+    """
+    Test that every engine accepts the same strings as the equivalent Python regex.
+    """
+    pattern = compile_pattern(infix, engine=engine)
+    compiled = re.compile(regex)
+    for string in strings():
+        expected = compiled.fullmatch(string) is not None
+        assert pattern.fullmatch(string) == expected, f"{infix!r} on {string!r} with {engine}."
+
+
+def test_search_finds_bounded_repeat():
+    """
+    Test that search finds the longest bounded repeat.
+    """
+    pattern = compile_pattern("i.d.\\=.[0-9]{1,4}")
+    assert pattern.search("x id=123456") == (2, 9), "Should stop after four digits."
+    assert pattern.search("x id=") is None, "Needs at least one digit."
+
+
+def test_states_grow_linearly():
+    """
+    Test that the automaton grows linearly with the count and stays small for [0-9]{1,64}.
+    """
+    small = compile_pattern("[0-9]{1,64}").automaton.state_count
+    large = compile_pattern("[0-9]{1,640}").automaton.state_count
+    assert small < 200, "[0-9]{1,64} should need about three states per copy."
+    assert large < 11 * small, "States should grow linearly."
+
+
+def test_literals_see_the_copies():
+    """
+    Test that the prefilter analysis works on the expanded regex.
+    """
+    assert analyze_literals("ab.{3}").exact == "ababab", "The copies form one literal."
+    assert analyze_literals("a{2,3}").max_length == 3, "Wrong longest match."
+
+
+def test_invalid_repeats():
+    """
+    Test that malformed, reversed, empty and oversized repeats are rejected.
+    """
+    with pytest.raises(Exception, match="Quantifier braces were not closed"):
+        shunting_yard("a{2")
+    with pytest.raises(Exception, match="Invalid quantifier"):
+        shunting_yard("a{x}")
+    with pytest.raises(InvalidRegexError, match="not rising"):
+        compile_pattern("a{3,2}")
+    with pytest.raises(InvalidRegexError, match="only the empty string"):
+        compile_pattern("a{0}")
+    with pytest.raises(InvalidRegexError, match="no operand"):
+        compile_pattern("{2}")
+    with pytest.raises(InvalidRegexError, match=str(MAX_REPEAT_TOKENS)):
+        compile_pattern("(a{1000}){1000}")
@@ -0,0 +1,82 @@
+"""
+This is a test file for unanchored search and finditer.
+"""
+
+import random
+import pytest
+from src.services.non_finite_automaton import compile_pattern
+
+
+def brute_force_search(pattern, string, pos=0):
+    """
+    Leftmost longest search by trying every start position.
+    """
+    for start in range(pos, len(string) + 1):
+        end = pattern.matcher.longest_match(string, start)
+        if end is not None:
+            return start, end
+    return None
+
+
+@pytest.mark.parametrize(
+    "infix", ["a.b+", "a*", "(a|b)*.c", "a.b.c.d|c", "(a.b|b)*.a", "c?.(a|b).c"]
+)
+def test_search_agrees_with_brute_force(infix):
+    """
+    Test that the single pass search finds the same span as trying every start.
+    """
+    pattern = compile_pattern(infix)
+    rng = random.Random(infix)
+    for _ in range(200):
+        string = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 12)))
+        for pos in (0, len(string) // 2):
+            assert pattern.search(string, pos) == brute_force_search(
+                pattern, string, pos
+            ), f"Search of {infix!r} in {string!r} from {pos} gave the wrong span."
+
+
+def test_search_prefers_leftmost_over_first_found():
+    """
+    Test that a match found later but starting earlier wins.
+    """
+    pattern = compile_pattern("a.b.c.d|c")
+    assert pattern.search("abcd") == (0, 4), "Search did not prefer the leftmost match."
+    assert pattern.search("abce") == (2, 3), "Search did not fall back to the later match."
+
+
+def test_search_no_match():
+    """
+    Test that search returns None when nothing matches.
+    """
+    assert compile_pattern("a.b").search("bbbbba") is None, "Incorrectly found a match."
+    assert compile_pattern("a.b").search("") is None, "Incorrectly found a match in ''."
+
+
+def test_finditer_spans():
+    """
+    Test that finditer yields every non-overlapping leftmost longest match.
+    """
+    pattern = compile_pattern("a.b*")
+    assert list(pattern.finditer("xabbxaab")) == [(1, 4), (5, 6), (6, 8)], "Wrong spans."
+
+
+def test_finditer_empty_matches():
+    """
+    Test that finditer advances past empty matches.
+    """
+    pattern = compile_pattern("a*")
+    assert list(pattern.finditer("baab")) == [
+        (0, 0),
+        (1, 3),
+        (3, 3),
+        (4, 4),
+    ], "Wrong spans with empty matches."
+
+
+def test_finditer_is_lazy():
+    """
+    Test that finditer is a generator that only searches as far as it is consumed.
+    """
+    matches = compile_pattern("a").finditer("a" * 1000)
+    assert next(matches) == (0, 1), "First match is wrong."
+    assert next(matches) == (1, 2), "Second match is wrong."
@@ -0,0 +1,162 @@
+"""
+This is a test file for the streaming matcher.
+"""
+
+import json
+import random
+import pytest
+from src.services.non_finite_automaton import StreamMatcher, compile_pattern
+
+
+def stream_spans(matcher, chunks):
+    """
+    Feed every chunk to a matcher and collect all reported spans.
+    """
+    spans = []
+    for chunk in chunks:
+        spans.extend(matcher.feed(chunk))
+    spans.extend(matcher.finish())
+    return spans
+
+
+def random_chunks(rng, string):
+    """
+    Split a string into randomly sized chunks, empty ones included.
+    """
+    chunks = []
+    i = 0
+    while i < len(string):
+        size = rng.randint(0, 4)
+        chunks.append(string[i : i + size])
+        i += size
+    return chunks
+
+
+@pytest.mark.parametrize("infix", ["a.b+", "a*", "(a|b)*.c", "a.b.c.d|c", "c?.(a|b).c"])
+def test_stream_agrees_with_finditer(infix):
+    """
+    Test that streaming a string in random chunks reports the same spans as finditer.
+    """
+    pattern = compile_pattern(infix)
+    rng = random.Random(infix)
+    for _ in range(200):
+        string = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 16)))
+        spans = stream_spans(StreamMatcher(pattern), random_chunks(rng, string))
+        assert spans == list(
+            pattern.finditer(string)
+        ), f"Streaming {infix!r} over {string!r} gave the wrong spans."
+
+
+def test_match_spanning_chunks():
+    """
+    Test that a match split over several chunks is reported with stream offsets.
+    """
+    matcher = StreamMatcher(compile_pattern("a.b.c"))
+    assert matcher.feed("xxa") == [], "Incomplete match should not be reported."
+    assert matcher.feed("b") == [], "Incomplete match should not be reported."
+    assert matcher.feed("cx") == [(2, 5)], "Match across chunks should be reported."
+    assert matcher.finish() == [], "No matches should be left."
+
+
+def test_longest_match_waits_for_more_input():
+    """
+    Test that a match which could still grow is held back until it cannot.
+    """
+    matcher = StreamMatcher(compile_pattern("a+"))
+    assert matcher.feed("aa") == [], "Match could still grow."
+    assert matcher.feed("ab") == [(0, 3)], "Match ended at the b."
+    assert matcher.feed("a") == [], "Match could still grow."
+    assert matcher.finish() == [(4, 5)], "Finish should report the pending match."
+
+
+def test_anchored_matcher_dies_early():
+    """
+    Test that an anchored matcher reports when no match is possible any more.
+    """
+    matcher = StreamMatcher(compile_pattern("a.b*"), anchored=True)
+    matcher.feed("ab")
+    assert not matcher.is_dead(), "Matcher should be alive while b's may follow."
+    assert matcher.accepts(), "'ab' should be accepted."
+    assert matcher.feed("bc") == [(0, 3)], "Longest match from the start should be reported."
+    assert matcher.is_dead(), "Matcher should be dead after the c."
+    assert not matcher.accepts(), "'abbc' should not be accepted."
+    assert matcher.finish() == [], "No matches should be left."
+
+
+def test_unanchored_matcher_never_dies():
+    """
+    Test that an unanchored matcher is never dead.
+    """
+    matcher = StreamMatcher(compile_pattern("a.b"))
+    matcher.feed("cccc")
+    assert not matcher.is_dead(), "A later match is always possible."
+
+
+def test_checkpoint_and_restore():
+    """
+    Test that a matcher restored from a JSON checkpoint continues where it left off.
+    """
+    pattern = compile_pattern("a.b+|c")
+    matcher = StreamMatcher(pattern)
+    spans = matcher.feed("cab")
+    state = json.loads(json.dumps(matcher.checkpoint()))
+
+    restored = StreamMatcher.restore(state)
+    spans += restored.feed("bbxc")
+    spans += restored.finish()
+    assert spans == list(pattern.finditer("cabbbxc")), "Restored matcher gave the wrong spans."
+
+
+def test_restore_rejects_other_pattern():
+    """
+    Test that restoring with a different pattern is refused.
+    """
+    state = StreamMatcher(compile_pattern("a.b")).checkpoint()
+    with pytest.raises(ValueError):
+        StreamMatcher.restore(state, compile_pattern("a.b.c.d"))
+
+
+def test_buffer_is_trimmed():
+    """
+    Test that a long stream without matches does not keep its text.
+    """
+    matcher = StreamMatcher(compile_pattern("a.b"))
+    for _ in range(100):
+        matcher.feed("x" * 1000)
+    assert len(matcher.checkpoint()["buffer"]) < 10_000, "Old text should be dropped."
+
+
+def test_feed_after_finish_raises():
+    """
+    Test that feeding a finished matcher raises ValueError.
+    """
+    matcher = StreamMatcher(compile_pattern("a"))
+    matcher.finish()
+    with pytest.raises(ValueError):
+        matcher.feed("a")
+
+
+def test_buffer_stays_bounded_while_threads_live():
+    """
+    Test that a thread that stays alive for the whole stream does not keep the text it read.
+    """
+    pattern = compile_pattern("(a|b)*.c")
+    matcher = StreamMatcher(pattern)
+    for _ in range(200):
+        assert matcher.feed("ab" * 500) == [], "Nothing can match without a c."
+        assert len(matcher.checkpoint()["buffer"]) <= 1_000, "Only the last chunk may be kept."
+    assert matcher.feed("abc") == [] and matcher.finish() == [(0, 200_003)], "Wrong span."
+
+
+def test_restore_keeps_compile_options():
+    """
+    Test that a checkpoint of a Python syntax pattern restores with the same options.
+    """
+    pattern = compile_pattern("ab+c", engine="pike_vm", syntax="python", reduce=False)
+    matcher = StreamMatcher(pattern)
+    spans = matcher.feed("xab")
+    restored = StreamMatcher.restore(json.loads(json.dumps(matcher.checkpoint())))
+    assert restored.pattern.syntax == "python" and restored.pattern.engine == "pike_vm", "Options."
+    assert not restored.pattern.reduce, "The pattern should not be reduced."
+    spans += restored.feed("bbcab") + restored.finish()
+    assert spans == [(1, 6)], "Restored matcher gave the wrong spans."
@@ -0,0 +1,91 @@
+"""
+This is a test file for batch matching in a process pool.
+"""
+
+import pickle
+import random
+import pytest
+from src.services.non_finite_automaton import PatternSet, compile_pattern
+from src.services.parallel import match_many, match_many_set
+
+
+def random_strings(count):
+    """
+    Random short strings over a small alphabet.
+    """
+    rng = random.Random(count)
+    return ["".join(rng.choice("abc") for _ in range(rng.randint(0, 8))) for _ in range(count)]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_match_many_in_order(workers):
+    """
+    Test that results come back in input order and agree with fullmatch.
+    """
+    pattern = compile_pattern("(a|b)*.c")
+    strings = random_strings(500)
+    results = list(match_many(pattern, iter(strings), workers=workers, chunksize=32))
+    assert results == [pattern.fullmatch(string) for string in strings], "Wrong results."
+
+
+def test_match_many_in_completion_order():
+    """
+    Test that unordered results carry the index of their string.
+    """
+    strings = random_strings(300)
+    results = dict(match_many("a.b*", strings, workers=2, chunksize=16, ordered=False))
+    pattern = compile_pattern("a.b*")
+    assert results == {
+        index: pattern.fullmatch(string) for index, string in enumerate(strings)
+    }, "Every string should get its own result."
+
+
+def test_match_many_set():
+    """
+    Test the pattern set variant against matching the set in this process.
+    """
+    pattern_set = PatternSet(["a.b", "(a|b)*", "c+"])
+    strings = random_strings(200)
+    results = list(match_many_set(pattern_set, strings, workers=2, chunksize=10))
+    assert results == [pattern_set.matches(string) for string in strings], "Wrong results."
+
+
+def test_invalid_chunksize():
+    """
+    Test that a chunksize below 1 raises ValueError.
+    """
+    with pytest.raises(ValueError):
+        match_many("a", ["a"], chunksize=0)
+
+
+def test_compiled_forms_survive_pickling():
+    """
+    Test that patterns with long linked NFAs and warm DFA caches can be sent to workers.
+    """
+    long_pattern = compile_pattern("a." * 3000 + "a")
+    lazy = compile_pattern("(a|b)*.c", engine="lazy_dfa")
+    lazy.fullmatch("abababc")
+    pattern_set = PatternSet(["a.b", "c"])
+    pattern_set.search_matches("xxabc")
+
+    assert pickle.loads(pickle.dumps(long_pattern)).fullmatch("a" * 3001), "Long pattern broke."
+    assert pickle.loads(pickle.dumps(lazy)).fullmatch("bac"), "Lazy DFA broke."
+    restored = pickle.loads(pickle.dumps(pattern_set))
+    assert restored.search_matches("abc") == {0, 1}, "Pattern set broke."
+
+
+def test_unpickled_pattern_matches_without_compiling(monkeypatch):
+    """
+    Test that a pattern sent to a worker matches without compiling its NFA again.
+    """
+    pattern = compile_pattern("(a|b)*.c")
+    data = pickle.dumps(pattern)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The NFA should not be compiled.")
+
+    monkeypatch.setattr("src.services.non_finite_automaton.pattern.compile_regex", fail)
+    copy = pickle.loads(data)
+    assert copy.fullmatch("abc") and copy.search("xxbc") == (2, 4), "Unpickled pattern broke."
+    monkeypatch.undo()
+    assert copy.nfa.accept_state is not None, "The NFA should be compiled on first use."
@@ -0,0 +1,96 @@
+"""
+This is a test file for scanning one file in parallel shards.
+"""
+
+import random
+import pytest
+from src.services.file_search import grep_file
+from src.services.non_finite_automaton import compile_pattern
+from src.services.parallel import finditer_file_parallel, grep_file_parallel
+
+
+def write_text(tmp_path, text):
+    """
+    Write text to a file and return its path.
+    """
+    path = tmp_path / "input.txt"
+    path.write_bytes(text.encode("ascii"))
+    return str(path)
+
+
+def random_text(seed, length=3000, alphabet="ab\n"):
+    """
+    Random text over a small alphabet with line breaks.
+    """
+    rng = random.Random(seed)
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+@pytest.mark.parametrize("shards", [1, 3, 17])
+def test_grep_matches_sequential_scan(tmp_path, shards):
+    """
+    Test that sharded grep yields the same lines and line numbers as grep_file.
+    """
+    path = write_text(tmp_path, random_text(shards, alphabet="abc\n"))
+    expected = list(grep_file("a.b.c", path))
+    result = list(grep_file_parallel("a.b.c", path, workers=2, shards=shards))
+    assert result == expected, "Sharded grep should equal the sequential scan."
+    assert expected, "The test text should contain matches."
+
+
+@pytest.mark.parametrize(
+    "infix", ["a.b", "a?", "(a|b).(a|b).(a|b)", "a.a.b|a.b?.a.a?", "b?.a.a?.a?"]
+)
+@pytest.mark.parametrize("shards", [2, 7, 40])
+def test_finditer_matches_whole_text(tmp_path, infix, shards):
+    """
+    Test that stitched shard matches equal finditer over the whole text,
+    including matches that cross shard boundaries and empty matches.
+    """
+    text = random_text(len(infix) * shards, alphabet="aab")
+    path = write_text(tmp_path, text)
+    expected = list(compile_pattern(infix).finditer(text))
+    result = list(finditer_file_parallel(infix, path, workers=2, shards=shards))
+    assert result == expected, f"Stitched matches of {infix!r} differ from finditer."
+
+
+def test_finditer_unbounded_pattern_aligns_to_lines(tmp_path):
+    """
+    Test that an unbounded pattern is split at line starts and still agrees with finditer.
+    """
+    text = random_text(5)
+    path = write_text(tmp_path, text)
+    expected = list(compile_pattern("a+.b*").finditer(text))
+    result = list(finditer_file_parallel("a+.b*", path, workers=2, shards=9))
+    assert result == expected, "Line aligned shards should agree with finditer."
+
+
+def test_empty_file(tmp_path):
+    """
+    Test that an empty file yields no lines and only the empty match.
+    """
+    path = write_text(tmp_path, "")
+    assert not list(grep_file_parallel("a", path, workers=2)), "No lines to match."
+    assert list(finditer_file_parallel("a*", path, workers=2)) == [(0, 0)], "Wrong empty match."
+
+
+def test_finditer_utf8_spans(tmp_path):
+    """
+    Test that spans of non-ASCII matches are byte offsets of the UTF-8 file.
+    """
+    text = "äx" * 500
+    path = write_text(tmp_path, "")
+    with open(path, "wb") as file:
+        file.write(text.encode("utf-8"))
+    spans = list(finditer_file_parallel("ä.x", path, workers=2, shards=7))
+    assert spans == [(3 * i, 3 * i + 3) for i in range(500)], "Wrong byte spans."
+
+
+def test_finditer_rejects_unbounded_multiline_matches_on_call(tmp_path):
+    """
+    Test that a pattern whose matches may span lines without a length bound is
+    rejected when finditer_file_parallel is called, before any shard is scanned.
+    """
+    path = write_text(tmp_path, "ab\nab\n")
+    with pytest.raises(ValueError):
+        finditer_file_parallel("[^a]*", path, workers=2)
@@ -0,0 +1,139 @@
+"""
+This is a test file for the syntax tree optimizer.
+"""
+
+import itertools
+import random
+import pytest
+from src.services.non_finite_automaton import IndexedNFA, PikeVM, parse_bracket
+from src.services.regex_parser import (
+    Alternation,
+    Concatenation,
+    Literal,
+    Repetition,
+    compile_ast,
+    optimize,
+    parse_regex,
+)
+
+STRINGS = ["".join(t) for n in range(6) for t in itertools.product("abc1", repeat=n)]
+
+
+def optimized(regex):
+    """
+    Parse and optimize a regex.
+    """
+    return optimize(parse_regex(regex))
+
+
+def random_regex(rng, depth):
+    """
+    Return a random regex in Python syntax with alternations, sequences and repeats.
+    """
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice(["a", "b", "c", "[ab]", "\\d", "1"])
+    kind = rng.random()
+    if kind < 0.35:
+        return "".join(random_regex(rng, depth - 1) for _ in range(rng.randint(2, 3)))
+    if kind < 0.7:
+        branches = [random_regex(rng, depth - 1) for _ in range(rng.randint(2, 4))]
+        return "(?:" + "|".join(branches) + ")"
+    quantifier = rng.choice(["*", "+", "?", "{2}", "{1,2}", "{0,2}"])
+    return "(?:" + random_regex(rng, depth - 1) + ")" + quantifier
+
+
+def test_factor_prefixes():
+    """
+    Test that branches with a common start share it.
+    """
+    a, b = Literal("a"), Literal("b")
+    assert optimized("abc|abd") == Concatenation([a, b, Literal(parse_bracket("[cd]"))]), "ab(c|d)"
+    assert optimized("a|ab") == Concatenation([a, Repetition(b, 0, 1)]), "A branch can end early."
+
+
+def test_factor_suffixes():
+    """
+    Test that branches with a common end share it.
+    """
+    expected = Concatenation(
+        [
+            Alternation([Concatenation([Literal("x"), Literal("y")]), Literal("z")]),
+            Literal("c"),
+        ]
+    )
+    assert optimized("xyc|zc") == expected, "Wrong suffix factoring."
+
+
+def test_collapse_repetitions():
+    """
+    Test that nested *, + and ? collapse, and other counts are kept.
+    """
+    star = Repetition(Literal("x"), 0, None)
+    assert optimized("(x*)*") == star and optimized("(x+)*") == star, "Should be x*."
+    assert optimized("(?:x?)+") == star, "(x?)+ matches any number of x."
+    assert optimized("(x+)+") == Repetition(Literal("x"), 1, None), "Should be x+."
+    inner = Repetition(Literal("x"), 2, 2)
+    assert optimized("(?:x{2}){0,2}") == Repetition(inner, 0, 2), "Counts should be kept."
+
+
+def test_merge_single_characters():
+    """
+    Test that single character branches are merged into one class.
+    """
+    assert optimized("a|[b-d]|e") == Literal(parse_bracket("[a-e]")), "Should be one class."
+    assert optimized("a|a") == Literal("a"), "A class of one character is the character."
+    merged = optimized("x|yz|w")
+    assert merged == Alternation([Literal(parse_bracket("[wx]")), optimized("yz")]), "Wrong merge."
+
+
+def test_deduplicate_branches():
+    """
+    Test that identical branches are kept once.
+    """
+    assert optimized("ab*|ab*|ab*") == optimized("ab*"), "Duplicates should be removed."
+
+
+def test_optimize_shrinks_automaton():
+    """
+    Test that a list of words with shared parts compiles to fewer states.
+    """
+    words = [f"{stem}{number}\\.com" for stem in ("mail", "login") for number in range(50)]
+    tree = parse_regex("|".join(words))
+    plain = IndexedNFA.from_nfa(compile_ast(tree)).state_count
+    small = IndexedNFA.from_nfa(compile_ast(optimize(tree))).state_count
+    assert small * 3 < plain, "Factoring should share the stems and the suffix."
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_optimize_keeps_language(seed):
+    """
+    Test that random regexes match the same strings before and after optimizing.
+    """
+    rng = random.Random(seed)
+    for _ in range(40):
+        regex = random_regex(rng, 4)
+        tree = parse_regex(regex)
+        plain = PikeVM(IndexedNFA.from_nfa(compile_ast(tree)))
+        fast = PikeVM(IndexedNFA.from_nfa(compile_ast(optimize(tree))))
+        for string in STRINGS:
+            assert plain.fullmatch(string) == fast.fullmatch(string), f"{regex!r} on {string!r}."
+
+
+def test_long_shared_parts():
+    """
+    Test that prefixes and suffixes thousands of nodes long are factored without recursion.
+    """
+    shared = "x" * 5000
+    a, b, c = Literal("a"), Literal("b"), Literal("c")
+    items = [Literal("x")] * 5000
+    prefixed = optimized(f"{shared}a|{shared}b|{shared}c")
+    assert prefixed == Concatenation(items + [Literal(parse_bracket("[abc]"))]), "Wrong prefix."
+    suffixed = optimized(f"a{shared}z|b{shared}z")
+    assert suffixed == Concatenation(
+        [Literal(parse_bracket("[ab]"))] + items + [Literal("z")]
+    ), "Wrong suffix."
+    both = optimized(f"a{shared}b{shared}|c{shared}d{shared}")
+    assert both.__class__ is Concatenation and both.items[-5000:] == items, "Wrong shared end."
+    assert both.items[0] == Alternation(
+        [Concatenation([a] + items + [b]), Concatenation([c] + items + [Literal("d")])]
+    ), "The heads should stay apart."
@@ -0,0 +1,212 @@
+"""
+This is a test file for parsing Python syntax regexes into a syntax tree.
+"""
+
+import pickle
+import random
+import re
+import pytest
+from src.services.non_finite_automaton import (
+    ENGINES,
+    ANY,
+    ArrayBuilder,
+    EmptyRegexError,
+    InvalidRegexError,
+    compile_pattern,
+    parse_bracket,
+)
+from src.services.regex_parser import (
+    EMPTY,
+    Alternation,
+    Concatenation,
+    Literal,
+    Repetition,
+    ast_postfix,
+    compile_ast,
+    parse_regex,
+)
+
+# Regexes that mean the same in Python and here
+CASES = [
+    "ab|cd",
+    "(ab)*c",
+    "a.c",
+    "[a-c]+x?",
+    "(a|)b",
+    "\\d{2,3}",
+    "x(?:y|z)*",
+    "a|b||c",
+    "()a",
+    "a{0}b",
+    "(a*)*",
+    "[^a]b",
+    "\\.a\\*",
+    "a-b_c",
+    "(a|b|c)(x|y)z{1,2}",
+]
+
+TEXT_ALPHABET = "abcdxyz.*-_12 \n"
+
+
+def random_strings(seed, count=200, length=7):
+    """
+    Random strings over an alphabet that hits the literals and classes of the cases.
+    """
+    rng = random.Random(seed)
+    return [
+        "".join(rng.choice(TEXT_ALPHABET) for _ in range(rng.randrange(length)))
+        for _ in range(count)
+    ]
+
+
+def test_parse_builds_flat_tree():
+    """
+    Test that concatenation is implicit and nested sequences and choices are flattened.
+    """
+    a, b, c = Literal("a"), Literal("b"), Literal("c")
+    assert parse_regex("abc") == Concatenation([a, b, c]), "Wrong concatenation."
+    assert parse_regex("a|(b|c)") == Alternation([a, b, c]), "Nested choices should be flat."
+    assert parse_regex("(?:ab)c") == Concatenation([a, b, c]), "Groups should be flat."
+    assert parse_regex("(ab)*") == Repetition(Concatenation([a, b]), 0, None), "Wrong star."
+    assert parse_regex("a{2,}") == Repetition(a, 2, None), "Wrong counted repeat."
+
+
+def test_parse_labels():
+    """
+    Test that the dot, escapes and brackets become their labels.
+    """
+    assert parse_regex(".") == Literal(ANY), "The dot should match any character."
+    assert parse_regex("\\d") == Literal(parse_bracket("[0-9]")), "Wrong class escape."
+    assert parse_regex("[a-z]") == Literal(parse_bracket("[a-z]")), "Wrong bracket class."
+    assert parse_regex("\\n") == Literal("\n"), "Wrong escape."
+
+
+def test_parse_empty_parts():
+    """
+    Test that empty branches make the rest optional and empty regexes vanish.
+    """
+    a, b = Literal("a"), Literal("b")
+    assert parse_regex("a|b|") == Repetition(Alternation([a, b]), 0, 1), "Empty branch."
+    assert parse_regex("()a") == a, "An empty group should vanish."
+    assert parse_regex("a{0}b") == b, "x{0} should vanish."
+    assert parse_regex("") is EMPTY and parse_regex("()*") is EMPTY, "Should be empty."
+
+
+def test_nodes_have_slots():
+    """
+    Test that nodes are compact and compare and hash by structure.
+    """
+    node = parse_regex("ab|c")
+    assert not hasattr(node, "__dict__"), "Nodes should use __slots__."
+    assert node == parse_regex("(?:ab)|c") and hash(node) == hash(parse_regex("(ab)|c")), "Equal."
+    assert node != parse_regex("ab|d"), "Different trees should differ."
+    copy = pickle.loads(pickle.dumps(node))
+    assert copy == node and hash(copy) == hash(node), "Pickled nodes should stay equal."
+    assert pickle.loads(pickle.dumps(EMPTY)) is EMPTY, "The empty regex should stay one object."
+
+
+def test_postfix_is_balanced():
+    """
+    Test that a long alternation is written as a balanced tree of binary operators.
+    """
+    tokens = ast_postfix(parse_regex("a|b|c|d|e"))
+    assert "".join(tokens) == "ab|cd||e|", "Wrong balanced postfix."
+    assert ast_postfix(parse_regex("a{2}")) == ["a", "a", "."], "Counted repeats are expanded."
+
+
+@pytest.mark.parametrize("engine", list(ENGINES))
+@pytest.mark.parametrize("regex", CASES)
+def test_engines_agree_with_re(engine, regex):
+    """
+    Test that a pattern in Python syntax accepts the same strings as the re module.
+    """
+    pattern = compile_pattern(regex, engine=engine, syntax="python")
+    compiled = re.compile(regex, re.ASCII)
+    for string in random_strings(len(regex)):
+        expected = compiled.fullmatch(string) is not None
+        assert pattern.fullmatch(string) == expected, f"{regex!r} on {string!r} with {engine}."
+
+
+@pytest.mark.parametrize(
+    "regex, message",
+    [
+        ("a**", "multiple repeat"),
+        ("a+?", "multiple repeat"),
+        ("*a", "nothing to repeat"),
+        ("a|*", "nothing to repeat"),
+        ("a)", "Mismatched parentheses"),
+        ("^a", "anchor"),
+        ("(?=a)", "unsupported group"),
+        ("(a", "not closed"),
+        ("(a))", "Mismatched parentheses"),
+        ("a{3,2}", "rising"),
+        ("[a", "not closed"),
+        ("\\q", "Unknown escape"),
+    ],
+)
+def test_invalid_regexes(regex, message):
+    """
+    Test that invalid and unsupported syntax raises InvalidRegexError.
+    """
+    with pytest.raises(InvalidRegexError, match=message):
+        parse_regex(regex)
+
+
+def test_large_alternation():
+    """
+    Test that a 50 000 way alternation parses into one flat node.
+    """
+    words = [f"w{i}x" for i in range(50_000)]
+    node = parse_regex("|".join(words))
+    assert node.__class__ is Alternation and len(node.items) == 50_000, "Should be one node."
+    # Every word is its characters and their concatenations, and the words are joined by "|"
+    expected = sum(2 * len(word) - 1 for word in words) + len(words) - 1
+    assert len(ast_postfix(node)) == expected, "Wrong number of postfix tokens."
+
+
+def test_deep_nesting():
+    """
+    Test that deeply nested groups are parsed without recursion.
+    """
+    assert parse_regex("(" * 200 + "a" + ")" * 200) == Literal("a"), "Groups should vanish."
+    node = parse_regex("(?:" * 2000 + "a|b" + ")*" * 2000)
+    depth = 0
+    while node.__class__ is Repetition:
+        node, depth = node.item, depth + 1
+    assert depth == 2000 and node == parse_regex("a|b"), "Every group should be repeated."
+
+
+@pytest.mark.parametrize("regex", ["[é]", "[ ]", "[~]", "[α-ω]+", "[^ -~]", "[(|)]x", "[a-\\x7f]"])
+def test_classes_keep_every_character(regex):
+    """
+    Test that bracket classes with non-ASCII, space and punctuation characters match like re.
+    """
+    pattern = compile_pattern(regex, syntax="python")
+    compiled = re.compile(regex)
+    for string in ["é", " ", "~", "β", "αω", "a", "\x7f", "(", "|x", "z", ""]:
+        expected = compiled.fullmatch(string) is not None
+        assert pattern.fullmatch(string) == expected, f"{regex!r} on {string!r}."
+
+
+def test_compile_ast():
+    """
+    Test that a tree compiles with any builder and that the empty regex is rejected.
+    """
+    automaton = compile_ast(parse_regex("(ab|c)+"), ArrayBuilder())
+    assert ENGINES["pike_vm"](automaton).fullmatch("abcab"), "Should match."
+    with pytest.raises(EmptyRegexError):
+        compile_ast(parse_regex("()"))
+
+
+def test_python_pattern_search_and_pickle():
+    """
+    Test that a Python syntax pattern searches, uses the prefilter and pickles.
+    """
+    pattern = compile_pattern("id=\\d+", syntax="python")
+    assert pattern.prefilter is not None, "The literal 'id=' should be used."
+    assert pattern.search("x id=42 y") == (2, 7), "Wrong span."
+    assert repr(pattern) == "Pattern('id=\\\\d+', engine='auto', syntax='python')", "Wrong repr."
+    copy = pickle.loads(pickle.dumps(pattern))
+    assert copy.fullmatch("id=7") and not copy.fullmatch("id="), "Pickled pattern broke."
+    with pytest.raises(ValueError, match="Unknown syntax"):
+        compile_pattern("a", syntax="perl")
@@ -3,7 +3,7 @@ This is a test file for the RegexTokenizer.
 """
 
 import pytest
-from src.services.regex_syntax_checker.regex_tokenizer import RegexTokenizer
+from src.services.regex_syntax_checker.regex_tokenizer import RegexTokenizer, TokenTypes
 from . import (
     UnclosedGroupError,
 )
@@ -55,3 +55,23 @@ def test_capture_group_with_backslash_at_end():
     """
     with pytest.raises(UnclosedGroupError, match=r"Capture Group was not closed!"):
         RegexTokenizer("(abc\\)")
+
+
+def test_deeply_nested_capture_groups():
+    """
+    Test that deeply nested capture groups (e.g., ((((a))))) are tokenized without recursion.
+    """
+    sm = RegexTokenizer("(" * 2000 + "a" + ")" * 2000)
+    assert sm.tokens == ["(" * 2000 + "a" + ")" * 2000], "Failed to tokenize deep nesting."
+
+
+def test_capture_group_parentheses_as_tokens():
+    """
+    Test that with whole_groups=False each parenthesis (e.g., in (a(b)c)) is a token of its own.
+    """
+    sm = RegexTokenizer("(a(b)c)", whole_groups=False)
+    assert sm.tokens == ["(", "a", "(", "b", ")", "c", ")"], "Failed to split the groups."
+    assert sm.token_types[:2] == [
+        TokenTypes.CAPTURE_GROUP,
+        TokenTypes.LITERAL,
+    ], "Parentheses should be capture group tokens."
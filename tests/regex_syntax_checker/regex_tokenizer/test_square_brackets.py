@@ -107,3 +107,11 @@ def test_square_brackets_with_only_literal_dash():
     """
     sm = RegexTokenizer("[-]")
     assert sm.tokens == ["[-]"], "Failed to tokenize square brackets with only a literal dash."
+
+
+def test_square_brackets_keep_other_characters():
+    """
+    Test that square brackets keep spaces, punctuation and non-ASCII characters (e.g., [ ~é]).
+    """
+    sm = RegexTokenizer("[ ~é][α-ω]")
+    assert sm.tokens == ["[ ~é]", "[α-ω]"], "Failed to keep every character in the brackets."
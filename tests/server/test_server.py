@@ -0,0 +1,176 @@
+"""
+This is a test file for the batching match server.
+"""
+
+import asyncio
+import json
+import pytest
+from src.services.server import MatchServer, serve
+
+
+async def exchange(path, requests):
+    """
+    Send requests over one connection and return the responses keyed by id.
+    """
+    reader, writer = await asyncio.open_unix_connection(path)
+    for request in requests:
+        writer.write((request if isinstance(request, str) else json.dumps(request)).encode())
+        writer.write(b"\n")
+    await writer.drain()
+    responses = {}
+    for _ in requests:
+        response = json.loads(await reader.readline())
+        responses[response["id"]] = response
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+def run_with_server(tmp_path, client, **options):
+    """
+    Start a server on a Unix socket, run the client coroutine against it and stop it.
+    """
+    path = str(tmp_path / "regex.sock")
+
+    async def main():
+        ready = asyncio.Event()
+        server = MatchServer(workers=1, **options)
+        serving = asyncio.create_task(serve(server, path, ready=lambda _: ready.set()))
+        await ready.wait()
+        try:
+            return await client(path, server)
+        finally:
+            serving.cancel()
+            await asyncio.gather(serving, return_exceptions=True)
+
+    return asyncio.run(main())
+
+
+def test_operations(tmp_path):
+    """
+    Test that every operation answers like the Pattern method of the same name.
+    """
+    requests = [
+        {"id": 1, "op": "fullmatch", "pattern": "a.b*", "string": "abbb"},
+        {"id": 2, "op": "fullmatch", "pattern": "a.b*", "string": "ba"},
+        {"id": 3, "op": "match", "pattern": "a+", "string": "aab"},
+        {"id": 4, "op": "search", "pattern": "b.c", "string": "aabc"},
+        {"id": 5, "op": "finditer", "pattern": "a", "string": "aba"},
+        {"id": 6, "op": "search", "pattern": "z", "string": "aaa"},
+    ]
+    responses = run_with_server(tmp_path, lambda path, _: exchange(path, requests))
+    results = {key: response.get("result") for key, response in responses.items()}
+    assert results == {
+        1: True,
+        2: False,
+        3: [0, 2],
+        4: [2, 4],
+        5: [[0, 1], [2, 3]],
+        6: None,
+    }, "Wrong results."
+
+
+def test_errors(tmp_path):
+    """
+    Test that bad requests get an error response and do not close the connection.
+    """
+    requests = [
+        {"id": "regex", "op": "fullmatch", "pattern": "a|", "string": "a"},
+        {"id": "op", "op": "replace", "pattern": "a", "string": "a"},
+        {"id": "type", "op": "search", "pattern": "a", "string": 5},
+        "not json",
+    ]
+    responses = run_with_server(tmp_path, lambda path, _: exchange(path, requests))
+    assert set(responses) == {"regex", "op", "type", None}, "Every request should be answered."
+    assert all("error" in response for response in responses.values()), "Expected errors."
+
+
+def test_batches_and_stats(tmp_path):
+    """
+    Test that concurrent requests are batched and that stats count cache hits.
+    """
+    requests = [
+        {"id": number, "op": "fullmatch", "pattern": "(a|b)*.c", "string": "ab" * number + "c"}
+        for number in range(200)
+    ]
+
+    async def client(path, server):
+        responses = await exchange(path, requests)
+        stats = (await exchange(path, [{"id": "stats", "op": "stats"}]))["stats"]["result"]
+        return responses, stats, server.batches
+
+    responses, stats, batches = run_with_server(tmp_path, client, batch_delay=0.01)
+    assert all(response["result"] is True for response in responses.values()), "Wrong results."
+    assert batches < len(requests), "Concurrent requests should share batches."
+    assert stats["requests"] == len(requests), "Every request should be counted."
+    assert stats["cache"]["misses"] == 1, "The pattern should be compiled once."
+    assert stats["cache"]["hit_rate"] > 0.99, "Later requests should hit the cache."
+    assert stats["latency_ms"]["p50"] <= stats["latency_ms"]["p99"], "Wrong percentiles."
+    assert stats["queue_depth"] == 0, "The queue should be empty."
+
+
+def test_timeout(tmp_path):
+    """
+    Test that a request is answered with an error once its timeout passes.
+    """
+    request = {"id": 1, "op": "search", "pattern": "a", "string": "a", "timeout": 1e-9}
+
+    async def client(path, server):
+        return (await exchange(path, [request]))[1], server.timeouts
+
+    response, timeouts = run_with_server(tmp_path, client)
+    assert "Timed out" in response["error"], "The request should time out."
+    assert timeouts == 1, "The timeout should be counted."
+
+
+def test_full_queue_waits(tmp_path):
+    """
+    Test that requests beyond the queue and pending limits wait instead of failing.
+    """
+    requests = [
+        {"id": number, "op": "search", "pattern": "b", "string": "a" * number + "b"}
+        for number in range(100)
+    ]
+    responses = run_with_server(
+        tmp_path, lambda path, _: exchange(path, requests), max_queue=2, max_pending=4
+    )
+    assert [responses[number]["result"] for number in range(100)] == [
+        [number, number + 1] for number in range(100)
+    ], "Every request should be answered."
+
+
+def test_invalid_limits():
+    """
+    Test that limits below one are rejected.
+    """
+    with pytest.raises(ValueError):
+        MatchServer(max_queue=0)
+
+
+def test_tuning_options_are_keyword_only():
+    """
+    Test that the options after the worker count can not be passed by position.
+    """
+    with pytest.raises(TypeError):
+        MatchServer(1, 64)
+
+
+def test_timeout_frees_the_worker(tmp_path):
+    """
+    Test that a request that runs past its timeout is stopped in the worker,
+    so the next request does not wait for it to finish.
+    """
+    slow = {"id": 1, "op": "finditer", "pattern": "(a|b)*", "string": "ab" * 1_000_000}
+    slow["timeout"] = 0.2
+    fast = {"id": 2, "op": "search", "pattern": "b", "string": "ab"}
+
+    async def client(path, _):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        responses = await exchange(path, [slow, fast])
+        return responses, loop.time() - started
+
+    responses, elapsed = run_with_server(tmp_path, client)
+    assert "Timed out" in responses[1]["error"], "The slow request should time out."
+    assert responses[2]["result"] == [1, 2], "The fast request should be answered."
+    assert elapsed < 1.5, "The slow request should have been stopped at its deadline."